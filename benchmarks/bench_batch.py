@@ -0,0 +1,29 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, ".")
+
+from benchmarks.bench_tokenizer import source
+from runtime.batch import parse_files
+
+def bench(paths: list[str], workers: int):
+    start = time.perf_counter()
+    results = parse_files(paths, workers)
+    elapsed = time.perf_counter() - start
+    parsing = sum(result.seconds for result in results)
+    print(f"{workers:3d} workers  {len(paths)} files  wall {elapsed:7.3f}s  parse time {parsing:7.3f}s")
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        paths = list()
+        for index in range(64):
+            path = os.path.join(directory, f"module{index}.dc")
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(source(16 * 1024))
+            paths.append(path)
+        workers = 1
+        while workers <= (os.cpu_count() or 1):
+            bench(paths, workers)
+            workers *= 2
@@ -0,0 +1,26 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, ".")
+
+from benchmarks.bench_tokenizer import source
+from runtime.cache import load_program
+
+def bench(size: int):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "module.dc")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(source(size))
+        start = time.perf_counter()
+        load_program(path)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        load_program(path)
+        warm = time.perf_counter() - start
+    print(f"{size / 1024:8.1f} KB  cold {cold * 1000:9.2f} ms  cached {warm * 1000:8.2f} ms  {cold / warm:6.1f}x")
+
+if __name__ == "__main__":
+    for size in (64, 256, 1024):
+        bench(size * 1024)
@@ -0,0 +1,43 @@
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, ".")
+
+from runtime.bytecode import compile_program
+from runtime.interpreter import program_parser
+from runtime.runtime import Runtime
+from runtime.tokenizer import Tokenizer
+from runtime.vm import run_program
+
+programs = {
+    "sum": "let sum = (n) => {{ if n == 0 {{ return 0; }} return n + sum(n - 1); }}; let r = sum({depth});",
+    "walk": """
+let walk = (n) => {{
+    if n == 0 {{ return 1; }}
+    let left = walk(n - 1);
+    return left + 1;
+}};
+let r = walk({depth});
+""",
+}
+
+def bench(name: str, depth: int):
+    t = Tokenizer()
+    t.init(programs[name].format(depth=depth))
+    codes = compile_program(program_parser(t))
+    start = time.perf_counter()
+    run_program(codes, Runtime())
+    elapsed = time.perf_counter() - start
+    # Tracing slows the run down, so memory is measured separately.
+    tracemalloc.start()
+    run_program(codes, Runtime())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{name:5s} depth {depth:8d}  {elapsed:7.3f}s  peak {peak / 2**20:7.1f} MiB  {peak / depth:6.0f} B/frame")
+
+if __name__ == "__main__":
+    # Non-tail recursion far below and far above the Python recursion limit.
+    for name in programs:
+        for depth in (1000, 10000, 100000):
+            bench(name, depth)
@@ -0,0 +1,41 @@
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from runtime.engines import ENGINES, run
+from runtime.interpreter import program_parser
+from runtime.runtime import Runtime
+from runtime.tokenizer import Tokenizer
+
+recursive = """
+let fib = (n) => {
+    if n < 2 { return n; }
+    return fib(n - 1) + fib(n - 2);
+}
+fib(20);
+"""
+
+loop = """
+let i = 0;
+let total = 0;
+while i < 100000 {
+    i = i + 1;
+    if i % 2 == 0 { total = total + i; }
+}
+"""
+
+def bench(name: str, script: str):
+    t = Tokenizer()
+    t.init(script)
+    program = program_parser(t)
+    times = {}
+    for engine in ENGINES:
+        start = time.perf_counter()
+        run(program, Runtime(exteral_fun={"print": print}), engine)
+        times[engine] = time.perf_counter() - start
+    print(f"{name:10s}  " + "  ".join(f"{engine} {elapsed:6.3f}s ({times['tree'] / elapsed:3.1f}x)" for engine, elapsed in times.items()))
+
+if __name__ == "__main__":
+    bench("recursive", recursive)
+    bench("loop", loop)
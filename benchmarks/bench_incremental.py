@@ -0,0 +1,31 @@
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from runtime.incremental import Document
+
+statement = """let f{index} = (left, right) => {{
+  if left < right {{
+    return left + right * {index};
+  }}
+  return left - right;
+}}
+"""
+
+def bench(count: int):
+    script = "".join(statement.format(index=index) for index in range(count))
+    start = time.perf_counter()
+    doc = Document.parse(script)
+    full = time.perf_counter() - start
+    offset = doc.script.index("* 7;")
+    start = time.perf_counter()
+    for _ in range(10):
+        doc.edit(offset + 2, offset + 3, "8")
+        doc.edit(offset + 2, offset + 3, "7")
+    edit = (time.perf_counter() - start) / 20
+    print(f"{count:6d} statements  {len(script) / 1024:8.1f} KB  full parse {full * 1000:9.2f} ms  edit {edit * 1000:7.3f} ms")
+
+if __name__ == "__main__":
+    for count in (250, 1000, 4000):
+        bench(count)
@@ -0,0 +1,51 @@
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from runtime.engines import ENGINES, run
+from runtime.interpreter import program_parser
+from runtime.memo import memoize
+from runtime.runtime import Runtime
+from runtime.tokenizer import Tokenizer
+
+script = """
+let fib = (n) => {
+    if n < 2 { return n; }
+    return fib(n - 1) + fib(n - 2);
+}
+let paths = (x, y) => {
+    if x == 0 { return 1; }
+    if y == 0 { return 1; }
+    return paths(x - 1, y) + paths(x, y - 1);
+}
+let result = fib(22) + paths(9, 9);
+"""
+
+def best(run, repeats: int = 5) -> float:
+    elapsed = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return elapsed
+
+def execute(program, engine: str, memoized: bool):
+    # Fresh tables for every run, so each starts out cold.
+    if memoized:
+        program, tables = memoize(program)
+    runtime = Runtime()
+    run(program, runtime, engine)
+    return runtime.context["result"]
+
+if __name__ == "__main__":
+    t = Tokenizer()
+    t.init(script)
+    program = program_parser(t)
+    _, tables = memoize(program)
+    print(f"memoized: {', '.join(tables)}")
+    for engine in ENGINES:
+        assert execute(program, engine, False) == execute(program, engine, True) == 17711 + 48620
+        plain = best(lambda: execute(program, engine, False))
+        memoized = best(lambda: execute(program, engine, True))
+        print(f"{engine:8s} plain {plain * 1000:9.2f}ms  memoized {memoized * 1000:7.2f}ms  ({plain / memoized:.0f}x)")
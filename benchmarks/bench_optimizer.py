@@ -0,0 +1,53 @@
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from runtime.engines import ENGINES, run
+from runtime.interpreter import program_parser
+from runtime.optimizer import levels, optimize
+from runtime.runtime import Runtime
+from runtime.tokenizer import Tokenizer
+
+# Shaped like generated code: literal arithmetic and constant guards.
+guards = """
+let i = 0;
+let total = 0;
+while i < 50000 {
+    if true {
+        total = total + 60 * 60 * 24 - 86400 + i % (4 + 3);
+    }
+    if 1 > 2 { total = 0; } else { total = total + -(2 * 3) + 6; }
+    while false { total = -1; }
+    i = i + 1 * 1;
+}
+"""
+
+# Small helpers called in a loop, like add in main.dc.
+calls = """
+let add = (left, right) => { return left + right; };
+let scale = (x, factor) => { return x * factor; };
+let i = 0;
+let total = 0;
+while i < 50000 {
+    total = add(total, scale(i, 3)) % 1000;
+    i = add(i, 1);
+}
+"""
+
+scripts = {"guards": guards, "calls": calls}
+
+def bench(script: str, engine: str, level: int) -> float:
+    t = Tokenizer()
+    t.init(script)
+    program = optimize(program_parser(t), level)
+    start = time.perf_counter()
+    run(program, Runtime(), engine)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    for name, script in scripts.items():
+        for engine in ENGINES:
+            times = [bench(script, engine, level) for level in levels]
+            columns = "  ".join(f"-O{level} {seconds:7.3f}s ({times[0] / seconds:.1f}x)" for level, seconds in zip(levels, times))
+            print(f"{name:7s} {engine:10s} {columns}")
@@ -0,0 +1,22 @@
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from benchmarks.bench_tokenizer import source
+from runtime.interpreter import program_parser
+from runtime.tokenizer import Tokenizer
+
+def bench(size: int):
+    script = source(size)
+    t = Tokenizer()
+    t.init(script)
+    start = time.perf_counter()
+    program = program_parser(t)
+    elapsed = time.perf_counter() - start
+    kb = len(script) / 1024
+    print(f"{kb:8.1f} KB  {len(t.tokens):8d} tokens  {len(program.body):6d} statements  {elapsed:7.3f}s  {len(t.tokens) / elapsed / 1000:7.1f} k tokens/s")
+
+if __name__ == "__main__":
+    for size in (64, 128, 256, 512):
+        bench(size * 1024)
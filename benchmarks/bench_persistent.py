@@ -0,0 +1,92 @@
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from runtime.ast import ReturnValue
+from runtime.engines import ENGINES, run
+from runtime.interpreter import program_parser
+from runtime.persistent import PersistentMap, PersistentVector, collection_functions
+from runtime.runtime import Runtime
+from runtime.tokenizer import Tokenizer
+
+# Every update keeps the old version alive, as a program holding on to both
+# would: copy-on-update copies the whole collection each time, the tries copy
+# one path.
+SIZE = 10_000
+UPDATES = 2_000
+
+script = """
+let xs = start;
+let i = 0;
+while i < updates {
+    xs = set(xs, i * 7 % size, i);
+    i = i + 1;
+}
+let result = get(xs, 7);
+"""
+
+def best(run, repeats: int = 5) -> float:
+    elapsed = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return elapsed
+
+def copied_list(xs: list):
+    for i in range(UPDATES):
+        xs = xs.copy()
+        xs[i * 7 % SIZE] = i
+    return xs
+
+def persistent_vector(xs: PersistentVector):
+    for i in range(UPDATES):
+        xs = xs.set(i * 7 % SIZE, i)
+    return xs
+
+def copied_dict(map: dict):
+    for i in range(UPDATES):
+        map = map.copy()
+        map[i * 7 % SIZE] = i
+    return map
+
+def persistent_map(map: PersistentMap):
+    for i in range(UPDATES):
+        map = map.set(i * 7 % SIZE, i)
+    return map
+
+def parse():
+    t = Tokenizer()
+    t.init(script)
+    return program_parser(t)
+
+def execute(program, engine: str, start, functions: dict):
+    runtime = Runtime({"start": start, "size": SIZE, "updates": UPDATES}, exteral_fun=functions)
+    run(program, runtime, engine)
+    return runtime.context["result"]
+
+def copy_set(xs, index, value):
+    xs = xs.copy()
+    xs[index] = value
+    return ReturnValue(xs)
+
+if __name__ == "__main__":
+    values = list(range(SIZE))
+    vector = PersistentVector.from_iterable(values)
+    entries = dict(zip(values, values))
+    map = PersistentMap.from_items(entries.items())
+    assert list(persistent_vector(vector)) == copied_list(values)
+    assert dict(persistent_map(map).items()) == copied_dict(entries)
+    for name, naive, plain, persistent, shared in (("list", copied_list, values, persistent_vector, vector), ("map", copied_dict, entries, persistent_map, map)):
+        copied = best(lambda: naive(plain))
+        updated = best(lambda: persistent(shared))
+        print(f"python   {name:4s} copy {copied * 1000:8.2f}ms  persistent {updated * 1000:8.2f}ms  ({copied / updated:.1f}x)")
+    functions = collection_functions()
+    naive = {"set": copy_set, "get": lambda xs, index: ReturnValue(xs[index])}
+    for engine in ENGINES:
+        program = parse()
+        assert execute(program, engine, vector, functions) == execute(program, engine, values, naive) == 1
+        copied = best(lambda: execute(program, engine, values, naive))
+        updated = best(lambda: execute(program, engine, vector, functions))
+        print(f"{engine:8s} list copy {copied * 1000:8.2f}ms  persistent {updated * 1000:8.2f}ms  ({copied / updated:.1f}x)")
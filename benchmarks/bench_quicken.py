@@ -0,0 +1,57 @@
+import sys
+import time
+from unittest import mock
+
+sys.path.insert(0, ".")
+
+import attr
+
+from runtime import ast
+from runtime.interpreter import program_parser
+from runtime.runtime import Runtime
+from runtime.tokenizer import Tokenizer
+
+loops = {
+    "int arithmetic": "let i = 0; let t = 0; while i < 100000 { t = t + i * 2 % 7; i = i + 1; }",
+    "string concat": 'let i = 0; let s = ""; while i < 50000 { if s == "ab" { s = ""; } s = s + "a"; i = i + 1; }',
+    "calls": """
+let add = (a, b) => { return a + b; };
+let i = 0;
+let t = 0;
+while i < 50000 { t = add(t, i); i = add(i, 1); }
+""",
+    "nested calls": """
+let square = (x) => { return x * x; };
+let sum = (n) => {
+    let i = 0;
+    let t = 0;
+    while i < n { t = t + square(i); i = i + 1; }
+    return t;
+};
+let r = sum(50000);
+""",
+}
+
+def bench(script: str, quicken: bool) -> tuple[float, ast.QuickeningStats]:
+    t = Tokenizer()
+    t.init(script)
+    program = program_parser(t)
+    stats = ast.collect_quickening_stats()
+    # A huge warmup keeps every node on the generic path.
+    with mock.patch.object(ast.BinaryExpression, "_countdown", 8 if quicken else 1 << 62):
+        start = time.perf_counter()
+        program.exec(Runtime())
+        elapsed = time.perf_counter() - start
+    ast.collect_quickening_stats(False)
+    return elapsed, stats
+
+if __name__ == "__main__":
+    for name, script in loops.items():
+        # Interleaved repeats, best of each, to see through noisy machines.
+        generic = quickened = float("inf")
+        for _ in range(15):
+            generic = min(generic, bench(script, False)[0])
+            seconds, stats = bench(script, True)
+            quickened = min(quickened, seconds)
+        counts = ", ".join(f"{field} {value}" for field, value in attr.asdict(stats).items())
+        print(f"{name:15s} generic {generic:6.3f}s  quickened {quickened:6.3f}s  ({generic / quickened:.2f}x)  {counts}")
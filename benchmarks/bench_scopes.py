@@ -0,0 +1,30 @@
+import sys
+import time
+from unittest import mock
+
+sys.path.insert(0, ".")
+
+from runtime import ast
+from runtime.interpreter import program_parser
+from runtime.runtime import Runtime
+from runtime.tokenizer import Tokenizer
+
+loops = {
+    "no declarations": "let i = 0; while i < {count} {{ i = i + 1; if i > 0 {{ i = i + 0; }} }}",
+    "declarations": "let i = 0; let t = 0; while i < {count} {{ let j = i; t = t + j; i = i + 1; }}",
+    "closures": "let i = 0; let f = 0; while i < {count} {{ let j = i; f = () => {{ return j; }}; i = i + 1; }}",
+}
+
+def bench(name: str, script: str, count: int):
+    t = Tokenizer()
+    t.init(script.format(count=count))
+    program = program_parser(t)
+    with mock.patch.object(ast, "Runtime", wraps=Runtime) as scopes:
+        start = time.perf_counter()
+        program.exec(Runtime())
+        elapsed = time.perf_counter() - start
+    print(f"{name:16s} {count:8d} iterations  {scopes.call_count:8d} scopes  {elapsed:7.3f}s")
+
+if __name__ == "__main__":
+    for name, script in loops.items():
+        bench(name, script, 100000)
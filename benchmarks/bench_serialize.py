@@ -0,0 +1,28 @@
+import json
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from benchmarks.bench_tokenizer import source
+from runtime.interpreter import program_parser
+from runtime.serialize import dumps, loads
+from runtime.tokenizer import Tokenizer
+
+def bench(size: int):
+    script = source(size)
+    start = time.perf_counter()
+    t = Tokenizer()
+    t.init(script)
+    program = program_parser(t)
+    parse = time.perf_counter() - start
+    data = dumps(program)
+    start = time.perf_counter()
+    loads(data)
+    load = time.perf_counter() - start
+    kb = len(json.dumps(program.dict())) / 1024
+    print(f"{size / 1024:8.1f} KB  parse {parse * 1000:8.1f} ms  load {load * 1000:7.1f} ms  binary {len(data) / 1024:8.1f} KB  json {kb:8.1f} KB")
+
+if __name__ == "__main__":
+    for size in (64, 256, 1024):
+        bench(size * 1024)
@@ -0,0 +1,46 @@
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, ".")
+
+from runtime.interpreter import program_parser
+from runtime.runtime import Runtime
+from runtime.serialize import dumps, loads
+from runtime.shake import shake
+from runtime.tokenizer import Tokenizer
+
+def library(count: int) -> str:
+    """A shared library of ``count`` helpers, each calling the one before."""
+    lines = ["let helper0 = (x) => { return x + 1; };"]
+    for index in range(1, count):
+        lines.append(f"let helper{index} = (x) => {{ if x > {index} {{ return x; }} return helper{index - 1}(x * 2) + {index}; }};")
+        lines.append(f"let constant{index} = {index};")
+    lines.append("let handler = (x) => { return helper4(x); };")
+    return "\n".join(lines)
+
+def cold_start(data: bytes) -> tuple[float, int, int]:
+    """Seconds and peak bytes to load and run ``data``, and its bindings."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    runtime = Runtime()
+    loads(data).exec(runtime)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, len(runtime.context)
+
+if __name__ == "__main__":
+    for count in (100, 1000, 5000):
+        t = Tokenizer()
+        t.init(library(count))
+        program = program_parser(t)
+        start = time.perf_counter()
+        shaken = shake(program, "handler")
+        shaking = time.perf_counter() - start
+        for name, tree in (("full", program), ("shaken", shaken)):
+            data = dumps(tree)
+            elapsed, peak, bindings = cold_start(data)
+            print(f"{count:5d} helpers  {name:6s} {len(tree.body):6d} statements  {len(data):8d} bytes  "
+                  f"start {elapsed * 1000:8.2f}ms  peak {peak / 1024:8.0f} KiB  {bindings:6d} bindings")
+        print(f"{count:5d} helpers  shake {shaking * 1000:.2f}ms")
@@ -0,0 +1,43 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, ".")
+
+from benchmarks.bench_tokenizer import source
+from runtime.tokenizer import StreamTokenizer, Tokenizer
+
+def drain(tkr: Tokenizer) -> int:
+    count = 0
+    token = tkr.token()
+    while token is not None:
+        count += 1
+        token = tkr.next()
+    return count
+
+def bench(size: int):
+    with tempfile.NamedTemporaryFile("w", suffix=".dc", encoding="utf-8", delete=False) as file:
+        file.write(source(size))
+    try:
+        for name, make in (("in-memory", Tokenizer), ("stream", StreamTokenizer)):
+            tracemalloc.start()
+            start = time.perf_counter()
+            tkr = make()
+            if name == "stream":
+                tkr.init(file.name)
+            else:
+                with open(file.name, encoding="utf-8") as script:
+                    tkr.init(script.read())
+            count = drain(tkr)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{size / 1024 / 1024:5.2f} MB  {name:9s}  {count:8d} tokens  {elapsed:7.3f}s  peak {peak / 1024 / 1024:8.2f} MB")
+    finally:
+        os.unlink(file.name)
+
+if __name__ == "__main__":
+    for size in (1, 2, 4):
+        bench(size * 1024 * 1024)
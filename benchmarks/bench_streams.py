@@ -0,0 +1,74 @@
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, ".")
+
+from runtime.ast import ReturnValue
+from runtime.engines import ENGINES, run
+from runtime.interpreter import program_parser
+from runtime.persistent import PersistentVector
+from runtime.runtime import Runtime
+from runtime.streams import Stream, stream_functions
+from runtime.tokenizer import Tokenizer
+
+# The same chains with every stage collected into a list before the next,
+# as stages without laziness would run them.
+SIZE = 200_000
+
+scripts = {
+    "sum": f"""
+let square = (x) => {{ return x * x; }};
+let even = (x) => {{ return x % 2 == 0; }};
+let result = range(0, {SIZE}).map(square).filter(even).sum();
+""",
+    "take": f"""
+let square = (x) => {{ return x * x; }};
+let even = (x) => {{ return x % 2 == 0; }};
+let result = range(0, {SIZE}).map(square).filter(even).take(10).sum();
+""",
+}
+
+def best(run, repeats: int = 3) -> float:
+    elapsed = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return elapsed
+
+def eager(function):
+    def call(*args):
+        result = function(*args)
+        if type(result.value) is Stream:
+            return ReturnValue(PersistentVector.from_iterable(result.value))
+        return result
+    return call
+
+def execute(script: str, engine: str, functions: dict):
+    t = Tokenizer()
+    t.init(script)
+    runtime = Runtime(exteral_fun=functions)
+    run(program_parser(t), runtime, engine)
+    return runtime.context["result"]
+
+def peak(run) -> int:
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+if __name__ == "__main__":
+    lazy = stream_functions()
+    collected = {name: eager(function) for name, function in lazy.items()}
+    for name, script in scripts.items():
+        lazy_peak = peak(lambda: execute(script, "closure", lazy))
+        collected_peak = peak(lambda: execute(script, "closure", collected))
+        print(f"{name:4s} peak memory: collected {collected_peak / 2 ** 20:6.2f}MB  lazy {lazy_peak / 2 ** 20:6.2f}MB")
+        for engine in ENGINES:
+            assert execute(script, engine, lazy) == execute(script, engine, collected)
+            slow = best(lambda: execute(script, engine, collected))
+            fast = best(lambda: execute(script, engine, lazy))
+            print(f"{name:4s} {engine:8s} collected {slow * 1000:8.2f}ms  lazy {fast * 1000:8.2f}ms  ({slow / fast:.1f}x)")
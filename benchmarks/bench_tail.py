@@ -0,0 +1,44 @@
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from runtime.engines import ENGINES, run
+from runtime.interpreter import program_parser
+from runtime.runtime import Runtime
+from runtime.tokenizer import Tokenizer
+
+script = """
+let loop = (n, acc) => {{
+    if n == 0 {{ return acc; }}
+    return loop(n - 1, acc + n);
+}};
+let count = (n) => {{
+    if n > 0 {{ count(n - 1); }}
+}};
+let i = 0;
+let result = 0;
+while i < {repeat} {{
+    result = loop({depth}, 0);
+    result = count({depth});
+    i = i + 1;
+}}
+"""
+
+def bench(engine: str, depth: int, repeat: int):
+    t = Tokenizer()
+    t.init(script.format(depth=depth, repeat=repeat))
+    program = program_parser(t)
+    start = time.perf_counter()
+    run(program, Runtime(), engine)
+    elapsed = time.perf_counter() - start
+    calls = 2 * (depth + 1) * repeat
+    print(f"{engine:10s} depth {depth:7d}  {elapsed:7.3f}s  {elapsed / calls * 1e6:6.2f}us/call")
+
+if __name__ == "__main__":
+    # Shallow enough for the untransformed engines, then far beyond the
+    # Python recursion limit.
+    for engine in ENGINES:
+        bench(engine, 100, 500)
+    for engine in ENGINES:
+        bench(engine, 100000, 1)
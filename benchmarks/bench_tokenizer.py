@@ -0,0 +1,42 @@
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from runtime.tokenizer import Tokenizer
+
+snippet = """// 函數宣告
+let add = (left, right) => {
+  // 返回值
+  return left + right * 2 - 1.5;
+}
+
+let rec = (c) => {
+    if c == 0 {
+        return "done";
+    }
+    while c >= 10 && c != 42 || !false {
+        c = c - 1;
+        break;
+    }
+    rec(c - 1);
+}
+add(3, add(1, 2));
+"""
+
+def source(size: int) -> str:
+    return snippet * (size // len(snippet) + 1)
+
+def bench(size: int):
+    script = source(size)
+    t = Tokenizer()
+    start = time.perf_counter()
+    t.init(script)
+    elapsed = time.perf_counter() - start
+    mb = len(script) / 1024 / 1024
+    table_mb = t.tokens.nbytes() / 1024 / 1024
+    print(f"{mb:6.2f} MB  {len(t.tokens):9d} tokens  {elapsed:7.3f}s  {mb / elapsed:6.2f} MB/s  table {table_mb:6.2f} MB")
+
+if __name__ == "__main__":
+    for size in (1, 2, 4, 8):
+        bench(size * 1024 * 1024)
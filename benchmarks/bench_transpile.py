@@ -0,0 +1,76 @@
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from runtime.interpreter import program_parser
+from runtime.runtime import Runtime
+from runtime.tokenizer import Tokenizer
+from runtime.transpiler import compile_program
+
+fib = """
+let fib = (n) => {
+    if n < 2 { return n; }
+    return fib(n - 1) + fib(n - 2);
+}
+let result = fib(27);
+"""
+
+def fib_python():
+    def fib(n):
+        if n < 2:
+            return n
+        return fib(n - 1) + fib(n - 2)
+    return fib(27)
+
+loop = """
+let sum = (n) => {
+    let i = 0;
+    let total = 0;
+    while i < n {
+        i = i + 1;
+        if i % 3 == 0 { total = total + i * 2; } else { total = total - 1; }
+    }
+    return total;
+};
+let result = sum(1000000);
+"""
+
+def loop_python():
+    def sum(n):
+        i = 0
+        total = 0
+        while i < n:
+            i = i + 1
+            if i % 3 == 0:
+                total = total + i * 2
+            else:
+                total = total - 1
+        return total
+    return sum(1000000)
+
+def best(run, repeats: int = 7) -> float:
+    elapsed = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return elapsed
+
+def bench(name: str, script: str, python):
+    t = Tokenizer()
+    t.init(script)
+    program = program_parser(t)
+    start = time.perf_counter()
+    compiled = compile_program(program)
+    transpile = time.perf_counter() - start
+    runtime = Runtime()
+    compiled(runtime)
+    assert runtime.context["result"] == python()
+    transpiled = best(lambda: compiled(Runtime()))
+    handwritten = best(python)
+    print(f"{name:6s} transpiled {transpiled:6.3f}s  hand-written {handwritten:6.3f}s  ({transpiled / handwritten:.2f}x)  transpile {transpile * 1000:.1f}ms")
+
+if __name__ == "__main__":
+    bench("fib", fib, fib_python)
+    bench("loop", loop, loop_python)
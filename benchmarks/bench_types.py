@@ -0,0 +1,50 @@
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from runtime.engines import ENGINES, run
+from runtime.interpreter import program_parser
+from runtime.runtime import Runtime
+from runtime.tokenizer import Tokenizer
+from runtime.typecheck import check
+
+# The same loop with and without annotations.
+typed = """
+let sum = (limit: int) => {
+    let i: int = 0;
+    let total: int = 0;
+    while i < limit {
+        if i % 3 == 0 { total = total + i * 2; } else { total = total - 1; }
+        i = i + 1;
+    }
+    return total;
+};
+let result = sum(200000);
+"""
+untyped = typed.replace(": int", "")
+
+def best(run, repeats: int = 5) -> float:
+    elapsed = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return elapsed
+
+def execute(script: str, engine: str):
+    t = Tokenizer()
+    t.init(script)
+    program = program_parser(t)
+    specialized = check(program)
+    runtime = Runtime()
+    elapsed = best(lambda: run(program, Runtime(), engine))
+    run(program, runtime, engine)
+    return runtime.context["result"], specialized, elapsed
+
+if __name__ == "__main__":
+    for engine in ENGINES:
+        result, _, plain = execute(untyped, engine)
+        typed_result, specialized, fast = execute(typed, engine)
+        assert result == typed_result
+        print(f"{engine:8s} any {plain * 1000:8.2f}ms  typed {fast * 1000:8.2f}ms  ({plain / fast:.2f}x, {specialized} operations specialized)")
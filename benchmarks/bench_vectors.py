@@ -0,0 +1,40 @@
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from runtime.engines import ENGINES, run
+from runtime.interpreter import program_parser
+from runtime.runtime import Runtime
+from runtime.tokenizer import Tokenizer
+from runtime.vectors import vector_functions
+
+# The sum of 2 * i over a million elements, element by element and as vectors.
+loop = """
+let i = 0;
+let result = 0;
+while i < 1000000 {
+    result = result + i * 2;
+    i = i + 1;
+}
+"""
+vectorized = """
+let values = arange(0, 1000000);
+let result = sum(values * 2);
+"""
+
+def execute(script: str, engine: str) -> tuple[float, int]:
+    t = Tokenizer()
+    t.init(script)
+    program = program_parser(t)
+    runtime = Runtime(exteral_fun=vector_functions())
+    start = time.perf_counter()
+    run(program, runtime, engine)
+    return time.perf_counter() - start, runtime.context["result"]
+
+if __name__ == "__main__":
+    for engine in ENGINES:
+        looped, expected = execute(loop, engine)
+        fast = min(execute(vectorized, engine) for _ in range(5))
+        assert fast[1] == expected
+        print(f"{engine:8s} loop {looped * 1000:9.2f}ms  vectorized {fast[0] * 1000:7.2f}ms  ({looped / fast[0]:.0f}x)")
@@ -1,7 +1,12 @@
 
-from runtime.interpreter import program_parser
+from runtime.engines import ENGINES, run
+from runtime.interpreter import located_program_parser, program_parser
+from runtime.memo import memoize
+from runtime.optimizer import levels, optimize
 from runtime.runtime import Runtime
+from runtime.typecheck import check
 from runtime.tokenizer import Tokenizer
+import argparse
 import json
 
 script = """
@@ -21,9 +26,34 @@ let main = () => {
 main();
 """
 
-if __name__ == "__main__":
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("file", nargs="?", help="script to run, the demo above without one")
+    parser.add_argument("--engine", choices=ENGINES, default="tree")
+    parser.add_argument("-O", "--optimize", type=int, choices=levels, default=0)
+    parser.add_argument("--memoize", action="store_true")
+    args = parser.parse_args(argv)
+    source = script
+    if args.file is not None:
+        with open(args.file, encoding="utf-8") as file:
+            source = file.read()
     t = Tokenizer()
-    t.init(script)
+    t.init(source)
     runtime = Runtime(exteral_fun={"print": print})
-    ast = program_parser(t)
-    result = ast.exec(runtime)
\ No newline at end of file
+    positions = None
+    if args.engine == "python":
+        # Python engine errors are noted with the row and col of their statement.
+        program, positions = located_program_parser(t)
+    else:
+        program = program_parser(t)
+    ast = optimize(program, args.optimize)
+    if ast is not program:
+        # Optimizing may drop statements, so positions no longer line up.
+        positions = None
+    check(ast)
+    if args.memoize:
+        ast, _ = memoize(ast)
+    return run(ast, runtime, args.engine, positions)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
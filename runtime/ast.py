@@ -1,17 +1,100 @@
+import operator
+import weakref
 from abc import ABC, abstractmethod
+from typing import Callable
 
 from attr import dataclass
 
+from runtime.persistent import PersistentMap, PersistentVector
 from runtime.runtime import Runtime
 
+# Quickening: after ``quicken_after`` evaluations a BinaryExpression replaces
+# its ``eval`` with one specialised to the operand type it saw, guarded by a
+# type check that falls back to the generic path. A node whose operands do
+# not specialise, or whose guard failed, waits ``quicken_backoff`` more.
+quicken_after = 8
+quicken_backoff = 64
+
+_arithmetic = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "%": operator.mod,
+}
+_comparisons = {
+    "<": operator.lt,
+    ">": operator.gt,
+    "<=": operator.le,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+# Operator function for both operands of the given type.
+specializations = {
+    **{(int, name): function for name, function in (_arithmetic | _comparisons).items()},
+    **{(float, name): function for name, function in (_arithmetic | _comparisons).items()},
+    **{(str, name): function for name, function in _comparisons.items()},
+    (str, "+"): operator.add,
+}
+
 @dataclass
 class ReturnValue():
     value: any
 
+def returning(function: Callable, convert: Callable = None) -> Callable:
+    """Host function calling ``function`` and wrapping its result in a ReturnValue.
+
+    A Dotchain function returns one, so a call to the host function can be
+    used as a value. ``convert``, if given, is applied to the result first.
+    """
+    if convert is None:
+        def call(*args):
+            return ReturnValue(function(*args))
+    else:
+        def call(*args):
+            return ReturnValue(convert(function(*args)))
+    return call
+
+@dataclass
+class QuickeningStats():
+    """How often specialised nodes and cached call sites were used."""
+    binary_specialized: int = 0
+    binary_hits: int = 0
+    # Guard failures, each of which reverts the node to the generic path.
+    binary_misses: int = 0
+    call_hits: int = 0
+    call_misses: int = 0
+    name_hits: int = 0
+    name_misses: int = 0
+
+# Counters of quickening, None unless ``collect_quickening_stats`` turned
+# them on, so the fast paths only pay for a check.
+quickening: QuickeningStats | None = None
+
+def collect_quickening_stats(enabled: bool = True) -> QuickeningStats | None:
+    """Count into fresh QuickeningStats, returned, or stop counting."""
+    global quickening
+    quickening = QuickeningStats() if enabled else None
+    return quickening
+
+@dataclass
+class TailCall():
+    """A call in tail position, left for ``FunEnv.exec`` to run in a loop."""
+    fun: "FunEnv"
+    args: list
+    # Whether the call is returned (``return f(x)``) rather than being the
+    # last statement, which wraps the callee's result in a ReturnValue.
+    returning: bool
+
 class Node(ABC):
     def type(self):
         return self.__class__.__name__
 
+    def exec_tail(self, runtime: Runtime):
+        """Run as the last statement of a function body."""
+        return self.exec(runtime)
+
 @dataclass
 class Statement(Node, ABC):
     
@@ -83,7 +166,7 @@ class BoolLiteral(Literal):
     
     def dict(self):
         return {
-            "type": "FloatLiteral",
+            "type": "BoolLiteral",
             "value": self.value
         }
     
@@ -127,8 +210,38 @@ class Program(Statement):
 @dataclass
 class Identifier(Expression):
     name: str
+
+    # (parent runtime, runtime holding the name, its Runtime.versions entry)
+    # of the last lookup that went past the current runtime. The runtimes are
+    # weak references, so a reused tree does not keep a finished run alive.
+    _cache = None
+
     def eval(self,runtime: Runtime):
-        return runtime.deep_get_value(self.name)
+        name = self.name
+        context = runtime.context
+        if name in context:
+            return context[name]
+        parent = runtime.parent
+        if parent is None:
+            return None
+        cache = self._cache
+        versions = runtime.versions
+        if cache is not None and cache[0]() is parent and cache[2] == versions.get(name):
+            scope = cache[1]()
+            if scope is not None and name in scope.context:
+                if quickening is not None:
+                    quickening.name_hits += 1
+                return scope.context[name]
+        if quickening is not None:
+            quickening.name_misses += 1
+        scope = parent
+        while scope is not None:
+            context = scope.context
+            if name in context:
+                self._cache = (weakref.ref(parent), weakref.ref(scope), versions.setdefault(name, 0))
+                return context[name]
+            scope = scope.parent
+        return None
     
     def dict(self):
         return {
@@ -149,6 +262,43 @@ class Block(Statement):
             if isinstance(result, BreakStatement):
                 return result
             index += 1
+
+    def exec_tail(self, runtime: Runtime):
+        body = self.body
+        last = len(body) - 1
+        index = 0
+        while index < last:
+            result = body[index].exec(runtime)
+            if isinstance(result, ReturnValue):
+                return result
+            if isinstance(result, BreakStatement):
+                return result
+            index += 1
+        if last < 0:
+            return None
+        result = body[last].exec_tail(runtime)
+        if isinstance(result, (ReturnValue, BreakStatement, TailCall)):
+            return result
+
+    def declares(self) -> bool:
+        """Whether running the block declares variables in its own scope."""
+        try:
+            return self._declares
+        except AttributeError:
+            self._declares = any(
+                isinstance(statement, VariableDeclaration)
+                or isinstance(statement, (Fun, Block)) and _body(statement).declares()
+                for statement in self.body
+            )
+            return self._declares
+
+    def makes_closures(self) -> bool:
+        """Whether the block contains a function, which may keep its scope alive."""
+        try:
+            return self._makes_closures
+        except AttributeError:
+            self._makes_closures = _contains(self, Fun)
+            return self._makes_closures
             
     def dict(self):
         return {
@@ -162,9 +312,23 @@ class WhileStatement(Statement):
     body: Block
 
     def exec(self, runtime: Runtime):
-        while self.test.eval(runtime):
+        # A body that declares nothing runs in the enclosing scope. One that
+        # declares but makes no closures reuses a single scope, cleared on
+        # every iteration; closures need a fresh scope each time.
+        body = self.body
+        if not body.declares():
+            while_runtime = runtime
+        elif not body.makes_closures():
             while_runtime = Runtime(parent=runtime,name="while")
-            result = self.body.exec(while_runtime)
+        else:
+            while_runtime = None
+        while self.test.eval(runtime):
+            if while_runtime is None:
+                result = body.exec(Runtime(parent=runtime,name="while"))
+            else:
+                if while_runtime is not runtime:
+                    while_runtime.context.clear()
+                result = body.exec(while_runtime)
             if isinstance(result, ReturnValue):
                 return result
             if isinstance(result, BreakStatement):
@@ -195,6 +359,11 @@ class ReturnStatement(Statement):
     def exec(self, runtime: Runtime):
         return ReturnValue(self.value.eval(runtime))
 
+    def exec_tail(self, runtime: Runtime):
+        if type(self.value) is CallExpression:
+            return self.value.exec_tail(runtime, returning=True)
+        return self.exec(runtime)
+
     def dict(self):
         return {
             "type": "ReturnStatement",
@@ -208,11 +377,16 @@ class IfStatement(Statement):
     alternate: Block
 
     def exec(self, runtime: Runtime):
-        if_runtime = Runtime(parent=runtime)
-        if self.test.eval(runtime):
-            return self.consequent.exec(if_runtime)
-        else:
-            return self.alternate.exec(if_runtime)
+        block = self.consequent if self.test.eval(runtime) else self.alternate
+        if not block.declares():
+            return block.exec(runtime)
+        return block.exec(Runtime(parent=runtime))
+
+    def exec_tail(self, runtime: Runtime):
+        block = self.consequent if self.test.eval(runtime) else self.alternate
+        if not block.declares():
+            return block.exec_tail(runtime)
+        return block.exec_tail(Runtime(parent=runtime))
         
     def dict(self):
         return {
@@ -270,9 +444,77 @@ class BinaryExpression(Expression):
     operator: str
     right: Expression
 
+    _countdown = quicken_after
+
     def eval(self, runtime: Runtime):
         left = self.left.eval(runtime)
         right = self.right.eval(runtime)
+        countdown = self._countdown - 1
+        self._countdown = countdown
+        if not countdown:
+            self._specialize(left, right)
+        return self.apply(left, right)
+
+    def _specialize(self, left, right):
+        kind = type(left)
+        function = specializations.get((kind, self.operator))
+        if function is None or type(right) is not kind:
+            self._countdown = quicken_backoff
+            return
+        left_node = self.left
+        right_node = self.right
+        if quickening is not None:
+            quickening.binary_specialized += 1
+        if type(right_node) in (IntLiteral, FloatLiteral, StringLiteral):
+            # A literal right operand is checked once, here.
+            constant = right_node.value
+
+            def specialized(runtime: Runtime):
+                left = left_node.eval(runtime)
+                if type(left) is kind:
+                    if quickening is not None:
+                        quickening.binary_hits += 1
+                    return function(left, constant)
+                if quickening is not None:
+                    quickening.binary_misses += 1
+                del self.eval
+                self._countdown = quicken_backoff
+                return self.apply(left, constant)
+            self.eval = specialized
+            return
+
+        def specialized(runtime: Runtime):
+            left = left_node.eval(runtime)
+            right = right_node.eval(runtime)
+            if type(left) is kind and type(right) is kind:
+                if quickening is not None:
+                    quickening.binary_hits += 1
+                return function(left, right)
+            if quickening is not None:
+                quickening.binary_misses += 1
+            del self.eval
+            self._countdown = quicken_backoff
+            return self.apply(left, right)
+        self.eval = specialized
+
+    def specialize_proven(self, function):
+        """Evaluate with ``function`` and no type guard from now on.
+
+        For operands whose types a static check proved, so quickening has
+        nothing left to find out.
+        """
+        left_node = self.left
+        right_node = self.right
+        if type(right_node) in (IntLiteral, FloatLiteral, StringLiteral):
+            constant = right_node.value
+            self.eval = lambda runtime: function(left_node.eval(runtime), constant)
+        elif type(left_node) in (IntLiteral, FloatLiteral, StringLiteral):
+            constant = left_node.value
+            self.eval = lambda runtime: function(constant, right_node.eval(runtime))
+        else:
+            self.eval = lambda runtime: function(left_node.eval(runtime), right_node.eval(runtime))
+
+    def apply(self, left, right):
         if self.operator == "+":
             return left + right
         if self.operator == "-":
@@ -313,19 +555,82 @@ class BinaryExpression(Expression):
 class CallExpression(Expression):
     callee: Identifier
     arguments: list[Expression]
+    # (parent runtime, runtime holding the callee, its Runtime.versions entry,
+    # external) of the last lookup that went past the calling runtime, with
+    # the runtimes as weak references like Identifier's.
+    _cache = None
+
     def exec(self, runtime: Runtime, args: list=None):
         if args == None:
             args = []
             for index, argument in enumerate(self.arguments):
                 args.append(argument.eval(runtime))
-        if runtime.has_value(self.callee.name):
-            fun:FunEnv = runtime.get_value(self.callee.name)
+        fun, external = self.resolve(runtime)
+        if external is False:
             return fun.exec(args)
-        if runtime.parent is not None:
-            return self.exec(runtime.parent,args)
-        if self.callee.name in runtime.exteral_fun:
-            return runtime.exteral_fun[self.callee.name](*args)
-        
+        if external:
+            return fun(*args)
+
+    def resolve(self, runtime: Runtime):
+        """The callee and whether it is external, or (None, None) if not found.
+
+        A name declared in a runtime wins over an external function of the
+        root runtime. Where a lookup from a runtime's parent ended is cached
+        until a later call comes from a runtime with another parent, or the
+        name is declared again somewhere. A lookup from a root runtime only
+        has the external functions left to search, and is not cached.
+        """
+        name = self.callee.name
+        context = runtime.context
+        if name in context:
+            return context[name], False
+        parent = runtime.parent
+        if parent is None:
+            if name not in runtime.exteral_fun:
+                return None, None
+            return runtime.exteral_fun[name], True
+        cache = self._cache
+        versions = runtime.versions
+        if cache is not None and cache[0]() is parent and cache[2] == versions.get(name):
+            scope = cache[1]()
+            if scope is None:
+                pass
+            elif cache[3]:
+                if name in scope.exteral_fun:
+                    if quickening is not None:
+                        quickening.call_hits += 1
+                    return scope.exteral_fun[name], True
+            elif name in scope.context:
+                if quickening is not None:
+                    quickening.call_hits += 1
+                return scope.context[name], False
+        if quickening is not None:
+            quickening.call_misses += 1
+        scope = parent
+        while name not in scope.context:
+            if scope.parent is None:
+                if name not in scope.exteral_fun:
+                    return None, None
+                self._cache = (weakref.ref(parent), weakref.ref(scope), versions.setdefault(name, 0), True)
+                return scope.exteral_fun[name], True
+            scope = scope.parent
+        self._cache = (weakref.ref(parent), weakref.ref(scope), versions.setdefault(name, 0), False)
+        return scope.context[name], False
+
+    def exec_tail(self, runtime: Runtime, returning: bool = False):
+        args = [argument.eval(runtime) for argument in self.arguments]
+        fun, external = self.resolve(runtime)
+        if type(fun) is FunEnv:
+            return TailCall(fun, args, returning)
+        if external is False:
+            result = fun.exec(args)
+        elif external:
+            result = fun(*args)
+        else:
+            result = None
+        if returning:
+            return ReturnValue(None if result is None else result.value)
+        return result
 
     def eval(self, runtime):
         result = self.exec(runtime)
@@ -339,14 +644,48 @@ class CallExpression(Expression):
             "arguments": [argument.dict() for argument in self.arguments]
         }
 
+@dataclass
+class ListExpression(Expression):
+    elements: list[Expression]
+
+    def eval(self, runtime: Runtime):
+        return PersistentVector.from_iterable([element.eval(runtime) for element in self.elements])
+
+    def dict(self):
+        return {
+            "type": "ListExpression",
+            "elements": [element.dict() for element in self.elements]
+        }
+
+@dataclass
+class MapExpression(Expression):
+    # Parallel lists, evaluated key then value, entry by entry.
+    keys: list[Expression]
+    values: list[Expression]
+
+    def eval(self, runtime: Runtime):
+        return PersistentMap.from_items([(key.eval(runtime), value.eval(runtime)) for key, value in zip(self.keys, self.values)])
+
+    def dict(self):
+        return {
+            "type": "MapExpression",
+            "keys": [key.dict() for key in self.keys],
+            "values": [value.dict() for value in self.values]
+        }
+
 @dataclass
 class Fun(Statement):
     params: list[Identifier]
     body: Block
+    # Annotated type of each parameter, empty when none is annotated.
+    param_types: tuple[str, ...] = ()
 
     def exec(self, runtime: Runtime):
         return self.body.exec(runtime)
 
+    def exec_tail(self, runtime: Runtime):
+        return self.body.exec_tail(runtime)
+
     def eval(self, runtime: Runtime):
         return FunEnv(runtime, self)
 
@@ -378,7 +717,39 @@ class FunEnv():
         self.body = body
     
     def exec(self, args: list):
-        fun_runtime = Runtime(parent=self.parent)
-        for index, param in enumerate(self.body.params):
-            fun_runtime.declare(param.name, args[index])
-        return self.body.exec(fun_runtime)
\ No newline at end of file
+        # Calls in tail position come back as a TailCall and run here in a
+        # loop, so tail recursion needs no Python stack. Wrapping the result
+        # for ``return f(x)`` is idempotent, so one flag covers a whole chain.
+        fun = self
+        returning = False
+        while True:
+            fun_runtime = Runtime(parent=fun.parent)
+            for index, param in enumerate(fun.body.params):
+                fun_runtime.declare(param.name, args[index])
+            result = fun.body.exec_tail(fun_runtime)
+            if type(result) is not TailCall:
+                break
+            fun = result.fun
+            args = result.args
+            returning = returning or result.returning
+        if returning:
+            return ReturnValue(None if result is None else result.value)
+        return result
+
+
+def _body(statement: Statement) -> Block:
+    return statement.body if isinstance(statement, Fun) else statement
+
+def _contains(node: Node, kind: type) -> bool:
+    return any(isinstance(item, kind) for item in walk(node))
+
+def walk(node: Node):
+    """Every node in the tree under ``node``, ``node`` included."""
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, list):
+            stack.extend(item)
+        elif isinstance(item, Node):
+            yield item
+            stack.extend(vars(item).values())
@@ -0,0 +1,58 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from attr import dataclass
+
+from runtime.ast import Program
+from runtime.interpreter import program_parser
+from runtime.serialize import dumps, loads
+from runtime.tokenizer import Tokenizer
+
+
+@dataclass
+class LoadResult:
+    path: str
+    program: Program | None
+    # Seconds spent reading, tokenizing and parsing the file in its worker.
+    seconds: float
+    error: Exception | None = None
+
+
+def parse_files(paths: list[str | os.PathLike], workers: int = None) -> list[LoadResult]:
+    """Parse many ``.dc`` files in a process pool, one result per path.
+
+    Workers send programs back in the ``runtime.serialize`` format, which is
+    much cheaper to move between processes than pickled nodes. A file that
+    fails to read or parse gets its exception in ``error`` instead of failing
+    the batch. ``workers=1`` parses in the calling process.
+    """
+    paths = [os.fspath(path) for path in paths]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(paths))
+    if workers <= 1:
+        return [_result(path, _parse_file(path)) for path in paths]
+    chunksize = max(1, len(paths) // (workers * 4))
+    with ProcessPoolExecutor(workers) as executor:
+        return [_result(path, parsed) for path, parsed in zip(paths, executor.map(_parse_file, paths, chunksize=chunksize))]
+
+
+def _parse_file(path: str) -> tuple[bytes | None, float, Exception | None]:
+    start = time.perf_counter()
+    try:
+        with open(path, encoding="utf-8") as file:
+            script = file.read()
+        tkr = Tokenizer()
+        tkr.init(script)
+        data = dumps(program_parser(tkr))
+    except Exception as error:
+        return None, time.perf_counter() - start, error
+    return data, time.perf_counter() - start, None
+
+
+def _result(path: str, parsed: tuple[bytes | None, float, Exception | None]) -> LoadResult:
+    data, seconds, error = parsed
+    if data is None:
+        return LoadResult(path, None, seconds, error)
+    return LoadResult(path, loads(data), seconds)
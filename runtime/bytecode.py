@@ -0,0 +1,278 @@
+from array import array
+
+from runtime.ast import Assignment, BinaryExpression, Block, BreakStatement, CallExpression, EmptyStatement, Fun, Identifier, IfStatement, ListExpression, MapExpression, Node, Program, ReturnStatement, UnaryExpression, VariableDeclaration, WhileStatement
+from runtime.compiler import binary_operators, literals, unary_operators
+from runtime.memo import Memoized
+
+# Every instruction is an (opcode, argument) pair of ints in ``Code.ops``.
+LOAD_CONST = 1      # push constants[arg]
+LOAD_NAME = 2       # push the value of names[arg] from the runtime chain
+STORE_NAME = 3      # pop and assign to names[arg] where it is declared
+DECLARE_NAME = 4    # pop and declare names[arg] in the current runtime
+BINARY = 5          # pop right and left, push operators[arg](left, right)
+UNARY = 6           # pop and push unary_functions[arg](value)
+POP = 7             # pop and discard
+JUMP = 8            # continue at arg
+JUMP_IF_FALSE = 9   # pop and continue at arg if falsy
+CALL = 10           # constants[arg] is (name, argc): pop the arguments,
+                    # call and push the value of the result
+CALL_STATEMENT = 11 # like CALL, but a ReturnValue or break signal returned
+                    # by the callee is returned from this code as well
+MAKE_FUN = 12       # push a function closing over the current runtime,
+                    # constants[arg] is its Code
+RETURN = 13         # pop and return ReturnValue(value)
+BREAK = 14          # return the break signal
+PUSH_SCOPE = 15     # enter a child runtime named constants[arg]
+POP_SCOPE = 16      # return to the parent runtime
+RAISE = 17          # raise constants[arg]
+TAIL_CALL = 18      # constants[arg] is (name, argc, returning): a call whose
+                    # result the function returns; a VM function replaces
+                    # the current frame in place instead of pushing one
+MEMOIZE = 19        # replace the function on top of the stack with a MemoFun
+                    # calling it through the table constants[arg]
+BUILD_LIST = 20     # pop arg values and push the list of them
+BUILD_MAP = 21      # pop arg keys and values, pushed key first, and push
+                    # the map of them
+
+opnames = {value: name for name, value in globals().items() if name.isupper() and isinstance(value, int)}
+
+operators = list(binary_operators.values())
+operator_names = list(binary_operators)
+_operator_index = {name: index for index, name in enumerate(operator_names)}
+# Unknown operators evaluate both sides and produce None.
+operators.append(lambda left, right: None)
+operator_names.append("?")
+
+unary_functions = list(unary_operators.values())
+unary_operator_names = list(unary_operators)
+
+
+class Code:
+    """Bytecode of one top-level statement or one function body."""
+    __slots__ = ("name", "params", "ops", "constants", "names", "_list")
+
+    def __init__(self, name: str, params: tuple[str, ...] = ()):
+        self.name = name
+        self.params = params
+        self.ops = array("i")
+        self.constants = list()
+        self.names = list[str]()
+        self._list = None
+
+    def instructions(self) -> list[int]:
+        """``ops`` as a list, which the VM indexes faster than an array."""
+        if self._list is None:
+            self._list = self.ops.tolist()
+        return self._list
+
+
+class Compiler:
+
+    def __init__(self, code: Code):
+        self.code = code
+        self._constants = dict()
+        self._names = dict[str, int]()
+
+    def emit(self, op: int, arg: int = 0) -> int:
+        ops = self.code.ops
+        ops.append(op)
+        ops.append(arg)
+        return len(ops) - 2
+
+    def patch(self, at: int, target: int = None):
+        self.code.ops[at + 1] = len(self.code.ops) if target is None else target
+
+    def constant(self, value) -> int:
+        key = (type(value), repr(value))
+        index = self._constants.get(key)
+        if index is None:
+            index = self._constants[key] = len(self.code.constants)
+            self.code.constants.append(value)
+        return index
+
+    def name(self, name: str) -> int:
+        index = self._names.get(name)
+        if index is None:
+            index = self._names[name] = len(self.code.names)
+            self.code.names.append(name)
+        return index
+
+    def block(self, block: Block, tail: bool = False):
+        last = len(block.body) - 1
+        for index, statement in enumerate(block.body):
+            self.statement(statement, tail and index == last)
+
+    def scope(self, block: Block, name: str = None, tail: bool = False):
+        if not block.declares():
+            self.block(block, tail)
+            return
+        self.emit(PUSH_SCOPE, self.constant(name))
+        self.block(block, tail)
+        self.emit(POP_SCOPE)
+
+    def statement(self, node: Node, tail: bool = False):
+        """Compile ``node``; with ``tail`` it is the last statement of a function body."""
+        kind = type(node)
+        if tail and kind is CallExpression:
+            self.tail_call(node, False)
+        elif tail and kind is ReturnStatement and type(node.value) is CallExpression:
+            self.tail_call(node.value, True)
+        elif kind is VariableDeclaration:
+            if type(node.value) is Fun:
+                self.emit(MAKE_FUN, self.constant(compile_fun(node.value, node.id.name)))
+            elif type(node.value) is Memoized:
+                self.emit(MAKE_FUN, self.constant(compile_fun(node.value.fun, node.id.name)))
+                self.emit(MEMOIZE, self.constant(node.value.table))
+            else:
+                self.expression(node.value)
+            self.emit(DECLARE_NAME, self.name(node.id.name))
+        elif kind is Assignment:
+            self.expression(node.value)
+            self.emit(STORE_NAME, self.name(node.id.name))
+        elif kind is CallExpression:
+            self.call(node, CALL_STATEMENT)
+        elif kind is IfStatement:
+            self.expression(node.test)
+            jump_else = self.emit(JUMP_IF_FALSE)
+            self.scope(node.consequent, tail=tail)
+            if not node.alternate.body:
+                self.patch(jump_else)
+                return
+            jump_end = self.emit(JUMP)
+            self.patch(jump_else)
+            self.scope(node.alternate, tail=tail)
+            self.patch(jump_end)
+        elif kind is WhileStatement:
+            start = len(self.code.ops)
+            self.expression(node.test)
+            jump_end = self.emit(JUMP_IF_FALSE)
+            self.scope(node.body, "while")
+            self.emit(JUMP, start)
+            self.patch(jump_end)
+        elif kind is ReturnStatement:
+            self.expression(node.value)
+            self.emit(RETURN)
+        elif kind is BreakStatement:
+            # A break unwinds like a return does in the tree-walking engine:
+            # out of every enclosing block up to the function or statement.
+            self.emit(BREAK)
+        elif kind is Block:
+            self.block(node, tail)
+        elif kind is Fun:
+            # Fun.exec runs the body in place.
+            self.block(node.body, tail)
+        elif kind is EmptyStatement:
+            pass
+        else:
+            self.expression(node)
+            self.emit(POP)
+
+    def expression(self, node: Node):
+        kind = type(node)
+        if kind is Identifier:
+            self.emit(LOAD_NAME, self.name(node.name))
+        elif kind in literals:
+            self.emit(LOAD_CONST, self.constant(node.value))
+        elif kind is BinaryExpression:
+            self.expression(node.left)
+            self.expression(node.right)
+            self.emit(BINARY, _operator_index.get(node.operator, len(operators) - 1))
+        elif kind is UnaryExpression:
+            self.expression(node.expression)
+            if node.operator in unary_operator_names:
+                self.emit(UNARY, unary_operator_names.index(node.operator))
+        elif kind is CallExpression:
+            self.call(node, CALL)
+        elif kind is Fun:
+            self.emit(MAKE_FUN, self.constant(compile_fun(node)))
+        elif kind is Memoized:
+            self.emit(MAKE_FUN, self.constant(compile_fun(node.fun)))
+            self.emit(MEMOIZE, self.constant(node.table))
+        elif kind is ListExpression:
+            for element in node.elements:
+                self.expression(element)
+            self.emit(BUILD_LIST, len(node.elements))
+        elif kind is MapExpression:
+            for key, value in zip(node.keys, node.values):
+                self.expression(key)
+                self.expression(value)
+            self.emit(BUILD_MAP, len(node.keys))
+        elif kind is EmptyStatement:
+            self.emit(LOAD_CONST, self.constant(None))
+        else:
+            raise Exception(f"Cannot compile {kind.__name__}")
+
+    def call(self, node: CallExpression, op: int):
+        for argument in node.arguments:
+            self.expression(argument)
+        self.emit(op, self.constant((node.callee.name, len(node.arguments))))
+
+    def tail_call(self, node: CallExpression, returning: bool):
+        for argument in node.arguments:
+            self.expression(argument)
+        self.emit(TAIL_CALL, self.constant((node.callee.name, len(node.arguments), returning)))
+
+
+def compile_fun(node: Fun, name: str = "<fun>") -> Code:
+    params = tuple(param.name for param in node.params)
+    code = Code(name, params)
+    compiler = Compiler(code)
+    for index, param in enumerate(params):
+        if param in params[:index]:
+            # FunEnv only fails once the duplicate parameter is declared.
+            compiler.emit(RAISE, compiler.constant(Exception(f"Variable {param} is already declared")))
+            return code
+    compiler.block(node.body, True)
+    return code
+
+
+def compile_program(program: Program) -> list[Code]:
+    """Compile each top-level statement into its own ``Code``.
+
+    ``Program.exec`` stops at a returned ``ReturnValue`` but carries on with
+    the next statement after a break, which running the statements one by one
+    reproduces.
+    """
+    codes = list[Code]()
+    for index, statement in enumerate(program.body):
+        code = Code(f"<statement {index}>")
+        Compiler(code).statement(statement)
+        codes.append(code)
+    return codes
+
+
+def disassemble(code: Code | list[Code]) -> str:
+    """Readable listing of ``code`` and every function compiled into it."""
+    if isinstance(code, list):
+        return "\n\n".join(disassemble(statement) for statement in code)
+    params = ", ".join(code.params)
+    lines = [f"{code.name}({params}):"]
+    functions = list[Code]()
+    ops = code.ops
+    for at in range(0, len(ops), 2):
+        op, arg = ops[at], ops[at + 1]
+        detail = ""
+        if op in (LOAD_CONST, CALL, CALL_STATEMENT, TAIL_CALL, MAKE_FUN, PUSH_SCOPE, RAISE, MEMOIZE):
+            constant = code.constants[arg]
+            if op == MAKE_FUN:
+                functions.append(constant)
+                detail = constant.name
+            elif op in (CALL, CALL_STATEMENT):
+                detail = f"{constant[0]}/{constant[1]}"
+            elif op == TAIL_CALL:
+                detail = f"{constant[0]}/{constant[1]}" + (" return" if constant[2] else "")
+            else:
+                detail = repr(constant)
+        elif op in (LOAD_NAME, STORE_NAME, DECLARE_NAME):
+            detail = code.names[arg]
+        elif op == BINARY:
+            detail = operator_names[arg]
+        elif op == UNARY:
+            detail = unary_operator_names[arg]
+        elif op in (JUMP, JUMP_IF_FALSE):
+            detail = f"to {arg}"
+        lines.append(f"{at:6d} {opnames[op]:<15}{arg:5d}  {detail}".rstrip())
+    for function in functions:
+        lines.append("")
+        lines.append(disassemble(function))
+    return "\n".join(lines)
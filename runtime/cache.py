@@ -0,0 +1,104 @@
+import hashlib
+import os
+import sys
+import tempfile
+from functools import lru_cache
+
+from runtime.ast import Program
+from runtime.interpreter import program_parser
+from runtime.serialize import dumps, loads
+from runtime.tokenizer import Tokenizer
+
+CACHE_DIRECTORY = "__dccache__"
+CACHE_SUFFIX = ".dcc"
+MAGIC = b"DCC1"
+
+_runtime_modules = ("ast.py", "interpreter.py", "serialize.py", "tokenizer.py")
+
+
+@lru_cache(maxsize=None)
+def runtime_version() -> bytes:
+    """Digest of the parser sources and the Python version.
+
+    Any change to how a script becomes a ``Program`` changes the digest, so
+    entries written by another runtime are never loaded.
+    """
+    digest = hashlib.sha256(sys.version.encode())
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in _runtime_modules:
+        with open(os.path.join(directory, name), "rb") as file:
+            digest.update(file.read())
+    return digest.digest()
+
+
+def cache_path(path: str | os.PathLike, cache_dir: str | os.PathLike = None) -> str:
+    """Where the cache entry of the source at ``path`` lives.
+
+    Without ``cache_dir`` entries go to ``__dccache__`` next to the source. A
+    shared ``cache_dir`` tells sources apart by a hash of their absolute path.
+    """
+    path = os.path.abspath(path)
+    directory, name = os.path.split(path)
+    stem = os.path.splitext(name)[0]
+    if cache_dir is None:
+        return os.path.join(directory, CACHE_DIRECTORY, stem + CACHE_SUFFIX)
+    key = hashlib.sha256(os.fsencode(path)).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{stem}.{key}{CACHE_SUFFIX}")
+
+
+def load_program(path: str | os.PathLike, cache_dir: str | os.PathLike = None) -> Program:
+    """Parse the ``.dc`` file at ``path``, reusing a cached ``Program`` if valid.
+
+    An entry is valid when it was written for the same source bytes by the
+    same ``runtime_version``; otherwise the source is parsed and the entry
+    rewritten. Failing to read or write the cache never fails the load.
+    """
+    with open(path, "rb") as file:
+        source = file.read()
+    header = _header(source)
+    entry = cache_path(path, cache_dir)
+    program = _read(entry, header)
+    if program is not None:
+        return program
+    tkr = Tokenizer()
+    tkr.init(source.decode("utf-8"))
+    program = program_parser(tkr)
+    _write(entry, header, program)
+    return program
+
+
+def _header(source: bytes) -> bytes:
+    return MAGIC + runtime_version() + hashlib.sha256(source).digest()
+
+
+def _read(entry: str, header: bytes) -> Program | None:
+    try:
+        with open(entry, "rb") as file:
+            if file.read(len(header)) != header:
+                return None
+            program = loads(file.read())
+    except Exception:
+        return None
+    if not isinstance(program, Program):
+        return None
+    return program
+
+
+def _write(entry: str, header: bytes, program: Program):
+    data = dumps(program)
+    directory = os.path.dirname(entry)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, temp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(header)
+            file.write(data)
+        os.replace(temp, entry)
+    except OSError:
+        try:
+            os.unlink(temp)
+        except OSError:
+            pass
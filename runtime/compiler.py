@@ -0,0 +1,480 @@
+import operator
+from typing import Callable
+
+from runtime.ast import Assignment, BinaryExpression, Block, BoolLiteral, BreakStatement, CallExpression, EmptyStatement, FloatLiteral, Fun, Identifier, IfStatement, IntLiteral, ListExpression, MapExpression, Node, Program, ReturnStatement, ReturnValue, StringLiteral, TailCall, UnaryExpression, VariableDeclaration, WhileStatement
+from runtime.memo import MemoFun, Memoized
+from runtime.persistent import PersistentMap, PersistentVector
+from runtime.runtime import UNDECLARED, Frame, Runtime
+
+# Statements compile to closures returning None or a signal that unwinds to
+# the enclosing loop or function: a ReturnValue or BREAK. They are the objects
+# the tree-walking engine returns, so both engines produce the same results.
+BREAK = BreakStatement()
+
+binary_operators = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "%": operator.mod,
+    "<": operator.lt,
+    ">": operator.gt,
+    "<=": operator.le,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+    # Both sides are evaluated before the operator, like BinaryExpression.eval.
+    "&&": lambda left, right: left and right,
+    "||": lambda left, right: left or right,
+}
+
+literals = frozenset((IntLiteral, FloatLiteral, StringLiteral, BoolLiteral))
+
+unary_operators = {
+    "-": operator.neg,
+    "!": operator.not_,
+}
+
+
+class Scope:
+    """Compile-time view of a ``Frame``: the slot of every name it declares.
+
+    At run time a name can only be found in a scope that declares it, so a
+    reference resolves to those scopes' ``(depth, slot)`` pairs, innermost
+    first. A slot still ``UNDECLARED`` when it is used falls through to the
+    next pair and finally to the host ``Runtime``, the same order in which the
+    tree engine walks its runtimes.
+    """
+
+    def __init__(self, parent: "Scope" = None):
+        self.parent = parent
+        self.names = dict[str, int]()
+
+    def declare(self, name: str) -> int:
+        slot = self.names.get(name)
+        if slot is None:
+            slot = self.names[name] = len(self.names)
+        return slot
+
+    def collect(self, block: Block):
+        """Declare the names ``block`` declares in place."""
+        for statement in block.body:
+            kind = type(statement)
+            if kind is VariableDeclaration:
+                self.declare(statement.id.name)
+            elif kind is Fun:
+                self.collect(statement.body)
+            elif kind is Block:
+                self.collect(statement)
+
+    def resolve(self, name: str) -> tuple[tuple[int, int], ...]:
+        bindings = list[tuple[int, int]]()
+        scope = self
+        depth = 0
+        while scope is not None:
+            slot = scope.names.get(name)
+            if slot is not None:
+                bindings.append((depth, slot))
+            scope = scope.parent
+            depth += 1
+        return tuple(bindings)
+
+
+class CompiledFun:
+    """Function value of the closure engine, the counterpart of ``FunEnv``."""
+    __slots__ = ("parent", "arity", "size", "body")
+
+    def __init__(self, parent: Frame, arity: int, size: int, body: Callable):
+        self.parent = parent
+        self.arity = arity
+        self.size = size
+        self.body = body
+
+    def exec(self, args: list):
+        # Tail calls come back as a TailCall and run in this loop, as they
+        # do in FunEnv.exec.
+        fun = self
+        returning = False
+        while True:
+            arity = fun.arity
+            if len(args) < arity:
+                raise IndexError("list index out of range")
+            if not fun.size:
+                result = fun.body(fun.parent)
+            else:
+                slots = args[:arity]
+                if fun.size > arity:
+                    slots += [UNDECLARED] * (fun.size - arity)
+                result = fun.body(Frame(slots, fun.parent))
+            if type(result) is not TailCall:
+                break
+            fun = result.fun
+            args = result.args
+            returning = returning or result.returning
+        if returning:
+            return _returned(result)
+        return result
+
+
+def compile_program(program: Program) -> Callable[[Runtime], ReturnValue | None]:
+    scope = Scope()
+    scope.collect(Block(program.body))
+    statements = tuple(compile_statement(statement, scope) for statement in program.body)
+    names = tuple(scope.names)
+
+    def run_program(runtime: Runtime):
+        # Top-level variables live in slots while the program runs and are
+        # left in the runtime afterwards, as the tree engine leaves them.
+        # Names the runtime already holds count as declared.
+        context = runtime.context
+        frame = Frame([context.get(name, UNDECLARED) for name in names], None, runtime)
+        try:
+            for statement in statements:
+                result = statement(frame)
+                if type(result) is ReturnValue:
+                    return result
+            return None
+        finally:
+            versions = runtime.versions
+            for name, value in zip(names, frame.slots):
+                if value is not UNDECLARED:
+                    if name in versions and name not in context:
+                        versions[name] += 1
+                    context[name] = value
+    return run_program
+
+
+def compile_block(block: Block, scope: Scope, tail: bool = False) -> Callable:
+    """Compile the statements of ``block``; with ``tail`` the last one ends a function body."""
+    last = len(block.body) - 1
+    statements = tuple(compile_statement(statement, scope, tail and index == last) for index, statement in enumerate(block.body))
+    if len(statements) == 1:
+        return statements[0]
+
+    def run_block(frame: Frame):
+        for statement in statements:
+            result = statement(frame)
+            if result is not None:
+                return result
+        return None
+    return run_block
+
+
+def compile_statement(node: Node, scope: Scope, tail: bool = False) -> Callable:
+    kind = type(node)
+    if tail and kind is CallExpression:
+        return _compile_tail_call(node, scope, False)
+    if tail and kind is ReturnStatement and type(node.value) is CallExpression:
+        return _compile_tail_call(node.value, scope, True)
+    if kind is VariableDeclaration:
+        return _compile_declaration(node, scope)
+    if kind is Assignment:
+        return _compile_assignment(node, scope)
+    if kind is CallExpression:
+        return _compile_call_statement(node, scope)
+    if kind is IfStatement:
+        return _compile_if(node, scope, tail)
+    if kind is WhileStatement:
+        return _compile_while(node, scope)
+    if kind is ReturnStatement:
+        value = compile_expression(node.value, scope)
+        return lambda frame: ReturnValue(value(frame))
+    if kind is BreakStatement:
+        return lambda frame: BREAK
+    if kind is Block:
+        return compile_block(node, scope, tail)
+    if kind is Fun:
+        # Fun.exec runs the body in place.
+        return compile_block(node.body, scope, tail)
+    if kind is EmptyStatement:
+        return lambda frame: None
+    expression = compile_expression(node, scope)
+
+    def run_expression(frame: Frame):
+        expression(frame)
+    return run_expression
+
+
+def compile_expression(node: Node, scope: Scope) -> Callable:
+    kind = type(node)
+    if kind is Identifier:
+        return _compile_identifier(node.name, scope)
+    if kind in literals:
+        value = node.value
+        return lambda frame: value
+    if kind is BinaryExpression:
+        return _compile_binary(node, scope)
+    if kind is UnaryExpression:
+        return _compile_unary(node, scope)
+    if kind is CallExpression:
+        call = _compile_call(node, scope)
+
+        def eval_call(frame: Frame):
+            result = call(frame)
+            if result is not None:
+                return result.value
+            return None
+        return eval_call
+    if kind is Fun:
+        return _compile_fun(node, scope)
+    if kind is Memoized:
+        fun = _compile_fun(node.fun, scope)
+        table = node.table
+        return lambda frame: MemoFun(fun(frame), table)
+    if kind is ListExpression:
+        elements = [compile_expression(element, scope) for element in node.elements]
+        return lambda frame: PersistentVector.from_iterable([element(frame) for element in elements])
+    if kind is MapExpression:
+        entries = [(compile_expression(key, scope), compile_expression(value, scope)) for key, value in zip(node.keys, node.values)]
+        return lambda frame: PersistentMap.from_items([(key(frame), value(frame)) for key, value in entries])
+    if kind is EmptyStatement:
+        return lambda frame: None
+    raise Exception(f"Cannot compile {kind.__name__}")
+
+
+def _compile_fun(node: Fun, scope: Scope) -> Callable:
+    params = [param.name for param in node.params]
+    fun_scope = Scope(scope)
+    for name in params:
+        fun_scope.declare(name)
+    fun_scope.collect(node.body)
+    size = len(fun_scope.names)
+    # A function that declares nothing runs in the frame it closes over.
+    body = compile_block(node.body, fun_scope if size else scope, True)
+    for index, name in enumerate(params):
+        if name in params[:index]:
+            # FunEnv only fails once the duplicate parameter is declared.
+            body = _raise(Exception(f"Variable {name} is already declared"))
+            break
+    arity = len(params)
+    return lambda frame: CompiledFun(frame, arity, size, body)
+
+
+def _raise(error: Exception) -> Callable:
+    def fail(frame: Frame):
+        raise error
+    return fail
+
+
+def _frame_at(frame: Frame, depth: int) -> Frame:
+    for _ in range(depth):
+        frame = frame.parent
+    return frame
+
+
+def _host_lookup(frame: Frame, name: str):
+    return frame.root().runtime.deep_get_value(name)
+
+
+def _lookup(frame: Frame, name: str, bindings: tuple[tuple[int, int], ...]):
+    for depth, slot in bindings:
+        value = _frame_at(frame, depth).slots[slot]
+        if value is not UNDECLARED:
+            return value
+    return _host_lookup(frame, name)
+
+
+def _compile_identifier(name: str, scope: Scope) -> Callable:
+    bindings = scope.resolve(name)
+    if not bindings:
+        return lambda frame: _host_lookup(frame, name)
+    depth, slot = bindings[0]
+    if len(bindings) > 1 or depth > 1:
+        return lambda frame: _lookup(frame, name, bindings)
+    if depth == 0:
+        def lookup(frame: Frame):
+            value = frame.slots[slot]
+            if value is UNDECLARED:
+                return _host_lookup(frame, name)
+            return value
+        return lookup
+
+    def lookup_parent(frame: Frame):
+        value = frame.parent.slots[slot]
+        if value is UNDECLARED:
+            return _host_lookup(frame, name)
+        return value
+    return lookup_parent
+
+
+def _compile_binary(node: BinaryExpression, scope: Scope) -> Callable:
+    left = compile_expression(node.left, scope)
+    right = compile_expression(node.right, scope)
+    function = binary_operators.get(node.operator)
+    if function is None:
+        def unknown(frame: Frame):
+            left(frame)
+            right(frame)
+        return unknown
+    if type(node.right) in literals:
+        value = node.right.value
+        return lambda frame: function(left(frame), value)
+    if type(node.left) in literals:
+        value = node.left.value
+        return lambda frame: function(value, right(frame))
+    return lambda frame: function(left(frame), right(frame))
+
+
+def _compile_unary(node: UnaryExpression, scope: Scope) -> Callable:
+    expression = compile_expression(node.expression, scope)
+    function = unary_operators.get(node.operator)
+    if function is None:
+        return expression
+    return lambda frame: function(expression(frame))
+
+
+def _host_call(frame: Frame, name: str, args: list):
+    runtime = frame.root().runtime
+    while True:
+        if runtime.has_value(name):
+            return runtime.get_value(name).exec(args)
+        if runtime.parent is None:
+            break
+        runtime = runtime.parent
+    if name in runtime.exteral_fun:
+        return runtime.exteral_fun[name](*args)
+    return None
+
+
+def _declared(frame: Frame, bindings: tuple[tuple[int, int], ...]) -> bool:
+    for depth, slot in bindings:
+        if _frame_at(frame, depth).slots[slot] is not UNDECLARED:
+            return True
+    return False
+
+
+def _compile_call(node: CallExpression, scope: Scope) -> Callable:
+    name = node.callee.name
+    arguments = tuple(compile_expression(argument, scope) for argument in node.arguments)
+    bindings = scope.resolve(name)
+    if not bindings:
+        return lambda frame: _host_call(frame, name, [argument(frame) for argument in arguments])
+    callee = _compile_identifier(name, scope)
+
+    def call(frame: Frame):
+        args = [argument(frame) for argument in arguments]
+        fun = callee(frame)
+        if fun is None and not _declared(frame, bindings):
+            return _host_call(frame, name, args)
+        return fun.exec(args)
+    return call
+
+
+def _compile_call_statement(node: CallExpression, scope: Scope) -> Callable:
+    call = _compile_call(node, scope)
+
+    return lambda frame: _statement_result(call(frame))
+
+
+def _compile_tail_call(node: CallExpression, scope: Scope, returning: bool) -> Callable:
+    """Compile a call whose result the function returns, as ``exec_tail`` runs it."""
+    finish = _returned if returning else _statement_result
+    name = node.callee.name
+    bindings = scope.resolve(name)
+    if not bindings:
+        call = _compile_call(node, scope)
+        return lambda frame: finish(call(frame))
+    arguments = tuple(compile_expression(argument, scope) for argument in node.arguments)
+    callee = _compile_identifier(name, scope)
+
+    def tail_call(frame: Frame):
+        args = [argument(frame) for argument in arguments]
+        fun = callee(frame)
+        if type(fun) is CompiledFun:
+            return TailCall(fun, args, returning)
+        if fun is None and not _declared(frame, bindings):
+            return finish(_host_call(frame, name, args))
+        return finish(fun.exec(args))
+    return tail_call
+
+
+def _returned(result) -> ReturnValue:
+    return ReturnValue(None if result is None else result.value)
+
+
+def _statement_result(result):
+    """The signal a call statement passes on from the callee's result."""
+    if result is None or type(result) is ReturnValue or isinstance(result, BreakStatement):
+        return result
+    return None
+
+
+def _compile_declaration(node: VariableDeclaration, scope: Scope) -> Callable:
+    name = node.id.name
+    slot = scope.declare(name)
+    value = compile_expression(node.value, scope)
+
+    def declare(frame: Frame):
+        result = value(frame)
+        slots = frame.slots
+        if slots[slot] is not UNDECLARED:
+            raise Exception(f"Variable {name} is already declared")
+        slots[slot] = result
+    return declare
+
+
+def _compile_assignment(node: Assignment, scope: Scope) -> Callable:
+    name = node.id.name
+    value = compile_expression(node.value, scope)
+    bindings = scope.resolve(name)
+    if len(bindings) == 1 and bindings[0][0] == 0:
+        slot = bindings[0][1]
+
+        def assign_local(frame: Frame):
+            result = value(frame)
+            slots = frame.slots
+            if slots[slot] is UNDECLARED:
+                frame.root().runtime.assign(name, result)
+            else:
+                slots[slot] = result
+        return assign_local
+
+    def assign(frame: Frame):
+        result = value(frame)
+        for depth, slot in bindings:
+            slots = _frame_at(frame, depth).slots
+            if slots[slot] is not UNDECLARED:
+                slots[slot] = result
+                return
+        frame.root().runtime.assign(name, result)
+    return assign
+
+
+def _compile_if(node: IfStatement, scope: Scope, tail: bool = False) -> Callable:
+    test = compile_expression(node.test, scope)
+    consequent = _compile_scope(node.consequent, scope, tail)
+    alternate = _compile_scope(node.alternate, scope, tail)
+
+    def run_if(frame: Frame):
+        if test(frame):
+            return consequent(frame)
+        return alternate(frame)
+    return run_if
+
+
+def _compile_while(node: WhileStatement, scope: Scope) -> Callable:
+    test = compile_expression(node.test, scope)
+    body = _compile_scope(node.body, scope)
+
+    def run_while(frame: Frame):
+        while test(frame):
+            result = body(frame)
+            if result is not None:
+                return result
+        return None
+    return run_while
+
+
+def _compile_scope(block: Block, scope: Scope, tail: bool = False) -> Callable:
+    """Compile a block that runs in a child frame of its parent.
+
+    A block that declares nothing behaves the same in its parent frame, so
+    the child is only created when the block has declarations.
+    """
+    if not block.declares():
+        return compile_block(block, scope, tail)
+    block_scope = Scope(scope)
+    block_scope.collect(block)
+    body = compile_block(block, block_scope, tail)
+    size = len(block_scope.names)
+    return lambda frame: body(Frame([UNDECLARED] * size, frame))
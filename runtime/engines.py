@@ -0,0 +1,25 @@
+from runtime.ast import Program
+from runtime.bytecode import compile_program as compile_bytecode
+from runtime.compiler import compile_program as compile_closures
+from runtime.runtime import Runtime
+from runtime.transpiler import compile_program as compile_python
+from runtime.vm import run_program
+
+ENGINES = ("tree", "closure", "bytecode", "python")
+
+
+def run(program: Program, runtime: Runtime, engine: str = "tree", positions: list[tuple[int, int]] = None):
+    """Execute ``program`` in ``runtime`` with the chosen engine.
+
+    ``positions``, as ``located_program_parser`` returns them, locate the
+    errors of the python engine, see ``transpiler.compile_program``.
+    """
+    if engine == "tree":
+        return program.exec(runtime)
+    if engine == "closure":
+        return compile_closures(program)(runtime)
+    if engine == "bytecode":
+        return run_program(compile_bytecode(program), runtime)
+    if engine == "python":
+        return compile_python(program, positions)(runtime)
+    raise Exception(f"Unknown engine {engine}, expected one of {ENGINES}")
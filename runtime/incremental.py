@@ -0,0 +1,158 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+from runtime.ast import Program
+from runtime.interpreter import parse_statements
+from runtime.tokenizer import TokenTable, Tokenizer
+
+
+class Document:
+    """A parsed script that can be edited without re-parsing all of it.
+
+    Besides the script and its ``Program`` a document keeps, for every
+    statement of ``Program.body``, the offset where its first token starts,
+    where its last token ends, and the row it starts on. ``edit`` uses them to
+    re-scan and re-parse only the statements around the edit; every other
+    statement keeps its AST node.
+
+    Scanning and parsing scale with the edited statements. The offsets and
+    rows of the statements after the edit, and of their tokens once
+    ``tokens`` was used, are still shifted one array pass each, so that part
+    of an edit remains linear in the rest of the file.
+    """
+
+    def __init__(self, script: str, program: Program, starts: array, ends: array, rows: array):
+        self.script = script
+        self.program = program
+        self.starts = starts
+        self.ends = ends
+        self.rows = rows
+        self._tokens = None
+
+    @staticmethod
+    def parse(script: str) -> "Document":
+        tkr = Tokenizer()
+        tkr.init(script)
+        body, starts, ends, rows = _parse_range(tkr)
+        return Document(script, Program(body), starts, ends, rows)
+
+    @property
+    def tokens(self) -> TokenTable:
+        """Token stream of the whole script, scanned on first use and then kept up to date by ``edit``."""
+        if self._tokens is None:
+            tkr = Tokenizer()
+            tkr.init(self.script)
+            self._tokens = tkr.tokens
+        return self._tokens
+
+    def edit(self, start: int, end: int, text: str) -> tuple[int, int, int]:
+        """Replace ``script[start:end]`` with ``text``.
+
+        Returns ``(index, removed, inserted)``: the statements
+        ``body[index:index + removed]`` were replaced by ``inserted`` new ones.
+        """
+        script = self.script
+        if not 0 <= start <= end <= len(script):
+            raise Exception(f"Invalid edit range {start}:{end}")
+        new_script = script[:start] + text + script[end:]
+        delta = len(text) - (end - start)
+        body = self.program.body
+        count = len(body)
+        # Statements touching the edit, plus one untouched neighbour on each
+        # side: an edit at the start of a statement can change where the
+        # previous one ends, and an edit at its end can make it run on.
+        first = max(bisect_left(self.ends, start) - 1, 0)
+        last = min(bisect_right(self.starts, end), count - 1)
+        region_start = self.starts[first] if count else 0
+        if region_start > start:
+            region_start = 0
+        if last >= 0 and self.starts[last] > end:
+            region_end = self.ends[last] + delta
+        else:
+            region_end = len(new_script)
+        row = self.rows[first] if region_start else 0
+        col = region_start - (script.rfind("\n", 0, region_start) + 1)
+
+        tkr = Tokenizer()
+        tkr.init_range(new_script, region_start, region_end, row, col)
+        try:
+            statements, starts, ends, rows = _parse_range(tkr)
+        except Exception:
+            return self._replace(Document.parse(new_script))
+        if region_end != len(new_script) and (not starts or starts[-1] != self.starts[last] + delta):
+            return self._replace(Document.parse(new_script))
+
+        removed = last - first + 1 if count else 0
+        if removed and self.ends[first] < start and starts[0] == self.starts[first] and ends[0] == self.ends[first]:
+            statements[0] = body[first]
+        if removed > 1 and self.starts[last] > end and starts[-1] == self.starts[last] + delta and ends[-1] == self.ends[last] + delta:
+            statements[-1] = body[last]
+
+        row_delta = text.count("\n") - script.count("\n", start, end)
+        tail = first + removed
+        body[first:tail] = statements
+        self.starts[first:tail] = starts
+        self.ends[first:tail] = ends
+        self.rows[first:tail] = rows
+        tail = first + len(statements)
+        if delta:
+            self.starts[tail:] = array("i", [offset + delta for offset in self.starts[tail:]])
+            self.ends[tail:] = array("i", [offset + delta for offset in self.ends[tail:]])
+        if row_delta:
+            self.rows[tail:] = array("i", [row + row_delta for row in self.rows[tail:]])
+        if self._tokens is not None:
+            self._splice_tokens(tkr.tokens, region_start, region_end - delta, delta, row_delta)
+        self.script = new_script
+        return first, removed, len(statements)
+
+    def _splice_tokens(self, region: TokenTable, start: int, end: int, delta: int, row_delta: int):
+        """Put the tokens ``region`` scanned for ``script[start:end]`` in place of the old ones."""
+        tokens = self._tokens
+        script = self.script
+        new_script = region.script
+        first = bisect_left(tokens.starts, start)
+        last = bisect_left(tokens.starts, end)
+        tokens.types[first:last] = region.types
+        tokens.starts[first:last] = region.starts
+        tokens.ends[first:last] = region.ends
+        tokens.rows[first:last] = region.rows
+        tokens.cols[first:last] = region.cols
+        tail = first + len(region)
+        # Tokens on the rest of the line the region ends on move within it.
+        col_delta = script.rfind("\n", 0, end) + 1 + delta - (new_script.rfind("\n", 0, end + delta) + 1)
+        same_line = tail
+        if col_delta:
+            line_end = script.find("\n", end)
+            same_line = bisect_left(tokens.starts, len(script) if line_end < 0 else line_end, tail)
+        if delta:
+            tokens.starts[tail:] = array("i", [offset + delta for offset in tokens.starts[tail:]])
+            tokens.ends[tail:] = array("i", [offset + delta for offset in tokens.ends[tail:]])
+        if row_delta:
+            tokens.rows[tail:] = array("i", [row + row_delta for row in tokens.rows[tail:]])
+        if col_delta:
+            tokens.cols[tail:same_line] = array("i", [col + col_delta for col in tokens.cols[tail:same_line]])
+        tokens.script = new_script
+
+    def _replace(self, document: "Document") -> tuple[int, int, int]:
+        removed = len(self.program.body)
+        self.program.body[:] = document.program.body
+        self.script = document.script
+        self.starts = document.starts
+        self.ends = document.ends
+        self.rows = document.rows
+        self._tokens = None
+        return 0, removed, len(document.program.body)
+
+
+def _parse_range(tkr: Tokenizer):
+    tokens = tkr.tokens
+    body = list()
+    starts = array("i")
+    ends = array("i")
+    rows = array("i")
+    for statement, first, last in parse_statements(tkr):
+        body.append(statement)
+        starts.append(tokens.starts[first])
+        ends.append(tokens.ends[last - 1])
+        rows.append(tokens.rows[first])
+    return body, starts, ends, rows
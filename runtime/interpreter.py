@@ -1,36 +1,18 @@
 from ast import Expression
-import copy
-from runtime.ast import Assignment, BinaryExpression, Block, BoolLiteral, BreakStatement, CallExpression, EmptyStatement, FloatLiteral, Fun, Identifier, IfStatement, IntLiteral, Program, ReturnStatement, Statement, StringLiteral, UnaryExpression, VariableDeclaration, WhileStatement
-from .tokenizer import Token, TokenType, Tokenizer
+from runtime.ast import Assignment, BinaryExpression, Block, BoolLiteral, BreakStatement, CallExpression, EmptyStatement, FloatLiteral, Fun, Identifier, IfStatement, IntLiteral, ListExpression, MapExpression, Program, ReturnStatement, Statement, StringLiteral, UnaryExpression, VariableDeclaration, WhileStatement
+from .tokenizer import TokenType, Tokenizer
 
-unary_prev_statement = [
-    TokenType.COMMENTS,
-    TokenType.LEFT_PAREN,
-    TokenType.COMMA,
-    TokenType.LEFT_BRACE,
-    TokenType.RIGHT_BRACE,
-    TokenType.SEMICOLON,
-    TokenType.LET,
-    TokenType.RETURN,
-    TokenType.IF,
-    TokenType.ELSE,
-    TokenType.WHILE,
-    TokenType.FOR,
-    TokenType.LOGICAL_OPERATOR,
-    TokenType.NOT,
-    TokenType.ASSIGNMENT,
-    TokenType.MULTIPLICATIVE_OPERATOR,
-    TokenType.ADDITIVE_OPERATOR,
-    TokenType.ARROW,
-]
+unary_operators = frozenset((TokenType.ADDITIVE_OPERATOR, TokenType.NOT))
+
+unary_values = frozenset(("+", "-", "!"))
 
-unary_end_statement = [
+binary_operators = frozenset((
     TokenType.MULTIPLICATIVE_OPERATOR,
     TokenType.ADDITIVE_OPERATOR,
     TokenType.LOGICAL_OPERATOR,
-]
+))
 
-end_statement = [
+end_statement = frozenset((
     TokenType.SEMICOLON,
     TokenType.COMMA,
     TokenType.ARROW,
@@ -43,21 +25,39 @@ end_statement = [
     TokenType.ASSIGNMENT,
     TokenType.RIGHT_BRACE,
     TokenType.LEFT_BRACE,
-]
+    TokenType.RIGHT_PAREN,
+    TokenType.RIGHT_BRACKET,
+    TokenType.COLON,
+))
 
 def program_parser(tkr: Tokenizer):
-    statements = list[Statement]()
-    count = 0
+    return Program([statement for statement, _, _ in parse_statements(tkr)])
+
+def located_program_parser(tkr: Tokenizer) -> tuple[Program, list[tuple[int, int]]]:
+    """Parse a program along with the (row, col) where each top-level statement starts."""
+    body = list[Statement]()
+    positions = list[tuple[int, int]]()
+    for statement, first, _ in parse_statements(tkr):
+        token = tkr.tokens[first]
+        body.append(statement)
+        positions.append((token.row, token.col))
+    return Program(body), positions
+
+def parse_statements(tkr: Tokenizer):
+    """Yield each top-level statement with the index range of its tokens."""
     while True:
-        if tkr.token() is None:
-            break
-        if tkr.token().type == TokenType.SEMICOLON:
+        token_type = tkr.tokenType()
+        if token_type is None:
+            return
+        if token_type == TokenType.SEMICOLON:
             tkr.next()
             continue
+        first = tkr._current_token_index
         statement = statement_parser(tkr)
-        statements.append(statement)
-        count += 1
-    return Program(statements)
+        last = tkr._current_token_index
+        if last == first:
+            raise Exception("Unexpected token", tkr.token())
+        yield statement, first, last
 
 def if_parser(tkr: Tokenizer):
     tkr.eat(TokenType.IF)
@@ -79,25 +79,29 @@ def while_parser(tkr: Tokenizer):
 
 
 def identifier(tkr: Tokenizer):
-    token = tkr.token()
-    if token.type != TokenType.IDENTIFIER:
-        raise Exception("Invalid identifier", token)
+    if tkr.tokenType() != TokenType.IDENTIFIER:
+        raise Exception("Invalid identifier", tkr.token())
+    name = tkr.token_value()
     tkr.next()
-    return Identifier(token.value)
+    return Identifier(name)
 
 def block_statement(tkr: Tokenizer):
     tkr.eat(TokenType.LEFT_BRACE)
     statements = list[Statement]()
     while True:
-        if tkr.token() is None:
+        token_type = tkr.tokenType()
+        if token_type is None:
             raise Exception("Invalid block expression", tkr.token())
-        if tkr.tokenType() == TokenType.RIGHT_BRACE:
-            tkr.eat(TokenType.RIGHT_BRACE)
+        if token_type == TokenType.RIGHT_BRACE:
+            tkr.next()
             break
-        if tkr.tokenType() == TokenType.SEMICOLON:
+        if token_type == TokenType.SEMICOLON:
             tkr.next()
             continue
+        first = tkr._current_token_index
         statements.append(statement_parser(tkr))
+        if tkr._current_token_index == first:
+            raise Exception("Unexpected token", tkr.token())
     return Block(statements)
 
 
@@ -106,23 +110,23 @@ def return_parser(tkr: Tokenizer):
     return ReturnStatement(ExpressionParser(tkr).parse())
 
 def statement_parser(tkr: Tokenizer):
-    token = tkr.token()
-    if token is None:
+    token_type = tkr.tokenType()
+    if token_type is None:
         return EmptyStatement()
-    if token.type == TokenType.SEMICOLON:
+    if token_type == TokenType.SEMICOLON:
         tkr.next()
         return EmptyStatement()
-    if token.type == TokenType.LET:
+    if token_type == TokenType.LET:
         return let_expression_parser(tkr)
     if _try_assignment_expression(tkr):
         return assignment_parser(tkr)
-    if token.type == TokenType.IF:
+    if token_type == TokenType.IF:
         return if_parser(tkr)
-    if token.type == TokenType.WHILE:
+    if token_type == TokenType.WHILE:
         return while_parser(tkr)
-    if token.type == TokenType.RETURN:
+    if token_type == TokenType.RETURN:
         return return_parser(tkr)
-    if token.type == TokenType.BREAK:
+    if token_type == TokenType.BREAK:
         tkr.eat(TokenType.BREAK)
         return BreakStatement()
     return ExpressionParser(tkr).parse()
@@ -138,6 +142,7 @@ def let_expression_parser(tkr: Tokenizer):
     if token.type != TokenType.IDENTIFIER:
         raise Exception("Invalid let statement", token)
     id = identifier(tkr)
+    value_type = type_annotation(tkr)
     token = tkr.token()
     if token is None:
         raise Exception("Invalid let statement", token)
@@ -145,61 +150,134 @@ def let_expression_parser(tkr: Tokenizer):
         raise Exception("Invalid let statement", token.type)
     tkr.next()
     ast = ExpressionParser(tkr).parse()
-    return VariableDeclaration(id, ast)
+    return VariableDeclaration(id, ast, value_type)
+
+def type_annotation(tkr: Tokenizer) -> str:
+    """Parse an optional ``: type`` and return the type, "any" without one."""
+    if tkr.tokenType() != TokenType.COLON:
+        return "any"
+    tkr.next()
+    if tkr.tokenType() != TokenType.TYPE_DEFINITION:
+        raise Exception("Invalid type annotation", tkr.token())
+    value_type = tkr.token_value()
+    tkr.next()
+    return value_type
 
 class ExpressionParser:
+    """Precedence climbing parser for one expression.
+
+    Operands are parsed by ``unary`` and ``primary``; ``binary`` folds them
+    into left-associative ``BinaryExpression`` nodes by the precedence
+    ``_priority`` gives each operator. Recursion only happens per precedence level and per
+    nested group, never per term.
+    """
 
     def __init__(self, tkr: Tokenizer):
-        self.stack = list[Expression | Token]()
-        self.operator_stack = list[Token]()
         self.tkr = tkr
 
-    def parse(self, unary = False):
-        while not self.is_end():
-            token = self.tkr.token()
-            if unary and not self.is_unary() and token.type in unary_end_statement:
-                break
-            if self.is_unary():
-                self.push_stack(self.unary_expression_parser())
-            elif self._try_fun_expression():
-                return self.fun_expression()
-            # -(hello x 123) // !(true and false)
-            elif unary and token.type == TokenType.LEFT_PAREN:
-                self.tkr.next()
-                self.push_stack(ExpressionParser(self.tkr).parse())
-            elif self._is_operator(token) or token.type in [TokenType.LEFT_PAREN, TokenType.RIGHT_PAREN ]:
-                self.push_operator_stack(token)
-                self.tkr.next()
-            else:
-                self.push_stack(self.expression_parser())
-        self.pop_all()
-        return self.expression()
-    
-    def expression(self):
-        if len(self.stack) == 0:
+    def parse(self):
+        if self.is_end():
             return EmptyStatement()
-        if len(self.stack) == 1:
-            return self.stack[0]
-        return expression_list_to_binary(self.stack)
+        return self.binary(lowest_precedence)
+
+    def binary(self, level: int):
+        tkr = self.tkr
+        left = self.unary()
+        while True:
+            if tkr.tokenType() not in binary_operators:
+                return left
+            operator = tkr.token_value()
+            precedence = _priority(operator)
+            if precedence > level:
+                return left
+            tkr.next()
+            left = BinaryExpression(left, operator, self.binary(precedence - 1))
+
+    def unary(self):
+        tkr = self.tkr
+        operators = list[str]()
+        while tkr.tokenType() in unary_operators and tkr.token_value() in unary_values:
+            operators.append(tkr.token_value())
+            tkr.next()
+        expression = self.primary()
+        for operator in reversed(operators):
+            expression = UnaryExpression(operator, expression)
+        return expression
+
+    def primary(self):
+        tkr = self.tkr
+        if _try_fun_expression(tkr):
+            expression = self.fun_expression()
+        elif tkr.tokenType() == TokenType.LEFT_PAREN:
+            tkr.next()
+            expression = self.parse()
+            tkr.eat(TokenType.RIGHT_PAREN)
+        elif tkr.tokenType() == TokenType.LEFT_BRACKET:
+            expression = self.collection()
+        else:
+            expression = self.expression_parser()
+            if expression is None:
+                raise Exception("Invalid expression", tkr.token())
+        return self.chain(expression)
+
+    def chain(self, expression):
+        """``value.f(a)`` is the call ``f(value, a)``; chains apply left to right."""
+        tkr = self.tkr
+        while tkr.tokenType() == TokenType.DOT:
+            tkr.next()
+            id = self.identifier()
+            if tkr.tokenType() != TokenType.LEFT_PAREN:
+                raise Exception("Invalid chain call", tkr.token())
+            call = self.fun_call_parser(id)
+            call.arguments.insert(0, expression)
+            expression = call
+        return expression
+
+    def collection(self):
+        """``[a, b]`` is a list, ``[k: v, ...]`` a map and ``[:]`` the empty map."""
+        tkr = self.tkr
+        tkr.eat(TokenType.LEFT_BRACKET)
+        if tkr.tokenType() == TokenType.COLON:
+            tkr.next()
+            tkr.eat(TokenType.RIGHT_BRACKET)
+            return MapExpression([], [])
+        elements = list[Expression]()
+        values = None
+        while tkr.tokenType() != TokenType.RIGHT_BRACKET:
+            if tkr.tokenType() is None:
+                raise Exception("Invalid collection expression", tkr.token())
+            elements.append(self.parse())
+            if len(elements) == 1 and tkr.tokenType() == TokenType.COLON:
+                values = list[Expression]()
+            if values is not None:
+                tkr.eat(TokenType.COLON)
+                values.append(self.parse())
+            if tkr.tokenType() != TokenType.RIGHT_BRACKET:
+                tkr.eat(TokenType.COMMA)
+        tkr.next()
+        if values is None:
+            return ListExpression(elements)
+        return MapExpression(elements, values)
 
     def expression_parser(self):
-        token = self.tkr.token()
-        if token is None:
+        tkr = self.tkr
+        token_type = tkr.tokenType()
+        if token_type is None:
             return EmptyStatement()
         expression = None
-        if token.type == TokenType.INT:
-            self.tkr.eat(TokenType.INT)
-            expression = IntLiteral(int(token.value))
-        elif token.type == TokenType.FLOAT:
-            self.tkr.eat(TokenType.FLOAT)
-            expression = FloatLiteral(float(token.value))
-        elif token.type == TokenType.STRING:
-            self.tkr.eat(TokenType.STRING)
-            expression = StringLiteral(token.value[1:-1])
-        elif token.type == TokenType.BOOL:
-            self.tkr.eat(TokenType.BOOL)
-            expression = BoolLiteral(token.value == "true")
-        elif token.type == TokenType.IDENTIFIER:
+        if token_type == TokenType.INT:
+            expression = IntLiteral(int(tkr.token_value()))
+            tkr.next()
+        elif token_type == TokenType.FLOAT:
+            expression = FloatLiteral(float(tkr.token_value()))
+            tkr.next()
+        elif token_type == TokenType.STRING:
+            expression = StringLiteral(tkr.token_value()[1:-1])
+            tkr.next()
+        elif token_type == TokenType.BOOL:
+            expression = BoolLiteral(tkr.token_value() == "true")
+            tkr.next()
+        elif token_type == TokenType.IDENTIFIER:
             expression = self.identifier_or_fun_call_parser()
         return expression
     
@@ -210,10 +288,12 @@ class ExpressionParser:
         tkr = self.tkr
         tkr.next()
         args = list[Identifier]()
+        types = list[str]()
         token_type = tkr.tokenType()
         while token_type != TokenType.RIGHT_PAREN:
-            args.append(Identifier(tkr.token().value))
+            args.append(Identifier(tkr.token_value()))
             tkr.next()
+            types.append(type_annotation(tkr))
             token_type = tkr.tokenType()
             if token_type == TokenType.RIGHT_PAREN:
                 break
@@ -223,49 +303,9 @@ class ExpressionParser:
         if token_type != TokenType.ARROW:
             raise Exception("Invalid fun_expression", tkr.token())
         tkr.next()
-        return Fun(args, block_statement(tkr))
-
-    def push_stack(self, expression: Expression | Token):
-        self.stack.append(expression)
-
-    def _pop_by_right_paren(self):
-        token = self.operator_stack.pop()
-        if token.type != TokenType.LEFT_PAREN:
-            self.push_stack(token)
-            self._pop_by_right_paren()
-
-    def pop(self):
-        self.push_stack(self.operator_stack.pop())
-
-    def pop_all(self):
-        while len(self.operator_stack) > 0:
-            self.pop()
-
-    def push_operator_stack(self, token: Token):
-        if len(self.operator_stack) == 0:
-            self.operator_stack.append(token)
-            return
-        if token.type == TokenType.LEFT_PAREN:
-            self.operator_stack.append(token)
-            return
-        if token.type == TokenType.RIGHT_PAREN:
-            self._pop_by_right_paren()
-            return
-        top_operator = self.operator_stack[-1]
-        if top_operator.type == TokenType.LEFT_PAREN:
-            self.operator_stack.append(token)
-            return
-        # priority is in descending order
-        if self._priority(token) >= self._priority(top_operator):
-            self.pop()
-            self.push_operator_stack(token)
-            return
-        self.operator_stack.append(token)
-
-    def unary_expression_parser(self):
-        token = self.tkr.token()
-        self.tkr.next()
-        return UnaryExpression(token.value, ExpressionParser(self.tkr).parse(True))
+        if all(value_type == "any" for value_type in types):
+            types = []
+        return Fun(args, block_statement(tkr), tuple(types))
 
     def identifier_or_fun_call_parser(self):
         id = self.identifier()
@@ -278,7 +318,12 @@ class ExpressionParser:
         self.tkr.eat(TokenType.LEFT_PAREN)
         args = list[Expression]()
         while self.tkr.tokenType() != TokenType.RIGHT_PAREN:
-            args.append(ExpressionParser(self.tkr).parse())
+            if self.tkr.tokenType() is None:
+                raise Exception("Invalid call expression", self.tkr.token())
+            first = self.tkr._current_token_index
+            args.append(self.parse())
+            if self.tkr._current_token_index == first:
+                raise Exception("Invalid call expression", self.tkr.token())
             if self.tkr.tokenType() == TokenType.COMMA:
                 self.tkr.eat(TokenType.COMMA)
         self.tkr.eat(TokenType.RIGHT_PAREN)
@@ -287,134 +332,49 @@ class ExpressionParser:
     def identifier(self):
         return identifier(self.tkr)
 
-    def is_unary(self):
-        token = self.tkr.token()
-        if not self.unary_operator(token):
-            return False
-        if token.type == TokenType.NOT:
-            return True
-        prev_token = self.tkr.get_prev()
-        if prev_token is None:
-            return True
-        if prev_token.type == TokenType.LEFT_PAREN:
-            return True
-        if prev_token.type in unary_prev_statement:
-            return True
-        return False
-    
-    def unary_operator(self, token: Token):
-        if token is None:
-            return False
-        return token.value in ["+", "-", "!"]
+    def is_end(self):
+        token_type = self.tkr.tokenType()
+        return token_type is None or token_type in end_statement
 
-    def _has_brackets(self):
-        return TokenType.LEFT_PAREN in map(lambda x: x.type, self.operator_stack)
+binary_precedence = {
+    "*": 0, "/": 0, "%": 0,
+    "+": 1, "-": 1,
+    "<": 2, ">": 2, "<=": 2, ">=": 2,
+    "==": 3, "!=": 3,
+    "&&": 4,
+    "||": 5,
+}
 
-    def is_end(self):
-        token = self.tkr.token()
-        if token is None:
-            return True
-        if token.type == TokenType.SEMICOLON:
-            return True
-        if not self._has_brackets() and token.type == TokenType.RIGHT_PAREN:
-            return True
-        if token.type in end_statement:
-            return True
-        return False
-    
-    def _is_operator(self, token: Token):
-        if token is None:
-            return False
-        return token.type in [TokenType.ADDITIVE_OPERATOR, TokenType.MULTIPLICATIVE_OPERATOR, TokenType.LOGICAL_OPERATOR, TokenType.NOT]
-    
-    def _debug_print_tokens(self):
-        print("operator stack:----")
-        for token in self.operator_stack:
-            print(token)
-
-    def _debug_print_stack(self):
-        print("stack:----")
-        for expression in self.stack:
-            print(expression)
-    
-    def _priority(self, token: Token):
-        return _priority(token.value)
-
-def expression_list_to_binary(expression_list: list[Expression | Token], stack: list = None):
-    if stack is None:
-        stack = list()
-    if len(expression_list) == 0:
-        return stack[0]
-    top = expression_list[0]
-    if isinstance(top, Token):
-        right = stack.pop()
-        left = stack.pop()
-        return expression_list_to_binary(expression_list[1:], stack + [BinaryExpression(left, top.value, right)])
-    else:
-        stack.append(top)
-        return expression_list_to_binary(expression_list[1:], stack)
+lowest_precedence = max(binary_precedence.values())
 
 def _priority(operator: str):
-    priority = 0
-    if operator in ["*", "/", "%"]:
-        return priority
-    priority += 1
-    if operator in ["+", "-"]:
-        return priority
-    priority += 1
-    if operator in ["<", ">", "<=", ">="]:
-        return priority
-    priority += 1
-    if operator in ["==", "!="]:
-        return priority
-    priority += 1
-    if operator in ["&&"]:
-        return priority
-    priority += 1
-    if operator in ["||"]:
-        return priority
-    priority += 1
-    return priority
+    return binary_precedence.get(operator, lowest_precedence + 1)
 
 def _try_assignment_expression(tkr: Tokenizer):
-    tkr = copy.deepcopy(tkr)
-    token = tkr.token()
-    if token is None:
-        return False
-    if token.type != TokenType.IDENTIFIER:
-        return False
-    tkr.next()
-    token = tkr.token()
-    if token is None:
-        return False
-    if token.type != TokenType.ASSIGNMENT:
-        return False
-    return True
+    return tkr.peek_type() == TokenType.IDENTIFIER and tkr.peek_type(1) == TokenType.ASSIGNMENT
 
-def _try_fun_expression(_tkr: Tokenizer):
-    tkr = copy.deepcopy(_tkr)
-    token = tkr.token()
-    if token is None:
+def _try_fun_expression(tkr: Tokenizer):
+    # Only peeks, so the cost is the length of the parameter list.
+    if tkr.peek_type() != TokenType.LEFT_PAREN:
         return False
-    if token.type != TokenType.LEFT_PAREN:
-        return False
-    tkr.next()
-    token_type = tkr.tokenType()
+    offset = 1
+    token_type = tkr.peek_type(offset)
     while token_type != TokenType.RIGHT_PAREN:
-        if token_type == TokenType.IDENTIFIER:
-            tkr.next()
-            token_type = tkr.tokenType()
-            if token_type == TokenType.RIGHT_PAREN:
-                break
-            if token_type != TokenType.COMMA:
-                return False
-            tkr.next()
-            token_type = tkr.tokenType()
-            if token_type == TokenType.RIGHT_PAREN:
+        if token_type != TokenType.IDENTIFIER:
+            return False
+        offset += 1
+        token_type = tkr.peek_type(offset)
+        if token_type == TokenType.COLON:
+            if tkr.peek_type(offset + 1) != TokenType.TYPE_DEFINITION:
                 return False
-        else:
+            offset += 2
+            token_type = tkr.peek_type(offset)
+        if token_type == TokenType.RIGHT_PAREN:
+            break
+        if token_type != TokenType.COMMA:
             return False
-    token_type = tkr.next_token_type()
-    if token_type != TokenType.ARROW:
-        return False
-    return True
\ No newline at end of file
+        offset += 1
+        token_type = tkr.peek_type(offset)
+        if token_type == TokenType.RIGHT_PAREN:
+            return False
+    return tkr.peek_type(offset + 1) == TokenType.ARROW
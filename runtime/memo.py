@@ -0,0 +1,252 @@
+from collections import Counter, OrderedDict
+from typing import Iterable, Iterator
+
+from attr import dataclass
+
+from runtime.ast import Assignment, BinaryExpression, Block, BoolLiteral, BreakStatement, CallExpression, EmptyStatement, Expression, FloatLiteral, Fun, Identifier, IfStatement, IntLiteral, ListExpression, MapExpression, Node, Program, ReturnStatement, StringLiteral, UnaryExpression, VariableDeclaration, WhileStatement, walk
+from runtime.runtime import Runtime
+
+# Memoization: a top-level function whose result depends only on its
+# arguments gets its value wrapped so that calls look the arguments up in a
+# table first. Each engine calls through the wrapper like any other value,
+# and the table keeps call results in the form ``FunEnv.exec`` returns them.
+
+# Entries a table keeps before evicting the least recently used one.
+MAX_ENTRIES = 1024
+
+literals = frozenset((IntLiteral, FloatLiteral, StringLiteral, BoolLiteral))
+
+
+class Missing():
+
+    def __repr__(self) -> str:
+        return "MISSING"
+
+# Returned by ``MemoTable.get`` for arguments the table has no result for.
+MISSING = Missing()
+
+
+@dataclass
+class MemoStats():
+    """How often a memo table answered a call."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class MemoTable:
+    """Call results of one function by argument, least recently used first."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.stats = MemoStats()
+
+    def key(self, args: tuple):
+        """Key of a call with ``args``, or None if an argument is unhashable.
+
+        The types are part of the key, since ``1``, ``1.0`` and ``true``
+        are equal in Python but not the same argument to a function.
+        """
+        key = (args, tuple(map(type, args)))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def get(self, key):
+        stats = self.stats
+        if key is None:
+            stats.misses += 1
+            return MISSING
+        entries = self.entries
+        result = entries.get(key, MISSING)
+        if result is MISSING:
+            stats.misses += 1
+        else:
+            entries.move_to_end(key)
+            stats.hits += 1
+        return result
+
+    def put(self, key, result):
+        """Keep ``result`` for ``key`` and return it."""
+        if key is not None:
+            entries = self.entries
+            entries[key] = result
+            if len(entries) > self.max_entries:
+                entries.popitem(last=False)
+                self.stats.evictions += 1
+        return result
+
+    def clear(self):
+        self.entries.clear()
+
+
+class MemoFun:
+    """Function value calling ``fun``, any engine's function value, through ``table``."""
+    __slots__ = ("fun", "table")
+
+    def __init__(self, fun, table: MemoTable):
+        self.fun = fun
+        self.table = table
+
+    def exec(self, args: list):
+        table = self.table
+        key = table.key(tuple(args))
+        result = table.get(key)
+        if result is MISSING:
+            result = table.put(key, self.fun.exec(args))
+        return result
+
+
+@dataclass
+class Memoized(Expression):
+    """A function whose calls go through ``table``, see ``memoize``."""
+    fun: Fun
+    table: MemoTable
+
+    def eval(self, runtime: Runtime):
+        return MemoFun(self.fun.eval(runtime), self.table)
+
+    def dict(self):
+        return self.fun.dict()
+
+
+def pure_functions(program: Program, externals: Iterable[str] = ()) -> list[str]:
+    """Top-level functions of ``program`` whose result depends only on their arguments.
+
+    Such a function is declared once with ``let`` and never assigned. Its
+    body assigns only its own variables, makes no functions and reads no
+    names but its own variables and top-level names declared once before
+    it with a literal and never assigned. It calls only itself, pure
+    functions declared before it and the host's functions named in
+    ``externals``, which are taken to be pure. Anything else, even if
+    it could be shown harmless, keeps a function out.
+    """
+    top = Counter(statement.id.name for statement in program.body if type(statement) is VariableDeclaration)
+    assigned = {node.id.name for node in walk(program) if type(node) is Assignment}
+    externals = {name for name in externals if name not in top and name not in assigned}
+    constants = set[str]()
+    pure = list[str]()
+    for statement in program.body:
+        if type(statement) is not VariableDeclaration:
+            continue
+        name = statement.id.name
+        if top[name] != 1 or name in assigned:
+            continue
+        kind = type(statement.value)
+        if kind in literals:
+            constants.add(name)
+        elif kind is Fun and _Purity(set(pure) | {name}, constants, externals).fun(statement.value):
+            pure.append(name)
+    return pure
+
+
+def memoize(program: Program, externals: Iterable[str] = (), max_entries: int = MAX_ENTRIES, include: Iterable[str] = (), exclude: Iterable[str] = ()) -> tuple[Program, dict[str, MemoTable]]:
+    """``program`` with its pure functions memoized, and the table of each.
+
+    ``externals`` names the host's functions that are pure, see
+    ``pure_functions``. Functions named in ``include`` are memoized even if
+    the analysis cannot show them pure, those in ``exclude`` never are. Each
+    table keeps at most ``max_entries`` results, and is shared by every run
+    of the returned program.
+
+    A function calling itself in tail position is never memoized: the engines
+    run such calls in a loop, but only to a function value they made, so a
+    call through the table would take a Python stack frame per iteration.
+    """
+    exclude = set(exclude)
+    chosen = (set(pure_functions(program, externals)) | set(include)) - exclude
+    tables = dict[str, MemoTable]()
+    body = list[Node]()
+    for statement in program.body:
+        name = statement.id.name if type(statement) is VariableDeclaration else None
+        if name in chosen and type(statement.value) is Fun and name not in tables and not _tail_recursive(name, statement.value):
+            tables[name] = MemoTable(max_entries)
+            statement = VariableDeclaration(statement.id, Memoized(statement.value, tables[name]))
+        body.append(statement)
+    return Program(body), tables
+
+
+def _tail_recursive(name: str, fun: Fun) -> bool:
+    return any(call.callee.name == name for call in _tail_calls(fun.body))
+
+
+def _tail_calls(block: Block) -> Iterator[CallExpression]:
+    """Calls of a function body that the engines run as tail calls, as ``exec_tail`` finds them."""
+    if not block.body:
+        return
+    last = block.body[-1]
+    if type(last) is ReturnStatement:
+        last = last.value
+    kind = type(last)
+    if kind is CallExpression:
+        yield last
+    elif kind is IfStatement:
+        yield from _tail_calls(last.consequent)
+        yield from _tail_calls(last.alternate)
+    elif kind is Block:
+        yield from _tail_calls(last)
+
+
+class _Purity:
+    """Checks a function body, tracking the variables known declared at each point."""
+
+    def __init__(self, functions: set[str], constants: set[str], externals: set[str]):
+        self.functions = functions
+        self.constants = constants
+        self.externals = externals
+
+    def fun(self, node: Fun) -> bool:
+        params = [param.name for param in node.params]
+        if len(set(params)) != len(params):
+            return False
+        return self.block(node.body, set(params))
+
+    def block(self, block: Block, declared: set[str]) -> bool:
+        return all(self.statement(statement, declared) for statement in block.body)
+
+    def statement(self, node: Node, declared: set[str]) -> bool:
+        kind = type(node)
+        if kind is VariableDeclaration:
+            if not self.expression(node.value, declared):
+                return False
+            declared.add(node.id.name)
+            return True
+        if kind is Assignment:
+            # A name not declared yet is assigned wherever the caller has it.
+            return node.id.name in declared and self.expression(node.value, declared)
+        if kind is ReturnStatement:
+            return self.expression(node.value, declared)
+        if kind is IfStatement:
+            return self.expression(node.test, declared) and self.block(node.consequent, set(declared)) and self.block(node.alternate, set(declared))
+        if kind is WhileStatement:
+            return self.expression(node.test, declared) and self.block(node.body, set(declared))
+        if kind is Block:
+            return self.block(node, declared)
+        if kind is BreakStatement or kind is EmptyStatement:
+            return True
+        return self.expression(node, declared)
+
+    def expression(self, node: Node, declared: set[str]) -> bool:
+        kind = type(node)
+        if kind is Identifier:
+            return node.name in declared or node.name in self.constants
+        if kind in literals or kind is EmptyStatement:
+            return True
+        if kind is BinaryExpression:
+            return self.expression(node.left, declared) and self.expression(node.right, declared)
+        if kind is UnaryExpression:
+            return self.expression(node.expression, declared)
+        if kind is ListExpression:
+            return all(self.expression(element, declared) for element in node.elements)
+        if kind is MapExpression:
+            return all(self.expression(item, declared) for item in node.keys + node.values)
+        if kind is CallExpression:
+            name = node.callee.name
+            if name in declared or name not in self.functions and name not in self.externals:
+                return False
+            return all(self.expression(argument, declared) for argument in node.arguments)
+        # Functions made in the body, in place or as values.
+        return False
@@ -0,0 +1,251 @@
+from collections import Counter
+
+from runtime.ast import Assignment, BinaryExpression, Block, BoolLiteral, CallExpression, EmptyStatement, FloatLiteral, Fun, Identifier, IfStatement, IntLiteral, ListExpression, MapExpression, Node, Program, ReturnStatement, StringLiteral, UnaryExpression, VariableDeclaration, WhileStatement, walk
+
+# Literal node for each type a folded value can have. bool comes first in
+# lookups by exact type, so True never turns into an IntLiteral.
+literal_types = {
+    bool: BoolLiteral,
+    int: IntLiteral,
+    float: FloatLiteral,
+    str: StringLiteral,
+}
+
+literals = frozenset(literal_types.values())
+
+# Longer folded strings are left for run time rather than stored in the tree.
+max_string_length = 4096
+
+# Largest function body, in nodes, that level 2 copies into its callers.
+inline_budget = 16
+
+levels = (0, 1, 2)
+
+
+def optimize(program: Program, level: int = 1) -> Program:
+    """Return ``program`` rewritten for the given optimization level.
+
+    Level 0 returns it unchanged. Level 1 folds operators on literals into
+    literals, replaces an ``if`` with a literal test by the branch it takes
+    and drops ``while`` loops whose literal test is false. Expressions that
+    would raise, such as ``1 / 0``, are left to fail at run time. Level 2
+    also inlines calls to small functions, see ``Optimizer.inline``. New
+    nodes are built, so the parsed program can still be used as it was.
+    """
+    if level < 1:
+        return program
+    return Optimizer(program, level).program(program)
+
+
+class Optimizer:
+
+    def __init__(self, program: Program, level: int = 1):
+        self.level = level
+        # Top-level declarations of functions that may be inlined, and the
+        # optimized functions whose declarations precede the current node.
+        self.candidates = _inline_candidates(program) if level >= 2 else dict()
+        self.functions = dict[str, Fun]()
+
+    def program(self, program: Program) -> Program:
+        body = list()
+        for statement in program.body:
+            optimized = self.statement(statement)
+            if optimized is None:
+                continue
+            # At the top level a break ends only the current statement, so
+            # blocks are not spliced here.
+            body.append(optimized)
+            if type(statement) is VariableDeclaration and self.candidates.get(statement.id.name) is statement:
+                self.functions[statement.id.name] = optimized.value
+        return Program(body)
+
+    def statement(self, node: Node) -> Node | None:
+        """Optimized ``node``, or None when it has no effect."""
+        kind = type(node)
+        if kind is VariableDeclaration:
+            return VariableDeclaration(node.id, self.expression(node.value), node.value_type)
+        if kind is Assignment:
+            return Assignment(node.id, self.expression(node.value))
+        if kind is ReturnStatement:
+            return ReturnStatement(self.expression(node.value))
+        if kind is IfStatement:
+            return self.if_statement(node)
+        if kind is WhileStatement:
+            test = self.expression(node.test)
+            if _is_literal(test) and not test.value:
+                return None
+            return WhileStatement(test, self.block(node.body))
+        if kind is Block:
+            return self.block(node)
+        if kind is Fun:
+            return Fun(node.params, self.block(node.body), node.param_types)
+        if kind is EmptyStatement:
+            return None
+        if kind is CallExpression:
+            call = self.expression(node)
+            # The callee returned a ReturnValue, which a call statement
+            # passes on like a return statement would.
+            return call if type(call) is CallExpression else ReturnStatement(call)
+        return self.expression(node)
+
+    def expression(self, node: Node) -> Node:
+        kind = type(node)
+        if kind is BinaryExpression:
+            left = self.expression(node.left)
+            right = self.expression(node.right)
+            folded = BinaryExpression(left, node.operator, right)
+            if _is_literal(left) and _is_literal(right):
+                return _fold(folded)
+            return folded
+        if kind is UnaryExpression:
+            expression = self.expression(node.expression)
+            folded = UnaryExpression(node.operator, expression)
+            if _is_literal(expression):
+                return _fold(folded)
+            return folded
+        if kind is CallExpression:
+            arguments = [self.expression(argument) for argument in node.arguments]
+            inlined = self.inline(node.callee.name, arguments)
+            if inlined is not None:
+                return inlined
+            return CallExpression(node.callee, arguments)
+        if kind is Fun:
+            return Fun(node.params, self.block(node.body), node.param_types)
+        if kind is ListExpression:
+            return ListExpression([self.expression(element) for element in node.elements])
+        if kind is MapExpression:
+            return MapExpression([self.expression(key) for key in node.keys], [self.expression(value) for value in node.values])
+        return node
+
+    def if_statement(self, node: IfStatement) -> Node | None:
+        test = self.expression(node.test)
+        consequent = self.block(node.consequent)
+        alternate = self.block(node.alternate)
+        if not _is_literal(test):
+            return IfStatement(test, consequent, alternate)
+        block = consequent if test.value else alternate
+        if block.declares():
+            # The branch still needs the scope IfStatement gives it.
+            return IfStatement(BoolLiteral(True), block, Block([]))
+        if not block.body:
+            return None
+        return block
+
+    def block(self, block: Block) -> Block:
+        # A block nested in a block runs in the same runtime and passes on
+        # the same signals, so its statements can take its place.
+        body = list()
+        for statement in block.body:
+            statement = self.statement(statement)
+            if statement is None:
+                continue
+            if type(statement) is Block:
+                body.extend(statement.body)
+            else:
+                body.append(statement)
+        return Block(body)
+
+    def inline(self, name: str, arguments: list[Node]) -> Node | None:
+        """The value of calling function ``name`` as one expression, if it can be.
+
+        The function's body is a single ``return`` of an expression over its
+        parameters, which evaluates nothing else and has no side effects.
+        Arguments are evaluated before the body; substituting them keeps that
+        order as long as they have no side effects either. Literals and names
+        can be copied any number of times. An argument with operators must be
+        used exactly once so it is neither repeated nor skipped.
+        """
+        fun = self.functions.get(name)
+        if fun is None or len(arguments) != len(fun.params):
+            return None
+        expression = fun.body.body[0].value
+        uses = Counter(node.name for node in walk(expression) if type(node) is Identifier)
+        values = dict[str, Node]()
+        for param, argument in zip(fun.params, arguments):
+            if type(argument) is not Identifier and not _is_literal(argument):
+                if uses[param.name] != 1 or not _is_pure(argument):
+                    return None
+            values[param.name] = argument
+        return self.expression(_substitute(expression, values))
+
+
+def _inline_candidates(program: Program) -> dict[str, VariableDeclaration]:
+    """Top-level ``let`` functions whose calls can be replaced by their body.
+
+    Every call to the name after the declaration must reach this function:
+    the name is declared nowhere else, not even as a parameter, and never
+    assigned. The body has to fit ``Optimizer.inline`` and ``inline_budget``.
+    """
+    declared = Counter()
+    assigned = set()
+    for node in walk(program):
+        kind = type(node)
+        if kind is VariableDeclaration:
+            declared[node.id.name] += 1
+        elif kind is Fun:
+            declared.update(param.name for param in node.params)
+        elif kind is Assignment:
+            assigned.add(node.id.name)
+    candidates = dict()
+    for statement in program.body:
+        if type(statement) is not VariableDeclaration or type(statement.value) is not Fun:
+            continue
+        name = statement.id.name
+        if declared[name] == 1 and name not in assigned and _inlinable(statement.value):
+            candidates[name] = statement
+    return candidates
+
+
+def _inlinable(fun: Fun) -> bool:
+    params = [param.name for param in fun.params]
+    if len(set(params)) != len(params):
+        # FunEnv fails on the duplicate parameter at every call.
+        return False
+    body = fun.body.body
+    if len(body) != 1 or type(body[0]) is not ReturnStatement:
+        return False
+    nodes = list(walk(body[0].value))
+    if len(nodes) > inline_budget:
+        return False
+    for node in nodes:
+        kind = type(node)
+        if kind is Identifier:
+            if node.name not in params:
+                # A free name could mean something else at the call site.
+                return False
+        elif kind not in literals and kind is not BinaryExpression and kind is not UnaryExpression:
+            return False
+    return True
+
+
+def _is_literal(node: Node) -> bool:
+    return type(node) in literals
+
+
+def _is_pure(node: Node) -> bool:
+    """Whether evaluating ``node`` calls nothing, so it has no side effects."""
+    return all(type(item) in literals or type(item) in (Identifier, BinaryExpression, UnaryExpression) for item in walk(node))
+
+
+def _fold(node: Node) -> Node:
+    """``node`` replaced by the literal it evaluates to, when that is safe."""
+    try:
+        # Literals ignore the runtime, so nothing else is looked up.
+        value = node.eval(None)
+    except Exception:
+        return node
+    literal = literal_types.get(type(value))
+    if literal is None or type(value) is str and len(value) > max_string_length:
+        return node
+    return literal(value)
+
+
+def _substitute(node: Node, values: dict[str, Node]) -> Node:
+    kind = type(node)
+    if kind is Identifier:
+        return values[node.name]
+    if kind is BinaryExpression:
+        return BinaryExpression(_substitute(node.left, values), node.operator, _substitute(node.right, values))
+    if kind is UnaryExpression:
+        return UnaryExpression(node.operator, _substitute(node.expression, values))
+    return node
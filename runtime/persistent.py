@@ -0,0 +1,404 @@
+from typing import Callable, Iterable
+
+# Persistent collections: an update returns a new collection sharing all but
+# the changed path with the old one, which stays as it was. Both are tries of
+# 32-way nodes, so an update copies O(log32 n) nodes of at most 32 slots
+# instead of the whole collection.
+
+BITS = 5
+WIDTH = 1 << BITS
+MASK = WIDTH - 1
+
+
+class PersistentVector:
+    """Immutable list: a bit-partitioned trie of tuples with a separate tail.
+
+    The last up to 32 elements live in ``tail``, so appending copies at most
+    that, and one in 32 appends pushes a full tail into the trie. Indexes
+    pick a child with 5 bits each, from the ``shift``-th bit down.
+    """
+    __slots__ = ("count", "shift", "root", "tail", "_hash")
+
+    def __init__(self, count: int = 0, shift: int = BITS, root: tuple = (), tail: tuple = ()):
+        self.count = count
+        self.shift = shift
+        self.root = root
+        self.tail = tail
+        self._hash = None
+
+    @classmethod
+    def from_iterable(cls, values: Iterable) -> "PersistentVector":
+        values = tuple(values)
+        vector = EMPTY_VECTOR
+        # Whole leaves go into the trie at once; the rest becomes the tail.
+        full = len(values) - (len(values) % WIDTH or WIDTH) if values else 0
+        for start in range(0, full, WIDTH):
+            vector = PersistentVector(start, vector.shift, vector.root)._push_leaf(values[start:start + WIDTH])
+        return PersistentVector(len(values), vector.shift, vector.root, values[full:])
+
+    def _tail_offset(self) -> int:
+        return self.count - len(self.tail)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int):
+        count = self.count
+        if index < 0:
+            index += count
+        if index < 0 or index >= count:
+            raise IndexError("vector index out of range")
+        offset = count - len(self.tail)
+        if index >= offset:
+            return self.tail[index - offset]
+        node = self.root
+        level = self.shift
+        while level > 0:
+            node = node[(index >> level) & MASK]
+            level -= BITS
+        return node[index & MASK]
+
+    def __iter__(self):
+        offset = self._tail_offset()
+        for start in range(0, offset, WIDTH):
+            node = self.root
+            level = self.shift
+            while level > 0:
+                node = node[(start >> level) & MASK]
+                level -= BITS
+            yield from node
+        yield from self.tail
+
+    def append(self, value) -> "PersistentVector":
+        tail = self.tail
+        if len(tail) < WIDTH:
+            return PersistentVector(self.count + 1, self.shift, self.root, tail + (value,))
+        vector = self._push_leaf(tail)
+        return PersistentVector(self.count + 1, vector.shift, vector.root, (value,))
+
+    def _push_leaf(self, leaf: tuple) -> "PersistentVector":
+        """Vector with the full ``leaf`` added to the trie, ignoring the tail."""
+        # The index of the leaf's first element; the trie is full when it
+        # no longer fits under the root.
+        index = self._tail_offset()
+        shift = self.shift
+        if index >> BITS >= 1 << shift:
+            root = (self.root, _path(shift, leaf))
+            return PersistentVector(self.count, shift + BITS, root, self.tail)
+        return PersistentVector(self.count, shift, _push(self.root, shift, index, leaf), self.tail)
+
+    def set(self, index: int, value) -> "PersistentVector":
+        count = self.count
+        if index < 0:
+            index += count
+        if index == count:
+            return self.append(value)
+        if index < 0 or index > count:
+            raise IndexError("vector index out of range")
+        offset = count - len(self.tail)
+        if index >= offset:
+            tail = list(self.tail)
+            tail[index - offset] = value
+            return PersistentVector(count, self.shift, self.root, tuple(tail))
+        return PersistentVector(count, self.shift, _assoc(self.root, self.shift, index, value), self.tail)
+
+    def __add__(self, other):
+        if type(other) is not PersistentVector:
+            return NotImplemented
+        vector = self
+        for value in other:
+            vector = vector.append(value)
+        return vector
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not PersistentVector:
+            return NotImplemented
+        return self.count == other.count and all(left == right for left, right in zip(self, other))
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            self._hash = hash(tuple(self))
+        return self._hash
+
+    def __repr__(self) -> str:
+        return f"[{', '.join(map(repr, self))}]"
+
+
+def _path(shift: int, leaf: tuple) -> tuple:
+    """Nodes down to ``leaf`` for a new branch ``shift`` bits above it."""
+    node = leaf
+    while shift > 0:
+        node = (node,)
+        shift -= BITS
+    return node
+
+
+def _push(node: tuple, shift: int, index: int, leaf: tuple) -> tuple:
+    slot = (index >> shift) & MASK
+    if shift == BITS:
+        child = leaf
+    elif slot < len(node):
+        child = _push(node[slot], shift - BITS, index, leaf)
+    else:
+        child = _path(shift - BITS, leaf)
+    return node[:slot] + (child,) + node[slot + 1:]
+
+
+def _assoc(node: tuple, shift: int, index: int, value) -> tuple:
+    slot = (index >> shift) & MASK
+    child = value if shift == 0 else _assoc(node[slot], shift - BITS, index, value)
+    return node[:slot] + (child,) + node[slot + 1:]
+
+
+EMPTY_VECTOR = PersistentVector()
+
+
+# Hash bits a map uses. Keys whose hashes agree on all of them share a
+# collision node at the bottom of the trie.
+HASH_BITS = 64
+_HASH_MASK = (1 << HASH_BITS) - 1
+
+
+class _Node:
+    """Node of a hash array mapped trie.
+
+    ``slots`` holds one slot per bit set in ``bitmap``, in bit order: a
+    ``(key, value, hash)`` tuple or a child node.
+    """
+    __slots__ = ("bitmap", "slots")
+
+    def __init__(self, bitmap: int, slots: tuple):
+        self.bitmap = bitmap
+        self.slots = slots
+
+
+class _Collisions:
+    """Entries whose keys have the same hash."""
+    __slots__ = ("hash", "entries")
+
+    def __init__(self, hash: int, entries: tuple):
+        self.hash = hash
+        self.entries = entries
+
+
+class PersistentMap:
+    """Immutable map: a hash array mapped trie.
+
+    Each level of the trie picks a slot with 5 bits of the key's hash, and
+    stores only the slots in use, found by counting the bits below in the
+    node's bitmap. Keys are equal as in a dict, and iterated in the order
+    of their hashes.
+    """
+    __slots__ = ("count", "root", "_hash")
+
+    def __init__(self, count: int = 0, root: _Node = None):
+        self.count = count
+        self.root = root if root is not None else _Node(0, ())
+        self._hash = None
+
+    @classmethod
+    def from_items(cls, items: Iterable[tuple]) -> "PersistentMap":
+        result = EMPTY_MAP
+        for key, value in items:
+            result = result.set(key, value)
+        return result
+
+    def __len__(self) -> int:
+        return self.count
+
+    def get(self, key, default=None):
+        code = hash(key) & _HASH_MASK
+        node = self.root
+        shift = 0
+        while True:
+            if type(node) is _Collisions:
+                for entry in node.entries:
+                    if entry[0] == key:
+                        return entry[1]
+                return default
+            bit = 1 << ((code >> shift) & MASK)
+            if not node.bitmap & bit:
+                return default
+            slot = node.slots[(node.bitmap & (bit - 1)).bit_count()]
+            if type(slot) is tuple:
+                return slot[1] if slot[2] == code and slot[0] == key else default
+            node = slot
+            shift += BITS
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _ABSENT) is not _ABSENT
+
+    def __getitem__(self, key):
+        value = self.get(key, _ABSENT)
+        if value is _ABSENT:
+            raise KeyError(key)
+        return value
+
+    def set(self, key, value) -> "PersistentMap":
+        root, added = _set(self.root, 0, hash(key) & _HASH_MASK, key, value)
+        if root is self.root:
+            return self
+        return PersistentMap(self.count + added, root)
+
+    def remove(self, key) -> "PersistentMap":
+        root = _remove(self.root, 0, hash(key) & _HASH_MASK, key)
+        if root is self.root:
+            return self
+        return PersistentMap(self.count - 1, root)
+
+    def items(self):
+        yield from _items(self.root)
+
+    def __iter__(self):
+        for key, _ in self.items():
+            yield key
+
+    def values(self):
+        for _, value in self.items():
+            yield value
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not PersistentMap:
+            return NotImplemented
+        if self.count != other.count:
+            return False
+        for key, value in self.items():
+            found = other.get(key, _ABSENT)
+            if found is _ABSENT or found != value:
+                return False
+        return True
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            self._hash = hash(frozenset(self.items()))
+        return self._hash
+
+    def __repr__(self) -> str:
+        if not self.count:
+            return "[:]"
+        return f"[{', '.join(f'{key!r}: {value!r}' for key, value in self.items())}]"
+
+
+_ABSENT = object()
+
+
+def _set(node, shift: int, code: int, key, value):
+    """``node`` with ``key`` set, and whether the key is new."""
+    if type(node) is _Collisions:
+        entries = node.entries
+        for index, entry in enumerate(entries):
+            if entry[0] == key:
+                if entry[1] is value:
+                    return node, False
+                return _Collisions(code, entries[:index] + ((key, value, code),) + entries[index + 1:]), False
+        return _Collisions(code, entries + ((key, value, code),)), True
+    bit = 1 << ((code >> shift) & MASK)
+    index = (node.bitmap & (bit - 1)).bit_count()
+    slots = node.slots
+    if not node.bitmap & bit:
+        return _Node(node.bitmap | bit, slots[:index] + ((key, value, code),) + slots[index:]), True
+    slot = slots[index]
+    if type(slot) is tuple:
+        if slot[2] == code and slot[0] == key:
+            if slot[1] is value:
+                return node, False
+            child, added = (key, value, code), False
+        else:
+            child, added = _split(slot, shift + BITS, (key, value, code)), True
+    else:
+        child, added = _set(slot, shift + BITS, code, key, value)
+        if child is slot:
+            return node, False
+    return _Node(node.bitmap, slots[:index] + (child,) + slots[index + 1:]), added
+
+
+def _split(entry: tuple, shift: int, new: tuple):
+    """Node holding two entries with different keys, ``shift`` bits down."""
+    if shift >= HASH_BITS or entry[2] == new[2]:
+        return _Collisions(entry[2], (entry, new))
+    old_slot = (entry[2] >> shift) & MASK
+    new_slot = (new[2] >> shift) & MASK
+    if old_slot == new_slot:
+        return _Node(1 << old_slot, (_split(entry, shift + BITS, new),))
+    slots = (entry, new) if old_slot < new_slot else (new, entry)
+    return _Node((1 << old_slot) | (1 << new_slot), slots)
+
+
+def _remove(node, shift: int, code: int, key):
+    """``node`` without ``key``: itself if the key is absent, an entry tuple
+    if only one is left below the root, or None if nothing is."""
+    if type(node) is _Collisions:
+        entries = tuple(entry for entry in node.entries if entry[0] != key)
+        if len(entries) == len(node.entries):
+            return node
+        return entries[0] if len(entries) == 1 else _Collisions(node.hash, entries)
+    bit = 1 << ((code >> shift) & MASK)
+    if not node.bitmap & bit:
+        return node
+    index = (node.bitmap & (bit - 1)).bit_count()
+    slots = node.slots
+    slot = slots[index]
+    if type(slot) is tuple:
+        if slot[2] != code or slot[0] != key:
+            return node
+        child = None
+    else:
+        child = _remove(slot, shift + BITS, code, key)
+        if child is slot:
+            return node
+    if child is None:
+        slots = slots[:index] + slots[index + 1:]
+        bitmap = node.bitmap & ~bit
+        if shift and len(slots) == 1 and type(slots[0]) is tuple:
+            # Pulled up into the parent.
+            return slots[0]
+        if shift and not slots:
+            return None
+        return _Node(bitmap, slots)
+    if shift and len(slots) == 1 and type(child) is tuple:
+        return child
+    return _Node(node.bitmap, slots[:index] + (child,) + slots[index + 1:])
+
+
+def _items(node):
+    if type(node) is _Collisions:
+        for entry in node.entries:
+            yield entry[0], entry[1]
+        return
+    for slot in node.slots:
+        if type(slot) is tuple:
+            yield slot[0], slot[1]
+        else:
+            yield from _items(slot)
+
+
+EMPTY_MAP = PersistentMap()
+
+
+def collection_functions() -> dict[str, Callable]:
+    """Host functions reading and updating lists and maps, to add to ``exteral_fun``.
+
+    Updates return a new collection and leave theirs as it was. ``get`` of
+    a missing map key is None, of a missing list index an error.
+    """
+    # ast builds these collections for the literals, so it comes in last.
+    from runtime.ast import returning
+
+    functions = {
+        "get": lambda collection, key: collection[key] if type(collection) is PersistentVector else collection.get(key),
+        "set": lambda collection, key, value: collection.set(key, value),
+        "push": lambda vector, value: vector.append(value),
+        "remove": lambda map, key: map.remove(key),
+        "has": lambda collection, key: _has(collection, key),
+        # Streams have no length, as streams' count knows.
+        "count": lambda collection: len(collection) if hasattr(type(collection), "__len__") else sum(1 for _ in collection),
+        "keys": lambda map: PersistentVector.from_iterable(map),
+        "values": lambda map: PersistentVector.from_iterable(map.values()),
+    }
+    return {name: returning(function) for name, function in functions.items()}
+
+
+def _has(collection, key) -> bool:
+    if type(collection) is PersistentVector:
+        return type(key) is int and -len(collection) <= key < len(collection)
+    return key in collection
@@ -3,10 +3,14 @@ from ast import Expression
 from attr import dataclass
 
 class Runtime():
-    
+
     def __init__(self, context=None, parent=None, exteral_fun=None, name=None) -> None:
         self.name = name
         self.parent = parent
+        # Version of every name whose resolution some node caches, bumped
+        # when the name is declared anywhere under the same root runtime, as
+        # that may shadow the cached binding. Shared by the whole tree.
+        self.versions = parent.versions if parent is not None else dict()
         self.context = context if context is not None else dict()
         self.exteral_fun = exteral_fun if exteral_fun is not None else dict()
 
@@ -29,6 +33,9 @@ class Runtime():
     def declare(self, identifier: str, value):
         if self.has_value(identifier):
             raise Exception(f"Variable {identifier} is already declared")
+        versions = self.versions
+        if identifier in versions:
+            versions[identifier] += 1
         self.set_value(identifier, value)
     
     def assign(self, identifier: str, value):
@@ -42,3 +49,31 @@ class Runtime():
     def show_values(self):
         print(self.context)
 
+
+
+class Undeclared():
+
+    def __repr__(self) -> str:
+        return "UNDECLARED"
+
+# Marks a frame slot whose variable has not been declared yet.
+UNDECLARED = Undeclared()
+
+class Frame():
+    """Scope of the closure engine: variables live in slots fixed at compile time.
+
+    Only the program frame has a ``runtime``; names the compiler cannot bind to
+    a slot are looked up there, like the tree engine does.
+    """
+    __slots__ = ("slots", "parent", "runtime")
+
+    def __init__(self, slots: list, parent: "Frame" = None, runtime: Runtime = None) -> None:
+        self.slots = slots
+        self.parent = parent
+        self.runtime = runtime
+
+    def root(self) -> "Frame":
+        frame = self
+        while frame.parent is not None:
+            frame = frame.parent
+        return frame
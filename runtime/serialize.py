@@ -0,0 +1,313 @@
+import gc
+import mmap
+import os
+import struct
+
+from runtime.ast import Assignment, BinaryExpression, Block, BoolLiteral, BreakStatement, CallExpression, EmptyStatement, FloatLiteral, Fun, Identifier, IfStatement, IntLiteral, ListExpression, MapExpression, Node, Program, ReturnStatement, StringLiteral, UnaryExpression, VariableDeclaration, WhileStatement
+
+MAGIC = b"DCA"
+# 2 added the LIST and MAP tags, which a version 1 reader does not know.
+VERSION = 2
+
+# Node tags. Nodes are written in post-order, children before their parent,
+# so a reader rebuilds the tree with one value stack and no recursion.
+PROGRAM = 1
+BLOCK = 2
+STRING = 3
+INT = 4
+FLOAT = 5
+TRUE = 6
+FALSE = 7
+IDENTIFIER = 8
+UNARY = 9
+BINARY = 10
+CALL = 11
+FUN = 12
+WHILE = 13
+IF = 14
+RETURN = 15
+BREAK = 16
+EMPTY = 17
+DECLARATION = 18
+ASSIGNMENT = 19
+# A Fun with annotated parameters, followed by the type of each.
+TYPED_FUN = 20
+# Collection literals, followed by their number of elements or entries.
+LIST = 21
+MAP = 22
+
+_float = struct.Struct("<d")
+
+
+class Writer:
+    """Encodes nodes into a tag stream and collects the string table."""
+
+    def __init__(self):
+        self.out = bytearray()
+        self.strings = dict[str, int]()
+
+    def varint(self, value: int):
+        out = self.out
+        while value >= 0x80:
+            out.append((value & 0x7f) | 0x80)
+            value >>= 7
+        out.append(value)
+
+    def string(self, value: str):
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        self.varint(index)
+
+    def node(self, root: Node):
+        stack = [(root, False)]
+        while stack:
+            node, done = stack.pop()
+            if done:
+                self.tag(node)
+                continue
+            stack.append((node, True))
+            children = _children(node)
+            for child in reversed(children):
+                stack.append((child, False))
+
+    def tag(self, node: Node):
+        out = self.out
+        kind = type(node)
+        if kind is Identifier:
+            out.append(IDENTIFIER)
+            self.string(node.name)
+        elif kind is BinaryExpression:
+            out.append(BINARY)
+            self.string(node.operator)
+        elif kind is IntLiteral:
+            out.append(INT)
+            value = node.value
+            self.varint(value << 1 if value >= 0 else (-value << 1) - 1)
+        elif kind is FloatLiteral:
+            out.append(FLOAT)
+            out += _float.pack(node.value)
+        elif kind is StringLiteral:
+            out.append(STRING)
+            self.string(node.value)
+        elif kind is BoolLiteral:
+            out.append(TRUE if node.value else FALSE)
+        elif kind is UnaryExpression:
+            out.append(UNARY)
+            self.string(node.operator)
+        elif kind is CallExpression:
+            out.append(CALL)
+            self.varint(len(node.arguments))
+        elif kind is Program or kind is Block:
+            out.append(PROGRAM if kind is Program else BLOCK)
+            self.varint(len(node.body))
+        elif kind is Fun:
+            out.append(TYPED_FUN if node.param_types else FUN)
+            self.varint(len(node.params))
+            for value_type in node.param_types:
+                self.string(value_type)
+        elif kind is ListExpression:
+            out.append(LIST)
+            self.varint(len(node.elements))
+        elif kind is MapExpression:
+            out.append(MAP)
+            self.varint(len(node.keys))
+        elif kind is VariableDeclaration:
+            out.append(DECLARATION)
+            self.string(node.value_type)
+        elif kind is Assignment:
+            out.append(ASSIGNMENT)
+        elif kind is ReturnStatement:
+            out.append(RETURN)
+        elif kind is IfStatement:
+            out.append(IF)
+        elif kind is WhileStatement:
+            out.append(WHILE)
+        elif kind is BreakStatement:
+            out.append(BREAK)
+        elif kind is EmptyStatement:
+            out.append(EMPTY)
+        else:
+            raise Exception(f"Cannot serialize {kind.__name__}")
+
+    def getvalue(self) -> bytes:
+        head = Writer()
+        head.out += MAGIC
+        head.out.append(VERSION)
+        head.varint(len(self.strings))
+        for value in self.strings:
+            encoded = value.encode("utf-8")
+            head.varint(len(encoded))
+            head.out += encoded
+        head.varint(len(self.out))
+        return bytes(head.out + self.out)
+
+
+def _children(node: Node) -> list:
+    kind = type(node)
+    if kind is BinaryExpression:
+        return [node.left, node.right]
+    if kind is UnaryExpression:
+        return [node.expression]
+    if kind is CallExpression:
+        return [node.callee, *node.arguments]
+    if kind is Program or kind is Block:
+        return node.body
+    if kind is Fun:
+        return [*node.params, node.body]
+    if kind is VariableDeclaration or kind is Assignment:
+        return [node.id, node.value]
+    if kind is ReturnStatement:
+        return [node.value]
+    if kind is ListExpression:
+        return node.elements
+    if kind is MapExpression:
+        return [item for entry in zip(node.keys, node.values) for item in entry]
+    if kind is IfStatement:
+        return [node.test, node.consequent, node.alternate]
+    if kind is WhileStatement:
+        return [node.test, node.body]
+    return []
+
+
+def dumps(node: Node) -> bytes:
+    """Serialize ``node`` and everything below it."""
+    writer = Writer()
+    writer.node(node)
+    return writer.getvalue()
+
+
+def dump(node: Node, path: str | os.PathLike):
+    with open(path, "wb") as file:
+        file.write(dumps(node))
+
+
+def loads(buffer) -> Node:
+    """Rebuild a node from ``dumps`` output held in any bytes-like buffer.
+
+    The buffer is read in place, so an ``mmap`` is never copied as a whole.
+    The cyclic collector is paused while loading: the new nodes cannot form
+    cycles, and scanning them as they are allocated triples the load time.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with memoryview(buffer) as data:
+            return _loads(data)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _loads(data: memoryview) -> Node:
+    if bytes(data[:3]) != MAGIC:
+        raise Exception("Not a serialized AST")
+    if data[3] != VERSION:
+        raise Exception(f"Unsupported AST format version {data[3]}")
+    cursor = 4
+
+    def varint() -> int:
+        nonlocal cursor
+        byte = data[cursor]
+        cursor += 1
+        if byte < 0x80:
+            return byte
+        value = byte & 0x7f
+        shift = 7
+        while True:
+            byte = data[cursor]
+            cursor += 1
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    strings = list[str]()
+    for _ in range(varint()):
+        size = varint()
+        strings.append(str(data[cursor:cursor + size], "utf-8"))
+        cursor += size
+    end = varint() + cursor
+    if end > len(data):
+        raise Exception("Truncated AST")
+
+    stack = list()
+    push = stack.append
+    pop = stack.pop
+    while cursor < end:
+        tag = data[cursor]
+        cursor += 1
+        if tag == IDENTIFIER:
+            push(Identifier(strings[varint()]))
+        elif tag == BINARY:
+            right = pop()
+            stack[-1] = BinaryExpression(stack[-1], strings[varint()], right)
+        elif tag == INT:
+            value = varint()
+            push(IntLiteral(-((value + 1) >> 1) if value & 1 else value >> 1))
+        elif tag == FLOAT:
+            push(FloatLiteral(_float.unpack_from(data, cursor)[0]))
+            cursor += 8
+        elif tag == STRING:
+            push(StringLiteral(strings[varint()]))
+        elif tag == TRUE or tag == FALSE:
+            push(BoolLiteral(tag == TRUE))
+        elif tag == UNARY:
+            stack[-1] = UnaryExpression(strings[varint()], stack[-1])
+        elif tag == CALL:
+            count = varint()
+            arguments = stack[len(stack) - count:]
+            del stack[len(stack) - count:]
+            stack[-1] = CallExpression(stack[-1], arguments)
+        elif tag == PROGRAM or tag == BLOCK:
+            count = varint()
+            body = stack[len(stack) - count:]
+            del stack[len(stack) - count:]
+            push(Program(body) if tag == PROGRAM else Block(body))
+        elif tag == FUN or tag == TYPED_FUN:
+            body = pop()
+            count = varint()
+            params = stack[len(stack) - count:]
+            del stack[len(stack) - count:]
+            types = tuple(strings[varint()] for _ in range(count)) if tag == TYPED_FUN else ()
+            push(Fun(params, body, types))
+        elif tag == LIST:
+            count = varint()
+            elements = stack[len(stack) - count:]
+            del stack[len(stack) - count:]
+            push(ListExpression(elements))
+        elif tag == MAP:
+            count = varint()
+            items = stack[len(stack) - 2 * count:]
+            del stack[len(stack) - 2 * count:]
+            push(MapExpression(items[::2], items[1::2]))
+        elif tag == DECLARATION:
+            value = pop()
+            stack[-1] = VariableDeclaration(stack[-1], value, strings[varint()])
+        elif tag == ASSIGNMENT:
+            value = pop()
+            stack[-1] = Assignment(stack[-1], value)
+        elif tag == RETURN:
+            stack[-1] = ReturnStatement(stack[-1])
+        elif tag == IF:
+            alternate = pop()
+            consequent = pop()
+            stack[-1] = IfStatement(stack[-1], consequent, alternate)
+        elif tag == WHILE:
+            body = pop()
+            stack[-1] = WhileStatement(stack[-1], body)
+        elif tag == BREAK:
+            push(BreakStatement())
+        elif tag == EMPTY:
+            push(EmptyStatement())
+        else:
+            raise Exception(f"Unknown AST tag {tag}")
+    if len(stack) != 1:
+        raise Exception("Malformed AST")
+    return stack[0]
+
+
+def load(path: str | os.PathLike) -> Node:
+    with open(path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return loads(mapped)
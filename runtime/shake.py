@@ -0,0 +1,43 @@
+from collections import Counter
+
+from runtime.ast import BoolLiteral, EmptyStatement, FloatLiteral, Fun, Identifier, IntLiteral, Node, Program, StringLiteral, VariableDeclaration, walk
+
+# Values whose evaluation cannot fail or do anything but produce the value.
+bindings = frozenset((Fun, Identifier, IntLiteral, FloatLiteral, StringLiteral, BoolLiteral, EmptyStatement))
+
+
+def shake(program: Program, *entries: str) -> Program:
+    """Program with only the top-level declarations ``entries`` can reach.
+
+    A top-level ``let`` of a function, literal or name does nothing but bind
+    the name, so it is dropped unless the name is one of ``entries`` or used
+    by something kept: a kept declaration, or any other top-level statement,
+    which runs for its effects and is always kept. Names are followed through
+    function bodies without regard to shadowing, so more may be kept than is
+    needed but never less. A name declared twice stays, since its second
+    ``let`` fails at run time. Kept statements stay in their order.
+    """
+    declared = Counter(statement.id.name for statement in program.body if type(statement) is VariableDeclaration)
+    droppable = dict[str, int]()
+    kept = set[int]()
+    names = list(entries)
+    for index, statement in enumerate(program.body):
+        if _binds(statement) and declared[statement.id.name] == 1:
+            droppable[statement.id.name] = index
+        else:
+            kept.add(index)
+            names.extend(_uses(statement))
+    while names:
+        index = droppable.pop(names.pop(), None)
+        if index is not None:
+            kept.add(index)
+            names.extend(_uses(program.body[index].value))
+    return Program([statement for index, statement in enumerate(program.body) if index in kept])
+
+
+def _binds(statement: Node) -> bool:
+    return type(statement) is VariableDeclaration and type(statement.value) in bindings
+
+
+def _uses(node: Node) -> set[str]:
+    return {item.name for item in walk(node) if type(item) is Identifier}
@@ -0,0 +1,136 @@
+from itertools import islice
+from types import FunctionType
+from typing import Callable, Iterable
+
+from runtime.ast import returning
+from runtime.persistent import PersistentVector
+from runtime.transpiler import TranspiledFun
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Streams are the lazy sequences of ``.`` chains such as
+# ``range(0, 1000000).map(square).filter(even).take(10).sum()``. map, filter,
+# take and drop only describe a stage; a consumer such as sum or collect
+# runs them all as one chain of iterators that pulls an element at a time
+# from the source through every stage. No stage builds a collection, so
+# memory does not grow with the source, and functions are only called on
+# the elements a later stage asks for: once take has its elements, nothing
+# more is read.
+
+
+class Stream:
+    """A source and the stages applied to its elements, in order.
+
+    Like the collections, streams never change: adding a stage returns a new
+    stream, and each consumer runs the stages again from the start of the
+    source. Consecutive maps, or filters, fuse into one stage calling each
+    function in turn, which saves an iterator per element and stage.
+    """
+    __slots__ = ("source", "stages")
+
+    def __init__(self, source: Iterable, stages: tuple = ()):
+        self.source = source
+        # (kind, argument) pairs: ("map", function), ("filter", predicate),
+        # ("take", count) or ("drop", count).
+        self.stages = stages
+
+    def then(self, kind: str, argument) -> "Stream":
+        stages = self.stages
+        if stages and stages[-1][0] == kind:
+            previous = stages[-1][1]
+            if kind == "map":
+                return Stream(self.source, stages[:-1] + ((kind, _compose(previous, argument)),))
+            if kind == "filter":
+                return Stream(self.source, stages[:-1] + ((kind, _both(previous, argument)),))
+        return Stream(self.source, stages + ((kind, argument),))
+
+    def __iter__(self):
+        iterator = iter(self.source)
+        for kind, argument in self.stages:
+            if kind == "map":
+                iterator = map(argument, iterator)
+            elif kind == "filter":
+                iterator = filter(argument, iterator)
+            elif kind == "take":
+                iterator = islice(iterator, argument)
+            else:
+                iterator = islice(iterator, argument, None)
+        return iterator
+
+    def __repr__(self) -> str:
+        return f"Stream({self.source!r}{''.join(f'.{kind}()' for kind, _ in self.stages)})"
+
+
+def _compose(first: Callable, second: Callable) -> Callable:
+    return lambda value: second(first(value))
+
+
+def _both(first: Callable, second: Callable) -> Callable:
+    return lambda value: first(value) and second(value)
+
+
+def _caller(fun) -> Callable:
+    """Python function calling ``fun``, any engine's function value, for its value."""
+    if type(fun) is FunctionType:
+        # A function of the Python backend, as it passes them to the host.
+        fun = TranspiledFun(fun)
+    exec = fun.exec
+
+    def call(*args):
+        result = exec(list(args))
+        return None if result is None else result.value
+    return call
+
+
+def _stream(source) -> Stream:
+    return source if type(source) is Stream else Stream(source)
+
+
+def _sum(source):
+    if numpy is not None and type(source) is numpy.ndarray:
+        # One NumPy call, as vectors' sum, rather than a loop over its scalars.
+        return numpy.sum(source).item()
+    return sum(source)
+
+
+def _count(source) -> int:
+    if hasattr(type(source), "__len__"):
+        return len(source)
+    return sum(1 for _ in source)
+
+
+def _reduce(source, fun, initial):
+    call = _caller(fun)
+    result = initial
+    for value in source:
+        result = call(result, value)
+    return result
+
+
+def stream_functions() -> dict[str, Callable]:
+    """Host functions making, chaining and consuming streams, to add to ``exteral_fun``.
+
+    map, filter, take and drop take a stream, a list, a map, whose keys
+    they go through, or a range. A function passed to map, filter or reduce
+    can be any Dotchain function. sum and count are also vectors' and
+    collections' functions and take their values too, so the sets can be
+    added together in any order.
+    """
+    functions = {
+        # Sources and stages
+        "range": lambda start, stop, step=1: Stream(range(start, stop, step)),
+        "map": lambda source, fun: _stream(source).then("map", _caller(fun)),
+        "filter": lambda source, fun: _stream(source).then("filter", _caller(fun)),
+        "take": lambda source, count: _stream(source).then("take", count),
+        "drop": lambda source, count: _stream(source).then("drop", count),
+        # Consumers
+        "collect": lambda source: PersistentVector.from_iterable(source),
+        "reduce": _reduce,
+        "sum": _sum,
+        "count": _count,
+        "first": lambda source: next(iter(source), None),
+    }
+    return {name: returning(function) for name, function in functions.items()}
@@ -0,0 +1,30 @@
+from runtime.ast import Program, ReturnValue
+from runtime.engines import run
+from runtime.interpreter import program_parser
+from runtime.runtime import Runtime
+from runtime.tokenizer import Tokenizer
+
+# Helpers shared by the tests. Scripts print through a host ``print`` that
+# records the arguments of each call, so engines can be compared by output.
+
+def parse(script: str) -> Program:
+    t = Tokenizer()
+    t.init(script)
+    return program_parser(t)
+
+def printing_runtime(functions: dict = None) -> tuple[Runtime, list]:
+    """Runtime with ``functions`` and a ``print`` appending its arguments to the returned list."""
+    output = []
+    runtime = Runtime(exteral_fun={**(functions or {}), "print": lambda *args: output.append(args)})
+    return runtime, output
+
+def execute(source: str | Program, engine: str, functions: dict = None) -> tuple[list, ReturnValue | None]:
+    """What a script, or a parsed program, prints and returns under ``engine``."""
+    runtime, output = printing_runtime(functions)
+    return output, run(parse(source) if type(source) is str else source, runtime, engine)
+
+def run_script(source: str | Program, engine: str, functions: dict = None) -> tuple[list, Runtime]:
+    """What a script, or a parsed program, prints under ``engine``, and the runtime it ran in."""
+    runtime, output = printing_runtime(functions)
+    run(parse(source) if type(source) is str else source, runtime, engine)
+    return output, runtime
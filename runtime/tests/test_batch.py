@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+from runtime.batch import parse_files
+from runtime.tests.support import parse
+
+script = """// 函數宣告
+let add{index} = (left, right) => {{
+  return left + right * {index};
+}}
+add{index}(1, 2.5);
+"""
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.paths = list()
+        self.scripts = list()
+        for index in range(8):
+            path = os.path.join(self.directory.name, f"module{index}.dc")
+            text = script.format(index=index)
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(text)
+            self.paths.append(path)
+            self.scripts.append(text)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_matches_sequential(self):
+        for workers in (1, 3):
+            results = parse_files(self.paths, workers)
+            self.assertEqual([result.path for result in results], self.paths)
+            for result, text in zip(results, self.scripts):
+                self.assertIsNone(result.error)
+                self.assertGreaterEqual(result.seconds, 0)
+                self.assertEqual(result.program.dict(), parse(text).dict())
+
+    def test_errors(self):
+        broken = os.path.join(self.directory.name, "broken.dc")
+        with open(broken, "w", encoding="utf-8") as file:
+            file.write("let = 1;")
+        missing = os.path.join(self.directory.name, "missing.dc")
+        results = parse_files([self.paths[0], broken, missing], 2)
+        self.assertIsNone(results[0].error)
+        self.assertIsNone(results[1].program)
+        self.assertIn("Invalid let statement", str(results[1].error))
+        self.assertIsInstance(results[2].error, FileNotFoundError)
@@ -0,0 +1,86 @@
+import unittest
+from runtime.bytecode import BREAK, CALL_STATEMENT, JUMP, JUMP_IF_FALSE, PUSH_SCOPE, TAIL_CALL, compile_program, disassemble
+from runtime.interpreter import program_parser
+from runtime.runtime import Runtime
+from runtime.tests.support import execute, parse
+from runtime.tests.test_compiler import programs
+from runtime.tokenizer import Tokenizer
+from runtime.vm import run_program
+
+def compile(script: str):
+    return compile_program(parse(script))
+
+def opcodes(code):
+    return list(code.ops[::2])
+
+
+class TestBytecode(unittest.TestCase):
+
+    def test_matches_tree_engine(self):
+        for script in programs:
+            self.assertEqual(execute(script, "bytecode"), execute(script, "tree"))
+
+    def test_control_flow(self):
+        codes = compile("while a < 3 { let b = 1; if b { break; } }")
+        self.assertEqual(len(codes), 1)
+        ops = opcodes(codes[0])
+        self.assertIn(PUSH_SCOPE, ops)
+        self.assertIn(BREAK, ops)
+        self.assertEqual(ops.count(JUMP_IF_FALSE), 2)
+        self.assertEqual(ops.count(JUMP), 1)
+        self.assertEqual(codes[0].ops[-1], 0)
+
+    def test_top_level_break(self):
+        output, result = execute("let a = 0; while true { a = a + 1; if a > 2 { break; } } print(a); return a;", "bytecode")
+        self.assertEqual(output, [(3,)])
+        self.assertEqual(result.value, 3)
+
+    def test_host_and_tree_functions(self):
+        tree = Runtime(exteral_fun={"print": print})
+        t = Tokenizer()
+        t.init("let double = (x) => { return x * 2; }")
+        program_parser(t).exec(tree)
+        output = []
+        runtime = Runtime(parent=tree)
+        tree.exteral_fun["print"] = lambda *args: output.append(args)
+        run_program(compile("print(double(21));"), runtime)
+        self.assertEqual(output, [(42,)])
+
+    def test_constants_and_names(self):
+        codes = compile("let a = 1; a = a + 1 + 1;")
+        self.assertEqual(codes[1].constants, [1])
+        self.assertEqual(codes[1].names, ["a"])
+
+    def test_disassemble(self):
+        codes = compile("let add = (left, right) => { return left + right; }\nadd(1, 2);")
+        listing = disassemble(codes)
+        self.assertIn("MAKE_FUN", listing)
+        self.assertIn("add(left, right):", listing)
+        self.assertIn("BINARY             0  +", listing)
+        self.assertIn("CALL_STATEMENT", listing)
+        self.assertEqual(opcodes(codes[1])[-1], CALL_STATEMENT)
+
+    def test_tail_calls(self):
+        codes = compile("let f = (n) => { if n { return f(n - 1); } else { g(n); } };\nf(3);")
+        function = codes[0].constants[0]
+        self.assertEqual(opcodes(function).count(TAIL_CALL), 2)
+        self.assertEqual(opcodes(codes[1])[-1], CALL_STATEMENT)
+        listing = disassemble(codes)
+        self.assertIn("f/1 return", listing)
+        self.assertIn("g/1", listing)
+
+    def test_deep_recursion(self):
+        script = """
+let sum = (n) => { if n == 0 { return 0; } return n + sum(n - 1); };
+let depth = (n) => {
+    if n == 0 { return 0; }
+    let left = depth(n - 1);
+    if n % 1000 == 0 { print(n); }
+    return left + 1;
+};
+print(sum(20000), depth(3000));
+"""
+        output, _ = execute(script, "bytecode")
+        self.assertEqual(output, [(1000,), (2000,), (3000,), (200010000, 3000)])
+        with self.assertRaises(RecursionError):
+            run_program(compile(script), Runtime(exteral_fun={"print": print}), max_depth=100)
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from runtime import cache
+from runtime.cache import cache_path, load_program
+from runtime.interpreter import program_parser
+from runtime.tests.support import parse
+
+script = """// 函數宣告
+let add = (left, right) => {
+  return left + right * 2.5;
+}
+add(1, add(2, 3));
+"""
+
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "main.dc")
+        self.write(script)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, script: str):
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write(script)
+
+    def test_hit_skips_parser(self):
+        self.assertEqual(load_program(self.path), parse(script))
+        entry = cache_path(self.path)
+        self.assertEqual(entry, os.path.join(self.directory.name, "__dccache__", "main.dcc"))
+        self.assertTrue(os.path.exists(entry))
+        with mock.patch.object(cache, "program_parser", side_effect=AssertionError), \
+                mock.patch.object(cache, "Tokenizer", side_effect=AssertionError):
+            self.assertEqual(load_program(self.path), parse(script))
+
+    def test_stale_source(self):
+        load_program(self.path)
+        self.write(script + "add(4, 5);")
+        self.assertEqual(len(load_program(self.path).body), 3)
+        with mock.patch.object(cache, "program_parser", side_effect=AssertionError):
+            self.assertEqual(len(load_program(self.path).body), 3)
+
+    def test_stale_runtime(self):
+        load_program(self.path)
+        with mock.patch.object(cache, "runtime_version", return_value=b"other"):
+            with mock.patch.object(cache, "program_parser", wraps=program_parser) as parser:
+                load_program(self.path)
+                self.assertEqual(parser.call_count, 1)
+
+    def test_corrupt_entry(self):
+        load_program(self.path)
+        entry = cache_path(self.path)
+        with open(entry, "r+b") as file:
+            file.seek(-8, os.SEEK_END)
+            file.truncate()
+        self.assertEqual(load_program(self.path), parse(script))
+        self.assertEqual(os.listdir(os.path.dirname(entry)), ["main.dcc"])
+
+    def test_cache_dir(self):
+        cache_dir = os.path.join(self.directory.name, "cache")
+        load_program(self.path, cache_dir)
+        entries = os.listdir(cache_dir)
+        self.assertEqual(len(entries), 1)
+        self.assertTrue(entries[0].startswith("main.") and entries[0].endswith(".dcc"))
+        self.assertFalse(os.path.exists(cache_path(self.path)))
+        other = os.path.join(self.directory.name, "other")
+        os.mkdir(other)
+        self.assertNotEqual(cache_path(self.path, cache_dir), cache_path(os.path.join(other, "main.dc"), cache_dir))
@@ -0,0 +1,168 @@
+import unittest
+from runtime.compiler import compile_program
+from runtime.engines import ENGINES, run
+from runtime.interpreter import program_parser
+from runtime.runtime import Runtime
+from runtime.tests.support import execute
+from runtime.tokenizer import Tokenizer
+
+programs = [
+    """
+let rec = (c) => {
+    print(c);
+    if c == 0 {
+        return "c + 1";
+    }
+    rec(c-1);
+}
+print(rec(3));
+""",
+    """
+let fib = (n) => {
+    if n < 2 { return n; }
+    return fib(n - 1) + fib(n - 2);
+}
+print(fib(12));
+""",
+    """
+let a = 0;
+let total = 0;
+while a < 20 {
+    a = a + 1;
+    if a % 3 == 0 { total = total + a; } else { total = total - 1; }
+    if a > 15 { break; }
+}
+print(a, total, -a, !false, 7 / 2, 1 <= 1 && 2 != 3 || false);
+""",
+    """
+let counter = () => {
+    let count = 0;
+    return () => {
+        count = count + 1;
+        return count;
+    };
+}
+let next = counter();
+let first = next();
+print(next(), next());
+let outer = 1;
+let result = 0;
+if outer {
+    let shadow = 2;
+    result = shadow + outer;
+}
+print(result, "done");
+""",
+    """
+let a = 1;
+let f = () => {
+    a = 2;
+    let a = 3;
+    let g = (x) => {
+        let h = () => { return a + x; };
+        return h();
+    };
+    return g(a);
+};
+let b = f();
+print(a, b);
+let shadow = () => {
+    let a = a + 10;
+    return a;
+};
+print(shadow(), a);
+let i = 0;
+let fs = 0;
+while i < 3 {
+    let j = i * 2;
+    fs = () => { return j; };
+    i = i + 1;
+}
+print(fs(), i);
+""",
+    """
+let loop = (n, acc) => {
+    if n == 0 { return acc; }
+    return loop(n - 1, acc + n);
+};
+let down = (n) => {
+    if n > 0 { down(n - 1); } else { return n * 10; }
+};
+let nothing = () => {};
+let wrap = () => { return nothing(); };
+let stop = (n) => { while true { if n > 0 { break; } } };
+let last = (n) => { let m = n + 1; stop(m); };
+last(1);
+let host = (x) => { return print(x); };
+let side = (x) => { print(x); };
+print(loop(100, 0), down(5), wrap(), host("h"), side("s"));
+""",
+]
+
+
+class TestCompiler(unittest.TestCase):
+
+    def test_matches_tree_engine(self):
+        for script in programs:
+            self.assertEqual(execute(script, "closure"), execute(script, "tree"))
+
+    def test_output(self):
+        output, _ = execute(programs[1], "closure")
+        self.assertEqual(output, [(144,)])
+        output, _ = execute(programs[3], "closure")
+        self.assertEqual(output, [(2, 3), (3, "done")])
+
+    def test_return_value(self):
+        t = Tokenizer()
+        t.init("let a = 2; return a * 21; print(a);")
+        result = compile_program(program_parser(t))(Runtime())
+        self.assertEqual(result.value, 42)
+
+    def test_host_runtime(self):
+        t = Tokenizer()
+        t.init("let double = (x) => { return x * scale; }")
+        host = Runtime(exteral_fun={"print": print})
+        program_parser(t).exec(host)
+        for engine in ("tree", "closure"):
+            t.init("let scale = 2; let result = double(21); scale = 3;")
+            runtime = Runtime(context={"scale": 1}, parent=host)
+            with self.assertRaises(Exception):
+                run(program_parser(t), runtime, engine)
+            t.init("let result = double(21); scale = 3; let local = (x) => { return x; };")
+            runtime = Runtime(parent=host)
+            host.context["scale"] = 2
+            run(program_parser(t), runtime, engine)
+            self.assertEqual(runtime.context["result"], 42)
+            self.assertEqual(host.context["scale"], 3)
+            self.assertEqual(runtime.context["local"].exec([5]).value, 5)
+
+    def test_tail_calls(self):
+        script = """
+let loop = (n, acc) => {
+    if n == 0 { return acc; }
+    return loop(n - 1, acc + n);
+};
+let even = (n) => { if n == 0 { return true; } return odd(n - 1); };
+let odd = (n) => { if n == 0 { return false; } return even(n - 1); };
+let count = (n) => {
+    if n > 0 { count(n - 1); } else { return n; }
+};
+print(loop(20000, 0), even(20001), count(20000));
+"""
+        for engine in ENGINES:
+            self.assertEqual(execute(script, engine), ([(200010000, False, 0)], None))
+
+    def test_errors(self):
+        with self.assertRaises(Exception):
+            execute("let a = 1; let a = 2;", "closure")
+        with self.assertRaises(Exception):
+            execute("b = 1;", "closure")
+        with self.assertRaises(Exception):
+            execute("let f = () => { b = 1; let b = 2; }; f();", "closure")
+        with self.assertRaises(Exception):
+            execute("let f = () => { let b = 1; let b = 2; }; f();", "closure")
+        with self.assertRaises(Exception):
+            execute("", "native")
+        self.assertEqual(execute("let f = (a, a) => {};", "closure"), ([], None))
+        with self.assertRaises(Exception):
+            execute("let f = (a, a) => {}; f(1, 2);", "closure")
@@ -1,6 +1,6 @@
 
 import unittest
-from runtime.ast import BoolLiteral, CallExpression, FloatLiteral, Identifier, IntLiteral, UnaryExpression
+from runtime.ast import BinaryExpression, BoolLiteral, CallExpression, FloatLiteral, Identifier, IntLiteral, UnaryExpression
 from runtime.interpreter import ExpressionParser, _priority, _try_fun_expression
 from runtime.tokenizer import TokenType, Tokenizer,Token
 
@@ -31,58 +31,25 @@ class TestExpressionParser(unittest.TestCase):
         t.init("(a,b,c,1.23) =>;")
         self.assertFalse(_try_fun_expression(t))
 
-    def test_is_unary(self):
-        t = Tokenizer()
-        t.init("!")
-        parser = ExpressionParser(t)
-        pred = parser.is_unary()
-        self.assertTrue(pred)
-
-        t.init("+")
-        parser = ExpressionParser(t)
-        pred = parser.is_unary()
-        self.assertTrue(pred)
-
-        t.init("--123")
-        t.next()
-        parser = ExpressionParser(t)
-        pred = parser.is_unary()
-        self.assertTrue(pred)
-
-        t.init("+-123")
-        t.next()
-        parser = ExpressionParser(t)
-        pred = parser.is_unary()
-        self.assertTrue(pred)
-
-        t.init(")-123")
-        t.next()
-        parser = ExpressionParser(t)
-        pred = parser.is_unary()
-        self.assertFalse(pred)
-
-        t.init("=> - 123")
-        t.next()
-        parser = ExpressionParser(t)
-        pred = parser.is_unary()
-        self.assertTrue(pred)
-
-        t.init(", - 123")
-        t.next()
-        parser = ExpressionParser(t)
-        pred = parser.is_unary()
-        self.assertTrue(pred)
+        t.init("(a: int, b, c: string) =>")
+        self.assertTrue(_try_fun_expression(t))
 
-        t.init("* - 123")
-        t.next()
-        parser = ExpressionParser(t)
-        pred = parser.is_unary()
-        self.assertTrue(pred)
+        t.init("(a:) =>")
+        self.assertFalse(_try_fun_expression(t))
 
-        t.init("* - 123")
-        parser = ExpressionParser(t)
-        pred = parser.is_unary()
-        self.assertFalse(pred)
+    def test_unary(self):
+        # An operator is unary only where an operand is expected.
+        t = Tokenizer()
+        for script, expected in (
+            ("!a", UnaryExpression("!", Identifier("a"))),
+            ("--1", UnaryExpression("-", UnaryExpression("-", IntLiteral(1)))),
+            ("a - -1", BinaryExpression(Identifier("a"), "-", UnaryExpression("-", IntLiteral(1)))),
+            ("(a) - 1", BinaryExpression(Identifier("a"), "-", IntLiteral(1))),
+            ("a * +1", BinaryExpression(Identifier("a"), "*", UnaryExpression("+", IntLiteral(1)))),
+            ("f(a, -1)", CallExpression(Identifier("f"), [Identifier("a"), UnaryExpression("-", IntLiteral(1))])),
+        ):
+            t.init(script)
+            self.assertEqual(ExpressionParser(t).parse(), expected, script)
 
     def test_expression_parser(self):
         t = Tokenizer()
@@ -136,6 +103,62 @@ class TestExpressionParser(unittest.TestCase):
 
     def test_binary_expression(self):
         t = Tokenizer()
+        t.init("a - b * c - d")
+        expression = ExpressionParser(t).parse()
+        self.assertEqual(expression, BinaryExpression(
+            BinaryExpression(Identifier("a"), "-", BinaryExpression(Identifier("b"), "*", Identifier("c"))),
+            "-",
+            Identifier("d"),
+        ))
+
+        t.init("-(a + b) * !c")
+        expression = ExpressionParser(t).parse()
+        self.assertEqual(expression, BinaryExpression(
+            UnaryExpression("-", BinaryExpression(Identifier("a"), "+", Identifier("b"))),
+            "*",
+            UnaryExpression("!", Identifier("c")),
+        ))
+
+        t.init("a < 1 && b || c")
+        expression = ExpressionParser(t).parse()
+        self.assertEqual(expression.operator, "||")
+        self.assertEqual(expression.left.operator, "&&")
+        self.assertEqual(expression.left.left.operator, "<")
+
+        t.init("(a + b")
+        with self.assertRaises(Exception):
+            ExpressionParser(t).parse()
+
+    def test_chain(self):
+        t = Tokenizer()
+        t.init("-a.f(1).g() * 2.5.h()")
+        expression = ExpressionParser(t).parse()
+        self.assertEqual(expression, BinaryExpression(
+            UnaryExpression("-", CallExpression(Identifier("g"), [CallExpression(Identifier("f"), [Identifier("a"), IntLiteral(1)])])),
+            "*",
+            CallExpression(Identifier("h"), [FloatLiteral(2.5)]),
+        ))
+
+        t.init("(a + b).f(c)")
+        expression = ExpressionParser(t).parse()
+        self.assertEqual(expression, CallExpression(Identifier("f"), [BinaryExpression(Identifier("a"), "+", Identifier("b")), Identifier("c")]))
+
+        for source in ("a.f", "a.f(", "a.f(1, ", "a.f(1).g("):
+            t.init(source)
+            with self.assertRaises(Exception):
+                ExpressionParser(t).parse()
+
+    def test_long_expression(self):
+        t = Tokenizer()
+        t.init(" + ".join(["1"] * 10000) + ";")
+        expression = ExpressionParser(t).parse()
+        depth = 0
+        while isinstance(expression, BinaryExpression):
+            self.assertEqual(expression.right, IntLiteral(1))
+            expression = expression.left
+            depth += 1
+        self.assertEqual(depth, 9999)
+        self.assertEqual(t.tokenType(), TokenType.SEMICOLON)
 
     def test__priority(self):
         self.assertEqual(_priority("*"), 0)
@@ -0,0 +1,101 @@
+import unittest
+from runtime.incremental import Document
+from runtime.tests.support import parse
+from runtime.tokenizer import Tokenizer
+
+script = """// header
+let add = (left, right) => {
+  return left + right;
+}
+let a = 1;
+let b = add(a, 2);
+while a < 3 { a = a + 1; }
+print(a);
+"""
+
+
+class TestIncremental(unittest.TestCase):
+
+    def assertParsed(self, doc: Document):
+        self.assertEqual(doc.program, parse(doc.script))
+        expected = Document.parse(doc.script)
+        self.assertEqual(list(doc.starts), list(expected.starts))
+        self.assertEqual(list(doc.ends), list(expected.ends))
+        self.assertEqual(list(doc.rows), list(expected.rows))
+
+    def test_edit_reuses_untouched_statements(self):
+        doc = Document.parse(script)
+        body = list(doc.program.body)
+        start = script.index("2);")
+        self.assertEqual(doc.edit(start, start + 1, "40"), (1, 3, 3))
+        self.assertParsed(doc)
+        new_body = doc.program.body
+        self.assertIs(new_body[0], body[0])
+        self.assertIs(new_body[1], body[1])
+        self.assertIsNot(new_body[2], body[2])
+        self.assertIs(new_body[3], body[3])
+        self.assertIs(new_body[4], body[4])
+        self.assertEqual(new_body[2].value.arguments[1].value, 40)
+
+    def test_insert_and_delete_statements(self):
+        doc = Document.parse(script)
+        start = script.index("print")
+        doc.edit(start, start, "let c = 3;\nlet d = 4;\n")
+        self.assertParsed(doc)
+        self.assertEqual(len(doc.program.body), 7)
+        start = doc.script.index("let c")
+        doc.edit(start, doc.script.index("print"), "")
+        self.assertParsed(doc)
+        self.assertEqual(doc.script, script)
+
+    def test_edit_at_bounds_and_in_comments(self):
+        doc = Document.parse(script)
+        doc.edit(0, 0, "let z = 0;")
+        self.assertParsed(doc)
+        doc.edit(len(doc.script), len(doc.script), "z = z + 1;")
+        self.assertParsed(doc)
+        start = doc.script.index("header")
+        doc.edit(start, start + 6, "banner\n// more")
+        self.assertParsed(doc)
+        self.assertEqual(doc.rows[-1], 9)
+
+    def test_edit_leaving_call_or_block_broken(self):
+        source = "let a = 1;\nprint(a);\n"
+        for text in ("f(", "f(a, ", "f(;", "f(a;", "if a { ) }"):
+            doc = Document.parse(source)
+            with self.assertRaises(Exception):
+                doc.edit(len(source), len(source), text)
+
+    def test_edit_changing_statement_bounds(self):
+        doc = Document.parse(script)
+        end = script.index("while")
+        doc.edit(end - 2, end - 1, "")
+        self.assertParsed(doc)
+        before = doc.script
+        start = before.index("}\nlet a")
+        with self.assertRaises(Exception):
+            doc.edit(start, start + 1, "")
+        self.assertEqual(doc.script, before)
+        self.assertParsed(doc)
+
+    def test_tokens(self):
+        doc = Document.parse(script)
+        doc.edit(0, 0, "let q = 1;")
+        t = Tokenizer()
+        t.init(doc.script)
+        self.assertEqual(list(doc.tokens), list(t.tokens))
+        # Once scanned, the table is updated from the edit point.
+        tokens = doc.tokens
+        for text, new in (("2);", "40); let c = 3;"), ("a = 1;", "a =\n  1; print(a);"), ("left + right", "left"), ("let q = 1;", "")):
+            start = doc.script.index(text)
+            doc.edit(start, start + len(text), new)
+            self.assertIs(doc.tokens, tokens)
+            t.init(doc.script)
+            self.assertEqual(list(doc.tokens), list(t.tokens), doc.script)
+        # Statements later on the edited line keep their row but move along it.
+        doc = Document.parse("let x = 1; let y = 2; let z = 3; let w = 4;\nprint(x);")
+        tokens = doc.tokens
+        doc.edit(8, 9, "100")
+        t.init(doc.script)
+        self.assertIs(doc.tokens, tokens)
+        self.assertEqual(list(doc.tokens), list(t.tokens))
@@ -0,0 +1,34 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+import main
+from runtime.engines import ENGINES
+
+
+class TestMain(unittest.TestCase):
+
+    def run_script(self, script: str, *options: str):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "script.dc")
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(script)
+            output = StringIO()
+            with redirect_stdout(output):
+                main.main([*options, path])
+        return output.getvalue()
+
+    def test_engines(self):
+        for engine in ENGINES:
+            self.assertEqual(self.run_script("let add = (a, b) => { return a + b; };\nprint(2.add(3));", "--engine", engine), "5\n", engine)
+
+    def test_python_error_positions(self):
+        script = "let a = 1;\nlet f = () => {\n    return a / 0;\n};\n  print(f());"
+        with self.assertRaises(ZeroDivisionError) as raised:
+            self.run_script(script, "--engine", "python")
+        self.assertEqual(raised.exception.__notes__, ["in the statement at row=1, col=0"])
+        with self.assertRaises(ZeroDivisionError) as raised:
+            self.run_script(script, "--engine", "python", "-O", "1")
+        self.assertEqual(raised.exception.__notes__, ["in top-level statement 2 of the program"])
@@ -0,0 +1,111 @@
+import unittest
+from runtime.engines import ENGINES, run
+from runtime.memo import MISSING, MemoTable, memoize, pure_functions
+from runtime.tests.support import execute, parse, printing_runtime
+from runtime.tests.test_compiler import programs
+
+def execute_memoized(script: str, engine: str, **options):
+    program, tables = memoize(parse(script), **options)
+    runtime, output = printing_runtime()
+    result = run(program, runtime, engine)
+    return output, result, tables
+
+fib = """
+let fib = (n) => { if n < 2 { return n; } return fib(n - 1) + fib(n - 2); };
+print(fib(60));
+"""
+
+
+class TestMemo(unittest.TestCase):
+
+    def test_pure_functions(self):
+        script = """
+        let base = 10;
+        let total = 0;
+        let square = (x) => { let y = x * x; y = y + 0; return y; };
+        let scaled = (x) => { return square(x) * base; };
+        let root = (x) => { return sqrt(x); };
+        let bump = (x) => { total = total + x; return total; };
+        let reads = (x) => { return x + total; };
+        let shows = (x) => { print(x); return x; };
+        let early = (x) => { return later(x); };
+        let later = (x) => { return x; };
+        let closes = (x) => { let f = () => { return x; }; return f(); };
+        let shadows = (square) => { return square(1); };
+        let leaks = (x) => { y = x; let y = 0; return y; };
+        let loops = (n) => { let i = 0; while i < n { let j = i; i = j + 1; if i > 5 { break; } } return i; };
+        total = 1;
+        """
+        self.assertEqual(pure_functions(parse(script)), ["square", "scaled", "later", "loops"])
+        self.assertEqual(pure_functions(parse(script), ["sqrt"]), ["square", "scaled", "root", "later", "loops"])
+
+    def test_matches_engines(self):
+        for script in programs:
+            expected = execute(script, "tree")
+            for engine in ENGINES:
+                output, result, _ = execute_memoized(script, engine)
+                self.assertEqual((output, result), expected, engine)
+
+    def test_memoizes_calls(self):
+        for engine in ENGINES:
+            output, _, tables = execute_memoized(fib, engine)
+            self.assertEqual(output, [(1548008755920,)])
+            self.assertEqual(tables["fib"].stats.misses, 61)
+            self.assertEqual(tables["fib"].stats.hits, 58)
+
+    def test_eviction(self):
+        output, _, tables = execute_memoized(fib, "tree", max_entries=4)
+        self.assertEqual(output, [(1548008755920,)])
+        stats = tables["fib"].stats
+        self.assertEqual(len(tables["fib"].entries), 4)
+        self.assertEqual(stats.evictions, stats.misses - 4)
+        table = MemoTable(2)
+        for value in (1, 2, 1, 3):
+            key = table.key((value,))
+            if table.get(key) is MISSING:
+                table.put(key, value)
+        self.assertEqual([key[0] for key in table.entries], [(1,), (3,)])
+
+    def test_argument_types(self):
+        script = "let same = (x) => { return x; }; print(same(1), same(true), same(1.0), same(1));"
+        for engine in ENGINES:
+            output, _, tables = execute_memoized(script, engine)
+            self.assertEqual([tuple(map(type, args)) for args in output], [(int, bool, float, int)])
+            self.assertEqual(tables["same"].stats.hits, 1)
+
+    def test_include_and_exclude(self):
+        script = """
+        let count = 0;
+        let tick = (x) => { count = count + 1; return x; };
+        print(tick(1), tick(1), count);
+        """
+        output, _, tables = execute_memoized(script, "tree")
+        self.assertEqual(output, [(1, 1, 2)])
+        self.assertEqual(tables, {})
+        output, _, tables = execute_memoized(script, "closure", include=["tick"])
+        self.assertEqual(output, [(1, 1, 1)])
+        self.assertEqual(tables["tick"].stats.hits, 1)
+        output, _, tables = execute_memoized(fib.replace("60", "10"), "tree", exclude=["fib"])
+        self.assertEqual(output, [(55,)])
+        self.assertEqual(tables, {})
+        # A whitelisted host function is taken to be pure, even print.
+        script = "let shown = (x) => { print(x); return x; }; let a = shown(1); let b = shown(1);"
+        for engine in ENGINES:
+            output, _, tables = execute_memoized(script, engine, externals=["print"])
+            self.assertEqual(output, [(1,)])
+            self.assertEqual(tables["shown"].stats.hits, 1)
+
+    def test_skips_tail_recursion(self):
+        # Through a table, each self-call would need a Python stack frame.
+        script = """
+        let loop = (n, acc) => { if n == 0 { return acc; } return loop(n - 1, acc + n); };
+        let count = (n) => { if n > 0 { return count(n - 1); } else { return 0; } };
+        let fib = (n) => { if n < 2 { return n; } return fib(n - 1) + fib(n - 2); };
+        print(loop(5000, 0), count(5000), fib(20));
+        """
+        for engine in ENGINES:
+            output, _, tables = execute_memoized(script, engine)
+            self.assertEqual(output, [(12502500, 0, 6765)], engine)
+            self.assertEqual(list(tables), ["fib"], engine)
+        _, _, tables = execute_memoized(script, "tree", include=["loop"])
+        self.assertEqual(list(tables), ["fib"])
@@ -0,0 +1,126 @@
+import unittest
+from runtime.ast import BinaryExpression, Block, BoolLiteral, CallExpression, FloatLiteral, Identifier, IfStatement, IntLiteral, ReturnStatement, StringLiteral
+from runtime.engines import ENGINES
+from runtime.optimizer import optimize
+from runtime.runtime import Runtime
+from runtime.tests.support import execute, parse
+from runtime.tests.test_compiler import programs
+
+calls = """
+let add = (left, right) => { return left + right; };
+let square = (x) => { return x * x; };
+let mix = (a, b, c) => { return a * a + b + c; };
+let a = 3;
+let b = add(a, 2);
+let c = mix(a, a + 1, a);
+let d = add(1, 2.5);
+let f = add(a, square(add(a, 1)));
+let i = 0;
+let total = 0;
+while i < 10 {
+    total = add(total, square(i)) - mix(i, i * 2, 1);
+    i = add(i, 1);
+}
+print(a, b, c, d, total);
+"""
+
+def values(program):
+    return [statement.value for statement in program.body]
+
+
+class TestOptimizer(unittest.TestCase):
+
+    def test_folding(self):
+        program = optimize(parse('let a = 1 + 2 * 3; let b = -(4 / 2); let c = "a" + "b"; let d = !(1 < 2) || 3 == 3; let e = -true;'))
+        self.assertEqual(values(program), [IntLiteral(7), FloatLiteral(-2.0), StringLiteral("ab"), BoolLiteral(True), IntLiteral(-1)])
+
+    def test_left_for_run_time(self):
+        program = optimize(parse('let a = 1 / 0; let b = "a" - 1; let c = x + 1 * 2; let d = "ab" * 3000;'))
+        a, b, c, d = values(program)
+        self.assertIsInstance(a, BinaryExpression)
+        self.assertIsInstance(b, BinaryExpression)
+        self.assertEqual(c, BinaryExpression(parse("x;").body[0], "+", IntLiteral(2)))
+        self.assertIsInstance(d, BinaryExpression)
+        with self.assertRaises(ZeroDivisionError):
+            program.exec(Runtime())
+
+    def test_dead_branches(self):
+        program = optimize(parse("""
+let a = 0;
+if 1 < 2 { a = 1; } else { a = 2; }
+if false { a = 3; }
+while false { a = 4; }
+if true { let b = 5; }
+let f = () => { if true { a = 6; if !false { return a; } } a = 7; };
+"""))
+        kinds = [type(statement) for statement in program.body]
+        self.assertEqual(kinds[1], Block)
+        self.assertEqual(len(program.body), 4)
+        self.assertEqual(program.body[2], IfStatement(BoolLiteral(True), Block([parse("let b = 5;").body[0]]), Block([])))
+        body = program.body[3].value.body.body
+        self.assertEqual([type(statement).__name__ for statement in body], ["Assignment", "ReturnStatement", "Assignment"])
+
+    def test_levels(self):
+        script = "let a = 1 + 2; if true { a = 3; }"
+        program = parse(script)
+        self.assertIs(optimize(program, 0), program)
+        optimize(program)
+        self.assertEqual(program.dict(), parse(script).dict())
+        self.assertIsInstance(program.body[0].value, BinaryExpression)
+
+    def test_same_results(self):
+        extra = """
+let t = 0;
+while 2 > 1 {
+    t = t + 1 * 2;
+    if t > 4 - 1 { break; }
+}
+if true { break; print("skipped"); }
+print(t, -(-3), !!true, 10 % 4 + 0.5);
+"""
+        for script in programs + [extra, calls]:
+            for engine in ENGINES:
+                expected = execute(parse(script), engine)
+                for level in (1, 2):
+                    self.assertEqual(execute(optimize(parse(script), level), engine), expected)
+
+    def test_inline(self):
+        program = optimize(parse(calls), 2)
+        body = program.body
+        self.assertEqual(body[4].value, BinaryExpression(Identifier("a"), "+", IntLiteral(2)))
+        self.assertEqual(body[5].value, BinaryExpression(BinaryExpression(
+            BinaryExpression(Identifier("a"), "*", Identifier("a")), "+",
+            BinaryExpression(Identifier("a"), "+", IntLiteral(1))), "+", Identifier("a")))
+        self.assertEqual(body[6].value, FloatLiteral(3.5))
+        self.assertEqual(body[7].value.callee, Identifier("add"))
+        self.assertEqual(body[7].value.arguments[1].callee, Identifier("square"))
+        self.assertEqual(optimize(parse(calls), 1).body[4].value.type(), "CallExpression")
+
+    def test_not_inlined(self):
+        scripts = [
+            "let f = (a, b) => { return a + b; }; f = (a, b) => { return a; }; let s = f(1, 2);",
+            "let f = (a, b) => { return a + b; }; let g = (f) => { return f; }; let s = f(1, 2);",
+            "let f = (a, b) => { return a + b; }; if true { let f = 1; } let s = f(1, 2);",
+            "let c = 1; let f = (a, b) => { return a + c; }; let s = f(1, 2);",
+            "let f = (a, b) => { print(a); return b; }; let s = f(1, 2);",
+            "let f = (a, a) => { return a; }; let s = f(1, 2);",
+            "let f = (a, b) => { return a + b; }; let s = f(1);",
+            "let f = (a) => { return a + a; }; let s = f(1 + c);",
+            "let f = (a, b) => { return b; }; let s = f(1 + c, 2);",
+            "let f = (a) => { return a; }; let s = f(g());",
+            "let f = (a) => { return a + a + a + a + a + a + a + a + a; }; let s = f(1);",
+        ]
+        for script in scripts:
+            value = optimize(parse(script), 2).body[-1].value
+            self.assertIsInstance(value, CallExpression, script)
+        program = optimize(parse("let r = f(1, 2); let f = (a, b) => { return a + b; }; let s = f(1, 2);"), 2)
+        self.assertIsInstance(program.body[0].value, CallExpression)
+        self.assertEqual(program.body[2].value, IntLiteral(3))
+
+    def test_inline_call_statement(self):
+        script = "let f = (a) => { return a * 2; }; let g = (x) => { f(x); print(1); }; print(g(4)); f(5); print(2);"
+        program = optimize(parse(script), 2)
+        self.assertEqual(program.body[1].value.body.body[0], ReturnStatement(BinaryExpression(Identifier("x"), "*", IntLiteral(2))))
+        self.assertEqual(program.body[3], ReturnStatement(IntLiteral(10)))
+        for engine in ENGINES:
+            self.assertEqual(execute(program, engine), ([(8,)], execute(parse(script), engine)[1]))
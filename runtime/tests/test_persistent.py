@@ -0,0 +1,129 @@
+import random
+import unittest
+from runtime.engines import ENGINES
+from runtime.optimizer import optimize
+from runtime.persistent import EMPTY_MAP, EMPTY_VECTOR, PersistentMap, PersistentVector, collection_functions
+from runtime.serialize import dumps, loads
+from runtime.tests.support import parse, run_script
+
+# Host functions are stateless, so the tests share one set.
+functions = collection_functions()
+
+
+class Collider:
+    """Key whose hash is shared by every key of the same group."""
+
+    def __init__(self, group: int, name: str):
+        self.group = group
+        self.name = name
+
+    def __hash__(self):
+        return self.group
+
+    def __eq__(self, other):
+        return type(other) is Collider and (self.group, self.name) == (other.group, other.name)
+
+
+class TestPersistent(unittest.TestCase):
+
+    def test_vector(self):
+        for size in (0, 1, 31, 32, 33, 1024, 1056, 1057, 33 * 1024 + 5):
+            values = list(range(size))
+            vector = PersistentVector.from_iterable(values)
+            self.assertEqual(list(vector), values, size)
+            appended = EMPTY_VECTOR
+            for value in values:
+                appended = appended.append(value)
+            self.assertEqual(appended, vector)
+            self.assertEqual(len(appended), size)
+            for index in {0, size // 2, size - 1} if size else ():
+                self.assertEqual(vector[index], index)
+                changed = vector.set(index, "x")
+                self.assertEqual(changed[index], "x")
+                self.assertEqual(vector[index], index)
+                self.assertEqual(list(changed), values[:index] + ["x"] + values[index + 1:])
+        vector = PersistentVector.from_iterable("abc")
+        self.assertEqual(vector[-1], "c")
+        self.assertEqual(list(vector.set(3, "d") + vector), list("abcdabc"))
+        self.assertRaises(IndexError, lambda: vector[3])
+        self.assertRaises(IndexError, lambda: vector.set(5, "x"))
+        self.assertEqual(hash(vector), hash(PersistentVector.from_iterable("abc")))
+        self.assertEqual(repr(vector), "['a', 'b', 'c']")
+
+    def test_vector_sharing(self):
+        vector = PersistentVector.from_iterable(range(2000))
+        changed = vector.set(5, -1)
+        # Only the path to the leaf of index 5 was copied.
+        self.assertIsNot(changed.root[0][0], vector.root[0][0])
+        self.assertIs(changed.root[0][1], vector.root[0][1])
+        self.assertIs(changed.root[1], vector.root[1])
+        self.assertIs(changed.tail, vector.tail)
+
+    def test_map(self):
+        rng = random.Random(7)
+        expected = dict()
+        map = EMPTY_MAP
+        versions = list()
+        for _ in range(3000):
+            key = rng.randrange(1000)
+            if rng.random() < 0.3:
+                map = map.remove(key)
+                expected.pop(key, None)
+            else:
+                map = map.set(key, key * 2)
+                expected[key] = key * 2
+            versions.append((map, dict(expected)))
+        for map, expected in versions[::97]:
+            self.assertEqual(len(map), len(expected))
+            self.assertEqual(dict(map.items()), expected)
+            self.assertEqual(set(map), set(expected))
+            for key in range(0, 1000, 13):
+                self.assertEqual(map.get(key), expected.get(key))
+                self.assertEqual(key in map, key in expected)
+        self.assertEqual(PersistentMap.from_items([(1, "a"), (2, "b")]), PersistentMap.from_items([(2, "b"), (1, "a")]))
+        small = EMPTY_MAP.set(1, "a")
+        self.assertIs(small.set(1, small.get(1)), small)
+        self.assertIs(small.remove("absent"), small)
+        self.assertRaises(KeyError, lambda: small["absent"])
+        self.assertEqual(small.get(1.0), "a")
+
+    def test_collisions(self):
+        keys = [Collider(group, name) for group in (5, 5 + 2 ** 64, -3) for name in "abc"]
+        map = PersistentMap.from_items((key, index) for index, key in enumerate(keys))
+        self.assertEqual(len(map), 9)
+        self.assertEqual([map.get(key) for key in keys], list(range(9)))
+        for key in keys:
+            map = map.remove(key)
+            self.assertNotIn(key, map)
+        self.assertEqual(len(map), 0)
+        self.assertEqual(list(map.items()), [])
+
+    def test_literals(self):
+        script = """
+        let xs = [1, 2 + 3, -4];
+        let m = ["a": 1, "b": [true, "x"], 3: 4.5];
+        let e = [:];
+        let pushed = push(xs, 6);
+        let changed = set(m, "a", 10);
+        print(xs, get(xs, 1), count(pushed), get(m, "b"), get(m, 3), get(m, "z"), count(e));
+        print(get(changed, "a"), get(m, "a"), has(changed, "b"), has(remove(changed, "b"), "b"), has(xs, 3));
+        print(xs == [1, 5, -4], keys([2: "b", 1: "a"]), values(set(e, "k", [])), [] + xs);
+        """
+        expected = [
+            (PersistentVector.from_iterable([1, 5, -4]), 5, 4, PersistentVector.from_iterable([True, "x"]), 4.5, None, 0),
+            (10, 1, True, False, False),
+            (True, PersistentVector.from_iterable([1, 2]), PersistentVector.from_iterable([EMPTY_VECTOR]), PersistentVector.from_iterable([1, 5, -4])),
+        ]
+        program = parse(script)
+        for engine in ENGINES:
+            self.assertEqual(run_script(program, engine, functions)[0], expected, engine)
+            self.assertEqual(run_script(optimize(program, 2), engine, functions)[0], expected, engine)
+        self.assertEqual(run_script(loads(dumps(program)), "tree", functions)[0], expected)
+        # Keys are evaluated before their values, entry by entry.
+        order = "let log = (x) => { print(x); return x; }; let m = [log(1): log(2), log(3): log(4)]; print(count([log(5), log(6)]));"
+        for engine in ENGINES:
+            self.assertEqual(run_script(order, engine, functions)[0], [(1,), (2,), (3,), (4,), (5,), (6,), (2,)], engine)
+
+    def test_parse_errors(self):
+        for script in ("let m = [1: 2, 3];", "let m = [1, 2: 3];", "let xs = [1 2];", "let xs = [1, 2"):
+            self.assertRaises(Exception, parse, script)
@@ -1,7 +1,129 @@
-
+import gc
 import unittest
+import weakref
+from unittest import mock
+from runtime import ast
+from runtime.interpreter import program_parser
+from runtime.runtime import Runtime
+from runtime.tokenizer import Tokenizer
+
+def run(script: str):
+    t = Tokenizer()
+    t.init(script)
+    output = []
+    runtime = Runtime(exteral_fun={"print": lambda *args: output.append(args)})
+    with mock.patch.object(ast, "Runtime", wraps=Runtime) as scopes:
+        program_parser(t).exec(runtime)
+    return output, scopes.call_count
 
 class TestRuntime(unittest.TestCase):
 
     def test_eval(self):
-        self.assertTrue(True)
\ No newline at end of file
+        self.assertTrue(True)
+
+    def test_scope_elision(self):
+        output, scopes = run("let i = 0; while i < 100 { i = i + 1; if i > 1 { i = i + 1; } } print(i);")
+        self.assertEqual(output, [(101,)])
+        self.assertEqual(scopes, 0)
+
+        output, scopes = run("let i = 0; let t = 0; while i < 100 { let j = i * 2; t = t + j; i = i + 1; } print(t);")
+        self.assertEqual(output, [(9900,)])
+        self.assertEqual(scopes, 1)
+
+        output, scopes = run("if true { let a = 1; print(a); } else { print(0); }")
+        self.assertEqual(output, [(1,)])
+        self.assertEqual(scopes, 1)
+
+    def test_closures_keep_their_scope(self):
+        script = """
+        let i = 0;
+        let first = 0;
+        while i < 3 {
+            let j = i;
+            if i == 0 { first = () => { return j; }; }
+            i = i + 1;
+        }
+        print(first());
+        """
+        output, scopes = run(script)
+        self.assertEqual(output, [(0,)])
+        self.assertEqual(scopes, 4)
+
+    def test_quickening(self):
+        t = Tokenizer()
+        t.init('let i = 0; let s = 0; while i < 20 { s = s + i; i = i + 1; } s = "a"; while i < 23 { s = s + "b"; i = i + 1; }')
+        program = program_parser(t)
+        stats = ast.collect_quickening_stats()
+        self.addCleanup(ast.collect_quickening_stats, False)
+        runtime = Runtime()
+        program.exec(runtime)
+        self.assertEqual(runtime.context["s"], "abbb")
+        self.assertEqual(runtime.context["i"], 23)
+        add = program.body[2].body.body[0].value
+        self.assertIn("eval", vars(add))
+        self.assertEqual(stats.binary_specialized, 3)
+        self.assertGreater(stats.binary_hits, 0)
+        # i + 1 and i < 20 keep seeing ints; s + i then sees strings.
+        node = ast.BinaryExpression(ast.Identifier("s"), "+", ast.Identifier("i"))
+        for value in range(ast.quicken_after):
+            node.eval(Runtime({"s": value, "i": 1}))
+        self.assertIn("eval", vars(node))
+        misses = stats.binary_misses
+        self.assertEqual(node.eval(Runtime({"s": "a", "i": "b"})), "ab")
+        self.assertNotIn("eval", vars(node))
+        self.assertEqual(stats.binary_misses, misses + 1)
+        # Counting stays off unless asked for.
+        ast.collect_quickening_stats(False)
+        node.eval(Runtime({"s": "a", "i": "b"}))
+        self.assertIsNone(ast.quickening)
+
+    def test_lookup_caches(self):
+        script = """
+        let x = 1;
+        let outer = () => {
+            let g = () => { return x; };
+            let a = g() + g();
+            let x = 20;
+            let f = () => { return print(x); };
+            let p = f();
+            let print = (value) => { return value * 3; };
+            return a + g() + f();
+        };
+        print(outer());
+        let i = 0;
+        let total = 0;
+        while i < 3 {
+            let y = i * 10;
+            if true { let z = 0; total = total + y; }
+            i = i + 1;
+        }
+        print(total);
+        """
+        stats = ast.collect_quickening_stats()
+        self.addCleanup(ast.collect_quickening_stats, False)
+        output, _ = run(script)
+        self.assertEqual(output, [(20,), (82,), (30,)])
+        self.assertGreater(stats.name_hits + stats.call_hits, 0)
+
+    def test_caches_do_not_keep_runtimes(self):
+        t = Tokenizer()
+        t.init("let x = 1; let f = () => { return g(x); }; let i = 0; while i < 3 { let r = f(); i = i + 1; }")
+        program = program_parser(t)
+        runtime = Runtime(exteral_fun={"g": lambda value: ast.ReturnValue(value)})
+        program.exec(runtime)
+        body = program.body[1].value.body.body[0].value
+        self.assertIsNotNone(body._cache)
+        self.assertIsNotNone(body.arguments[0]._cache)
+        finished = weakref.ref(runtime)
+        del runtime
+        gc.collect()
+        self.assertIsNone(finished())
+        # Another run of the same tree finds its own host function.
+        output = []
+        program.exec(Runtime(exteral_fun={"g": lambda value: ast.ReturnValue(output.append(value) or value)}))
+        self.assertEqual(output, [1, 1, 1])
+
+    def test_versions_per_root(self):
+        root = Runtime()
+        self.assertIsNot(root.versions, Runtime().versions)
+        self.assertIs(Runtime(parent=Runtime(parent=root)).versions, root.versions)
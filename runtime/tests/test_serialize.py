@@ -0,0 +1,68 @@
+import json
+import mmap
+import os
+import tempfile
+import unittest
+from runtime.ast import BinaryExpression, Identifier, IntLiteral, Program, StringLiteral
+from runtime.serialize import dump, dumps, load, loads
+from runtime.tests.support import parse
+
+script = """// 函數宣告
+let add = (left, right) => {
+  return left + right * 2.5;
+}
+let text = "嘉妮";
+let a = -12 == 3.25 && !true || false;
+while a < 3 {
+  if a { a = a + 1; } else { break; }
+}
+return;
+add(1, add(2, 3));
+"""
+
+
+class TestSerialize(unittest.TestCase):
+
+    def test_round_trip(self):
+        program = parse(script)
+        data = dumps(program)
+        self.assertEqual(loads(data).dict(), program.dict())
+        self.assertLess(len(data) * 4, len(json.dumps(program.dict())))
+
+    def test_literals(self):
+        program = Program([
+            IntLiteral(0), IntLiteral(-1), IntLiteral(1 << 70), IntLiteral(-(1 << 70)),
+            StringLiteral(""), StringLiteral("a\x00b"), Identifier("a\x00b"),
+        ])
+        self.assertEqual(loads(dumps(program)), program)
+
+    def test_mmap(self):
+        program = parse(script)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "main.ast")
+            dump(program, path)
+            self.assertEqual(load(path).dict(), program.dict())
+            with open(path, "rb") as file:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    self.assertEqual(loads(mapped).dict(), program.dict())
+
+    def test_deep_tree(self):
+        expression = IntLiteral(0)
+        for index in range(10000):
+            expression = BinaryExpression(expression, "+", IntLiteral(index))
+        node = loads(dumps(expression))
+        depth = 0
+        while isinstance(node, BinaryExpression):
+            node = node.left
+            depth += 1
+        self.assertEqual(depth, 10000)
+
+    def test_invalid(self):
+        data = dumps(parse(script))
+        for version in (1, 3):
+            with self.assertRaisesRegex(Exception, f"Unsupported AST format version {version}"):
+                loads(b"DCA" + bytes([version]) + data[4:])
+        with self.assertRaises(Exception):
+            loads(data[:-4])
+        with self.assertRaises(Exception):
+            loads(b"not an ast")
@@ -0,0 +1,46 @@
+import unittest
+from runtime.shake import shake
+from runtime.tests.support import parse, run_script
+
+library = """
+let version = "1.0";
+let unused = 42;
+let twice = (x) => { return x * 2; };
+let inc = (x) => { return x + 1; };
+let both = (x) => { return twice(inc(x)); };
+let dead = (x) => { return unused + dead(x); };
+let load = () => { print("loading"); return 3; };
+let config = load();
+let alias = both;
+let handler = (x) => { return alias(x) + config; };
+let other = () => { return version; };
+print(version);
+"""
+
+def names(program):
+    return [statement.id.name for statement in program.body if statement.type() == "VariableDeclaration"]
+
+
+class TestShake(unittest.TestCase):
+
+    def test_reachable(self):
+        program = shake(parse(library), "handler")
+        self.assertEqual(names(program), ["version", "twice", "inc", "both", "load", "config", "alias", "handler"])
+        self.assertEqual(program.body[-1].type(), "CallExpression")
+        self.assertEqual(names(shake(parse(library))), ["version", "load", "config"])
+        self.assertEqual(names(shake(parse(library), "dead", "other")), ["version", "unused", "dead", "load", "config", "other"])
+
+    def test_same_results(self):
+        results = list()
+        for program in (parse(library), shake(parse(library), "handler")):
+            output, runtime = run_script(program, "tree")
+            results.append((output, runtime.get_value("handler").exec([4]).value))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], ([("loading",), ("1.0",)], 13))
+
+    def test_conservative(self):
+        # Shadowed and repeated names are kept rather than risk dropping too much.
+        program = shake(parse("let a = 1; let b = 2; let f = () => { let a = 3; return a; }; let b = 4;"), "f")
+        self.assertEqual(names(program), ["a", "b", "f", "b"])
+        program = shake(parse("let a = 1; let b = a + 1; let c = -a;"))
+        self.assertEqual(names(program), ["a", "b", "c"])
@@ -0,0 +1,101 @@
+import io
+import mmap
+import os
+import tempfile
+import unittest
+from runtime.interpreter import program_parser
+from runtime.tokenizer import StreamTokenizer, TokenType, Tokenizer, stream_tokens
+
+script = """// 函數宣告
+let add = (left, right) => {
+  return left + right * 2.5;
+}
+let a = 12 == 3.25;
+add(1, add(2, 3));
+"""
+
+def tokens_of(tkr: Tokenizer):
+    tokens = []
+    token = tkr.token()
+    while token is not None:
+        tokens.append(token)
+        token = tkr.next()
+    return tokens
+
+
+class TestStreamTokenizer(unittest.TestCase):
+
+    def setUp(self):
+        expected = Tokenizer()
+        expected.init(script)
+        self.expected = list(expected.tokens)
+        file = tempfile.NamedTemporaryFile("wb", suffix=".dc", delete=False)
+        file.write(script.encode("utf-8"))
+        file.close()
+        self.path = file.name
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def test_chunk_boundaries(self):
+        for chunk_size in (1, 2, 3, 7, 64):
+            chunks = [script[i:i + chunk_size] for i in range(0, len(script), chunk_size)]
+            self.assertEqual(list(stream_tokens(chunks)), self.expected)
+
+    def test_sources(self):
+        t = StreamTokenizer(chunk_size=5)
+        t.init(self.path)
+        self.assertEqual(tokens_of(t), self.expected)
+
+        with open(self.path, "rb") as file:
+            t.init(file)
+            self.assertEqual(tokens_of(t), self.expected)
+
+        t.init(io.StringIO(script))
+        self.assertEqual(tokens_of(t), self.expected)
+
+        with open(self.path, "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                t.init(mapped)
+                self.assertEqual(tokens_of(t), self.expected)
+
+    def test_navigation(self):
+        t = StreamTokenizer()
+        t.init(io.StringIO("a + 9 * 3"))
+        self.assertEqual(t.get_prev(), None)
+        self.assertEqual(t.token().value, "a")
+        self.assertEqual(t.get_next().value, "+")
+        self.assertEqual(t.peek_type(3), TokenType.MULTIPLICATIVE_OPERATOR)
+        self.assertEqual(t.peek_type(5), None)
+        t.checkpoint_push()
+        self.assertEqual(t.next().value, "+")
+        self.assertEqual(t.next().value, "9")
+        self.assertEqual(t.get_prev().value, "+")
+        t.checkpoint_pop()
+        self.assertEqual(t.token().value, "a")
+        self.assertEqual(t.next_token_type(), TokenType.ADDITIVE_OPERATOR)
+        self.assertEqual(t.next().value, "9")
+        self.assertEqual(t.next().value, "*")
+        self.assertEqual(t.next().value, "3")
+        self.assertEqual(t.get_next(), None)
+        self.assertEqual(t.next(), None)
+        self.assertEqual(t.next(), None)
+        t.prev()
+        self.assertEqual(t.token().value, "3")
+
+    def test_bounded_window(self):
+        t = StreamTokenizer(lookahead=16, chunk_size=256)
+        t.init(io.StringIO("a + 1;\n" * 5000))
+        count = 0
+        while t.token() is not None:
+            self.assertLessEqual(len(t.tokens), 2 * t.lookahead)
+            t.next()
+            count += 1
+        self.assertEqual(count, 20000)
+
+    def test_program_parser(self):
+        t = StreamTokenizer(lookahead=4, chunk_size=8)
+        t.init(self.path)
+        expected = Tokenizer()
+        expected.init(script)
+        self.assertEqual(program_parser(t), program_parser(expected))
@@ -0,0 +1,86 @@
+import tracemalloc
+import unittest
+from runtime.engines import ENGINES
+from runtime.persistent import PersistentVector, collection_functions
+from runtime.streams import Stream, stream_functions
+from runtime.tests.support import run_script
+from runtime.vectors import numpy, vector_functions
+
+builtins = {**collection_functions(), **stream_functions()}
+
+def execute(script: str, engine: str):
+    return run_script(script, engine, builtins)
+
+functions = """
+let square = (x) => { return x * x; };
+let even = (x) => { return x % 2 == 0; };
+let seen = (x) => { print("seen", x); return x; };
+"""
+
+
+class TestStreams(unittest.TestCase):
+
+    def test_chains(self):
+        script = functions + """
+        let add = (left, right) => { return left + right; };
+        let evens = range(0, 10).filter(even);
+        print(evens.map(square).collect(), evens.count(), evens.drop(2).take(2).collect());
+        print(range(1, 11).reduce(add, 0), [1, 2, 3].map(square).sum(), [3: true, 4: false].filter(even).first(), [].first());
+        print(3.add(4).square(), range(10, 0, -3).collect());
+        """
+        for engine in ENGINES:
+            output, _ = execute(script, engine)
+            self.assertEqual(output, [
+                (PersistentVector.from_iterable([0, 4, 16, 36, 64]), 5, PersistentVector.from_iterable([4, 6])),
+                (55, 14, 4, None),
+                (49, PersistentVector.from_iterable([10, 7, 4, 1])),
+            ], engine)
+
+    def test_only_consumed_elements(self):
+        script = functions + """
+        let firsts = range(0, 1000000000000).map(seen).map(square).filter(even).take(2);
+        print(firsts.collect());
+        print(firsts.first());
+        """
+        for engine in ENGINES:
+            output, _ = execute(script, engine)
+            self.assertEqual(output, [
+                ("seen", 0), ("seen", 1), ("seen", 2), (PersistentVector.from_iterable([0, 4]),),
+                ("seen", 0), (0,),
+            ], engine)
+
+    def test_fusion(self):
+        _, runtime = execute(functions + "let chain = [1, 2].map(square).map(square).filter(even).filter(even).take(1).map(square);", "tree")
+        chain = runtime.context["chain"]
+        self.assertEqual([kind for kind, _ in chain.stages], ["map", "filter", "take", "map"])
+        self.assertEqual(list(chain), [256])
+        self.assertIs(type(chain), Stream)
+
+    def test_constant_memory(self):
+        # Summing 200000 elements holds one at a time.
+        script = functions + "let total = range(0, 200000).map(square).filter(even).sum();"
+        tracemalloc.start()
+        try:
+            _, runtime = execute(script, "closure")
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(runtime.context["total"], sum(x * x for x in range(0, 200000, 2)))
+        self.assertLess(peak, 1 << 20)
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_with_every_builtin(self):
+        # sum and count are in more than one set, and agree whichever wins.
+        script = functions + """
+        let v = vector(1, 2, 3);
+        print(sum(v), v.sum(), v.count(), length(v), (v * 2).sum());
+        print([1, 2, 3].count(), [1: 2].count(), [1, 2, 3].sum(), range(0, 5).count(), range(0, 5).map(square).sum());
+        """
+        expected = [(6, 6, 3, 3, 12), (3, 1, 6, 5, 30)]
+        sets = [vector_functions(), collection_functions(), stream_functions()]
+        for order in (sets, sets[::-1]):
+            merged = {name: function for functions in order for name, function in functions.items()}
+            for engine in ENGINES:
+                output, _ = run_script(script, engine, merged)
+                self.assertEqual(output, expected, engine)
+                self.assertEqual([type(value) for value in output[0]], [int] * 5, engine)
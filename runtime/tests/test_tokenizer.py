@@ -148,4 +148,69 @@ class TestTokenizer(unittest.TestCase):
         t.prev()
         self.assertEqual(t.token().value, "a")
         t.prev()
-        self.assertEqual(t.token().value, "a")
\ No newline at end of file
+        self.assertEqual(t.token().value, "a")
+
+    def test_peek_type(self):
+        t = Tokenizer()
+        t.init("a = (b) => {}")
+        self.assertEqual(t.peek_type(), TokenType.IDENTIFIER)
+        self.assertEqual(t.peek_type(1), TokenType.ASSIGNMENT)
+        self.assertEqual(t.peek_type(5), TokenType.ARROW)
+        self.assertEqual(t.peek_type(8), None)
+        self.assertEqual(t._current_token_index, 0)
+        t.next()
+        self.assertEqual(t.peek_type(1), TokenType.LEFT_PAREN)
+
+    def test_positions(self):
+        t = Tokenizer()
+        t.init("let a = 1\n  b + 22 // comment\nx")
+        a = t.tokens[1]
+        self.assertEqual((a.row, a.col, a.col_end, a.cursor), (0, 4, 5, 4))
+        b = t.tokens[4]
+        self.assertEqual((b.row, b.col, b.col_end, b.cursor), (1, 2, 3, 12))
+        number = t.tokens[6]
+        self.assertEqual((number.value, number.col, number.col_end), ("22", 6, 8))
+        x = t.tokens[7]
+        self.assertEqual((x.row, x.col, x.cursor), (2, 0, 30))
+
+    def test_keyword_boundaries(self):
+        t = Tokenizer()
+        t.init("1let letter iff int")
+        self.assertEqual(
+            [(token.type, token.value) for token in t.tokens],
+            [
+                (TokenType.INT, "1"),
+                (TokenType.LET, "let"),
+                (TokenType.IDENTIFIER, "letter"),
+                (TokenType.IDENTIFIER, "iff"),
+                (TokenType.TYPE_DEFINITION, "int"),
+            ],
+        )
+
+    def test_long_trivia(self):
+        t = Tokenizer()
+        t.init("// banner\n" * 20000 + " " * 20000 + "a")
+        self.assertEqual(len(t.tokens), 1)
+        self.assertEqual(t.token().row, 20000)
+        self.assertEqual(t.token().col, 20000)
+
+    def test_unknown_token(self):
+        t = Tokenizer()
+        with self.assertRaises(Exception):
+            t.init("a $ b")
+
+    def test_token_table(self):
+        t = Tokenizer()
+        t.init("let 嘉妮 = 1.5;")
+        table = t.tokens
+        self.assertEqual(len(table), 5)
+        self.assertEqual(list(table.types), [TokenType.LET.value, TokenType.IDENTIFIER.value, TokenType.ASSIGNMENT.value, TokenType.FLOAT.value, TokenType.SEMICOLON.value])
+        self.assertEqual(table.type_at(1), TokenType.IDENTIFIER)
+        self.assertEqual(table.value_at(1), "嘉妮")
+        self.assertEqual(table[3], Token(TokenType.FLOAT, "1.5", 0, 9, 12, 9))
+        self.assertEqual(table[-1].value, ";")
+        self.assertEqual([token.value for token in table[1:3]], ["嘉妮", "="])
+        self.assertEqual(table.nbytes(), 5 * 5 * table.types.itemsize)
+        t.next()
+        self.assertEqual(t.tokenType(), TokenType.IDENTIFIER)
+        self.assertEqual(t.token_value(), "嘉妮")
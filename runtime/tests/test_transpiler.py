@@ -0,0 +1,108 @@
+import unittest
+from runtime.engines import ENGINES, run
+from runtime.interpreter import located_program_parser, program_parser
+from runtime.runtime import Runtime
+from runtime.tests.support import execute, parse
+from runtime.tests.test_compiler import programs
+from runtime.tokenizer import Tokenizer
+from runtime.transpiler import TranspiledFun, compile_program, transpile
+
+def source(script: str) -> str:
+    return transpile(parse(script)).source
+
+
+class TestTranspiler(unittest.TestCase):
+
+    def test_matches_tree_engine(self):
+        for script in programs:
+            self.assertEqual(execute(script, "python"), execute(script, "tree"))
+
+    def test_source(self):
+        text = source("let add = (a, b) => { let c = a + b; return c; }; print(add(1, 2));")
+        self.assertIn("def add_0(a_1, b_2, *_):", text)
+        self.assertIn("c_3 = (a_1 + b_2)", text)
+        self.assertIn("return c_3", text)
+        # A known function is called directly, an external one as a global.
+        self.assertIn("print_4(add_0(1, 2))", text)
+        self.assertIn("1 + 2 + 3 + 4", source("let s = 1 + 2 + 3 + 4;"))
+
+    def test_tail_calls_loop(self):
+        text = source("let count = (n) => { if n > 0 { count(n - 1); } else { return n; } }; let r = count(300000);")
+        self.assertIn("while True:", text)
+        self.assertIn("n_2 = (n_2 - 1)", text)
+        self.assertEqual(execute("let count = (n) => { if n > 0 { count(n - 1); } else { return n; } }; print(count(300000));", "python"), ([(0,)], None))
+
+    def test_closures_keep_their_scope(self):
+        script = """
+        let i = 0;
+        let first = 0;
+        while i < 3 {
+            let j = i;
+            if i == 0 { first = () => { return j; }; }
+            i = i + 1;
+        }
+        print(first());
+        """
+        self.assertEqual(execute(script, "python"), ([(0,)], None))
+        self.assertIn("def _block_", source(script))
+
+    def test_breaks(self):
+        for script in (
+            "let a = 0; if true { while true { a = a + 1; if a > 3 { break; } } print(a); } print(a + 1);",
+            "let f = () => { break; }; let i = 0; while i < 3 { i = i + 1; f(); print(i); } print(i);",
+            "let f = () => { while true { break; } return 5; }; f(); print(1);",
+        ):
+            self.assertEqual(execute(script, "python"), execute(script, "tree"))
+
+    def test_host_runtime(self):
+        t = Tokenizer()
+        t.init("let double = (x) => { return x * scale; }")
+        host = Runtime(exteral_fun={"print": print})
+        program_parser(t).exec(host)
+        t.init("let scale = 2; let result = double(21); scale = 3;")
+        with self.assertRaises(Exception):
+            run(program_parser(t), Runtime(context={"scale": 1}, parent=host), "python")
+        t.init("let result = double(21); scale = 3; let local = (x) => { return x; };")
+        runtime = Runtime(parent=host)
+        host.context["scale"] = 2
+        run(program_parser(t), runtime, "python")
+        self.assertEqual(runtime.context["result"], 42)
+        self.assertEqual(host.context["scale"], 3)
+        self.assertIs(type(runtime.context["local"]), TranspiledFun)
+        self.assertEqual(runtime.context["local"].exec([5]).value, 5)
+        # Functions left by one program can be called by the next.
+        t.init("let again = local(7);")
+        run(program_parser(t), runtime, "python")
+        self.assertEqual(runtime.context["again"], 7)
+
+    def test_errors(self):
+        for script in (
+            "let a = 1; let a = 2;",
+            "b = 1;",
+            "let f = () => { b = 1; let b = 2; }; f();",
+            "let f = () => { let b = 1; let b = 2; }; f();",
+            "let f = (a, a) => {}; f(1, 2);",
+        ):
+            with self.assertRaises(Exception):
+                execute(script, "python")
+        self.assertEqual(execute("let f = (a, a) => {};", "python"), ([], None))
+
+    def test_error_positions(self):
+        t = Tokenizer()
+        t.init("let a = 1;\nlet f = () => {\n    return a / 0;\n};\n  print(f());")
+        program, positions = located_program_parser(t)
+        self.assertEqual(positions, [(0, 0), (1, 0), (4, 2)])
+        with self.assertRaises(ZeroDivisionError) as raised:
+            compile_program(program, positions)(Runtime(exteral_fun={"print": print}))
+        self.assertEqual(raised.exception.__notes__, ["in the statement at row=1, col=0"])
+
+    def test_recursion_limit(self):
+        with self.assertRaises(RecursionError):
+            execute("let f = (n) => { return f(n + 1) + 1; }; print(f(0));", "python")
+
+    def test_missing_argument(self):
+        # Too few arguments fail as in the other engines, too many are ignored.
+        for engine in ENGINES:
+            with self.assertRaises(IndexError):
+                execute("let f = (a, b) => { return a; }; let g = () => { return f(1); }; print(g());", engine)
+            self.assertEqual(execute("let f = (a) => { return a; }; print(f(1, 2));", engine), ([(1,)], None))
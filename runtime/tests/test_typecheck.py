@@ -0,0 +1,91 @@
+import unittest
+from runtime import ast
+from runtime.ast import BinaryExpression, Fun, VariableDeclaration
+from runtime.engines import ENGINES
+from runtime.runtime import Runtime
+from runtime.serialize import dumps, loads
+from runtime.tests.support import execute, parse
+from runtime.tests.test_compiler import programs
+from runtime.typecheck import check
+
+typed = """
+let total: int = 0;
+let add = (a: int, b: int) => { return a + b; };
+let i: int = 0;
+while i < 10 { total = add(total, i * 2); i = i + 1; }
+let s: string = "x" + "y";
+let f: float = 1.5 / 2.0;
+let untyped = (a, b) => { return a + b; };
+print(total, s, f, untyped(1, 2), untyped("a", "b"));
+"""
+
+
+class TestTypeCheck(unittest.TestCase):
+
+    def test_parse(self):
+        program = parse("let x: int = 1; let y = 2; let f = (a: float, b) => { return a; }; let g = (a) => { return a; };")
+        self.assertEqual([statement.value_type for statement in program.body], ["int", "any", "any", "any"])
+        self.assertEqual(program.body[2].value.param_types, ("float", "any"))
+        self.assertEqual(program.body[3].value.param_types, ())
+        self.assertEqual(loads(dumps(program)), program)
+        with self.assertRaises(Exception):
+            parse("let x: = 1;")
+
+    def test_matches_engines(self):
+        for script in programs:
+            program = parse(script)
+            check(program)
+            for engine in ENGINES:
+                self.assertEqual(execute(program, engine), execute(script, "tree"), engine)
+        for engine in ENGINES:
+            program = parse(typed)
+            check(program)
+            output, _ = execute(program, engine)
+            self.assertEqual(output, [(90, "xy", 0.75, 3, "ab")])
+
+    def test_specializes_proven_operations(self):
+        program = parse(typed)
+        self.assertEqual(check(program), 6)
+        loop = program.body[3]
+        self.assertIn("eval", vars(loop.test))
+        # a + b of the untyped function keeps the quickening path.
+        untyped = program.body[6].value.body.body[0].value
+        self.assertNotIn("eval", vars(untyped))
+        stats = ast.collect_quickening_stats()
+        self.addCleanup(ast.collect_quickening_stats, False)
+        program.exec(Runtime(exteral_fun={"print": lambda *args: None}))
+        self.assertEqual(stats.binary_specialized, 0)
+        self.assertEqual(stats.binary_misses, 0)
+
+    def test_scopes(self):
+        script = """
+        let x: int = 1;
+        let g = () => {
+            let f = () => { return x + 1; };
+            let x = "s";
+            return f();
+        };
+        let h = () => { let y = x + 1; let x = "t"; return y; };
+        """
+        program = parse(script)
+        # x in f may be g's, declared after f is made: only h's x + 1 is proven.
+        self.assertEqual(check(program), 1)
+        self.assertIn("eval", vars(program.body[2].value.body.body[0].value))
+        self.assertEqual(check(parse("let k = () => { return n * 2; }; let n: int = 1;")), 0)
+
+    def test_errors(self):
+        errors = {
+            'let x: int = "a";': "Cannot declare x of type int with a value of type string",
+            "let x: int = 1; x = 2.5;": "Cannot assign a value of type float to x of type int",
+            'let f = (a: int) => { return a; }; f(1); f("s");': "Argument 1 of f must be of type int, not string",
+            'let a: int = 1; let b: string = "s"; let c = a - b;': "Unsupported operand types for -: int and string",
+            'let a: string = "s"; let b = -a;': "Unsupported operand type for -: string",
+            "let x: int = 1.5 * 2;": "Cannot declare x of type int with a value of type float",
+            "let f = (x: bool) => { let y: bool = x && true; let z: float = x || false; };": "Cannot declare z of type float with a value of type bool",
+        }
+        for script, message in errors.items():
+            with self.assertRaises(Exception) as error:
+                check(parse(script))
+            self.assertEqual(str(error.exception), message)
+        # Values of unknown type are trusted.
+        self.assertEqual(check(parse("let f = (a: int) => { return a; }; let g = (v) => { let x: int = v; return f(v); };")), 0)
@@ -0,0 +1,43 @@
+import unittest
+from runtime.engines import ENGINES
+from runtime.tests.support import run_script
+from runtime.vectors import numpy, vector_functions
+
+def execute(script: str, engine: str):
+    return run_script(script, engine, vector_functions())
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestVectors(unittest.TestCase):
+
+    def test_broadcasting(self):
+        script = """
+        let v = arange(0, 10);
+        let w = v * 2 + 1;
+        let half = w / 2;
+        let big = w > 10;
+        let same = v == vector(0, 1, 2, 0, 0, 0, 0, 0, 0, 9);
+        let shifted = 3 - v % 4;
+        print(sum(w), mean(v), sum(big), sum(same), at(half, 1), min(shifted), length(w), dot(v, v));
+        """
+        for engine in ENGINES:
+            output, runtime = execute(script, engine)
+            self.assertEqual(output, [(100, 4.5, 5, 4, 1.5, 0, 10, 285)], engine)
+            self.assertEqual([type(value) for value in output[0]], [int, float, int, int, float, int, int, int])
+            self.assertEqual(runtime.context["w"].tolist(), [1, 3, 5, 7, 9, 11, 13, 15, 17, 19])
+            self.assertEqual(runtime.context["v"].tolist(), list(range(10)))
+
+    def test_functions(self):
+        script = """
+        let square = (x) => { return x * x; };
+        let v = linspace(0, 1, 5);
+        print(sum(square(vector(1, 2, 3))), max(v), sum(where(v > 0.5, 1, 0)), sum(ones(4) + zeros(4)), slice(v, 1, 3));
+        """
+        for engine in ENGINES:
+            output, _ = execute(script, engine)
+            self.assertEqual(output[0][:4], (14, 1.0, 2, 4))
+            self.assertEqual(output[0][4].tolist(), [0.25, 0.5])
+
+    def test_program_functions_win(self):
+        output, _ = execute("let sum = (v) => { return 0; }; print(sum(vector(1, 2)));", "tree")
+        self.assertEqual(output, [(0,)])
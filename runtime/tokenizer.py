@@ -1,5 +1,9 @@
+import codecs
+import os
 import re
+from array import array
 from enum import Enum
+from typing import Iterator
 
 from attr import dataclass
 
@@ -33,77 +37,108 @@ class TokenType(Enum):
     BREAK = 29
     TYPE_DEFINITION = 30
     COLON = 31
+    LEFT_BRACKET = 32
+    RIGHT_BRACKET = 33
+    DOT = 34
 
 specs = (
-    (re.compile(r"^\n"),TokenType.NEW_LINE),
+    (re.compile(r"\n"),TokenType.NEW_LINE),
     # Space:
-    (re.compile(r"^\s"),TokenType.SPACE),
+    (re.compile(r"[^\S\n]+"),TokenType.SPACE),
     # Comments:
-    (re.compile(r"^//.*"), TokenType.COMMENTS),
+    (re.compile(r"//.*"), TokenType.COMMENTS),
 
     # Symbols:
-    (re.compile(r"^\("), TokenType.LEFT_PAREN),
-    (re.compile(r"^\)"), TokenType.RIGHT_PAREN),
-    (re.compile(r"^\,"), TokenType.COMMA),
-    (re.compile(r"^\{"), TokenType.LEFT_BRACE),
-    (re.compile(r"^\}"), TokenType.RIGHT_BRACE),
-    (re.compile(r"^;"), TokenType.SEMICOLON),
-    (re.compile(r"^:"), TokenType.COLON),
-    (re.compile(r"^=>"), TokenType.ARROW),
+    (re.compile(r"\("), TokenType.LEFT_PAREN),
+    (re.compile(r"\)"), TokenType.RIGHT_PAREN),
+    (re.compile(r"\,"), TokenType.COMMA),
+    (re.compile(r"\{"), TokenType.LEFT_BRACE),
+    (re.compile(r"\}"), TokenType.RIGHT_BRACE),
+    (re.compile(r"\["), TokenType.LEFT_BRACKET),
+    (re.compile(r"\]"), TokenType.RIGHT_BRACKET),
+    (re.compile(r";"), TokenType.SEMICOLON),
+    (re.compile(r":"), TokenType.COLON),
+    # Not a float's, which starts with a digit.
+    (re.compile(r"\."), TokenType.DOT),
+    (re.compile(r"=>"), TokenType.ARROW),
 
     # Keywords:
-    (re.compile(r"^\blet\b"), TokenType.LET),
-    (re.compile(r"^\breturn\b"), TokenType.RETURN),
-    (re.compile(r"^\bif\b"), TokenType.IF),
-    (re.compile(r"^\belse\b"), TokenType.ELSE),
-    (re.compile(r"^\bwhile\b"), TokenType.WHILE),
-    (re.compile(r"^\bfor\b"), TokenType.FOR),
-    (re.compile(r"^\bbreak\b"), TokenType.BREAK),
+    (re.compile(r"let\b"), TokenType.LET),
+    (re.compile(r"return\b"), TokenType.RETURN),
+    (re.compile(r"if\b"), TokenType.IF),
+    (re.compile(r"else\b"), TokenType.ELSE),
+    (re.compile(r"while\b"), TokenType.WHILE),
+    (re.compile(r"for\b"), TokenType.FOR),
+    (re.compile(r"break\b"), TokenType.BREAK),
 
-    (re.compile(r"^\btrue\b"), TokenType.BOOL),
-    (re.compile(r"^\bfalse\b"), TokenType.BOOL),
+    (re.compile(r"true\b"), TokenType.BOOL),
+    (re.compile(r"false\b"), TokenType.BOOL),
 
     # Type definition:
-    (re.compile(r"^\bstring\b"), TokenType.TYPE_DEFINITION),
-    (re.compile(r"^\bint\b"), TokenType.TYPE_DEFINITION),
-    (re.compile(r"^\bfloat\b"), TokenType.TYPE_DEFINITION),
-    (re.compile(r"^\bbool\b"), TokenType.TYPE_DEFINITION),
-    (re.compile(r"^\bany\b"), TokenType.TYPE_DEFINITION),
+    (re.compile(r"string\b"), TokenType.TYPE_DEFINITION),
+    (re.compile(r"int\b"), TokenType.TYPE_DEFINITION),
+    (re.compile(r"float\b"), TokenType.TYPE_DEFINITION),
+    (re.compile(r"bool\b"), TokenType.TYPE_DEFINITION),
+    (re.compile(r"any\b"), TokenType.TYPE_DEFINITION),
 
     # Floats:
-    (re.compile(r"^[0-9]+\.[0-9]+"), TokenType.FLOAT),
+    (re.compile(r"[0-9]+\.[0-9]+"), TokenType.FLOAT),
 
     # Ints:
-    (re.compile(r"^[0-9]+"), TokenType.INT),
+    (re.compile(r"[0-9]+"), TokenType.INT),
 
     # Identifiers:
-    (re.compile(r"^\w+"),  TokenType.IDENTIFIER),
+    (re.compile(r"\w+"),  TokenType.IDENTIFIER),
 
 
     # Logical operators:
-    (re.compile(r"^&&"),  TokenType.LOGICAL_OPERATOR),
-    (re.compile(r"^\|\|"), TokenType.LOGICAL_OPERATOR),
-    (re.compile(r"^=="), TokenType.LOGICAL_OPERATOR),
-    (re.compile(r"^!="), TokenType.LOGICAL_OPERATOR),
-    (re.compile(r"^<="), TokenType.LOGICAL_OPERATOR),
-    (re.compile(r"^>="), TokenType.LOGICAL_OPERATOR),
-    (re.compile(r"^<"), TokenType.LOGICAL_OPERATOR),
-    (re.compile(r"^>"), TokenType.LOGICAL_OPERATOR),
+    (re.compile(r"&&"),  TokenType.LOGICAL_OPERATOR),
+    (re.compile(r"\|\|"), TokenType.LOGICAL_OPERATOR),
+    (re.compile(r"=="), TokenType.LOGICAL_OPERATOR),
+    (re.compile(r"!="), TokenType.LOGICAL_OPERATOR),
+    (re.compile(r"<="), TokenType.LOGICAL_OPERATOR),
+    (re.compile(r">="), TokenType.LOGICAL_OPERATOR),
+    (re.compile(r"<"), TokenType.LOGICAL_OPERATOR),
+    (re.compile(r">"), TokenType.LOGICAL_OPERATOR),
 
-    (re.compile(r"^!"), TokenType.NOT),
+    (re.compile(r"!"), TokenType.NOT),
 
     # Assignment:
-    (re.compile(r"^="), TokenType.ASSIGNMENT),
+    (re.compile(r"="), TokenType.ASSIGNMENT),
 
     # Math operators: +, -, *, /:
-    (re.compile(r"^[*/%]"), TokenType.MULTIPLICATIVE_OPERATOR),
-    (re.compile(r"^[+-]"), TokenType.ADDITIVE_OPERATOR),
+    (re.compile(r"[*/%]"), TokenType.MULTIPLICATIVE_OPERATOR),
+    (re.compile(r"[+-]"), TokenType.ADDITIVE_OPERATOR),
 
     # Double-quoted strings
     # TODO: escape character \" and
-    (re.compile(r"^\"[^\"]*\""), TokenType.STRING),
+    (re.compile(r"\"[^\"]*\""), TokenType.STRING),
 )
 
+trivia = frozenset((TokenType.NEW_LINE, TokenType.SPACE, TokenType.COMMENTS))
+
+def _master_pattern(specs) -> re.Pattern:
+    # Specs are tried in order, so adjacent specs of the same type are merged
+    # into one named alternative and the first matching alternative wins,
+    # exactly like trying each spec in turn.
+    groups = list[tuple[TokenType, list[str]]]()
+    for reg, token_type in specs:
+        if groups and groups[-1][0] == token_type:
+            groups[-1][1].append(reg.pattern)
+        else:
+            groups.append((token_type, [reg.pattern]))
+    names = set()
+    alternatives = list[str]()
+    for token_type, patterns in groups:
+        if token_type.name in names:
+            raise Exception(f"Token type {token_type} must be declared by adjacent specs")
+        names.add(token_type.name)
+        alternatives.append(f"(?P<{token_type.name}>{'|'.join(patterns)})")
+    return re.compile("|".join(alternatives))
+
+master_pattern = _master_pattern(specs)
+_token_types = {token_type.name: token_type for token_type in TokenType}
+
 @dataclass
 class Token:
     type: TokenType
@@ -117,6 +152,56 @@ class Token:
         return f"Token({self.type}, {self.value}, row={self.row}, col={self.col}, col_end={self.col_end}, cursor={self.cursor})"
 
 
+types_by_code = [None] * (max(token_type.value for token_type in TokenType) + 1)
+for token_type in TokenType:
+    types_by_code[token_type.value] = token_type
+
+class TokenTable:
+    """Tokens of one script stored as parallel ``array('i')`` columns.
+
+    Values are sliced from the script and ``Token`` objects are only built
+    when one is indexed, so a table costs 20 bytes per token.
+    """
+    __slots__ = ("script", "types", "starts", "ends", "rows", "cols")
+
+    def __init__(self, script: str = ""):
+        self.script = script
+        self.types = array("i")
+        self.starts = array("i")
+        self.ends = array("i")
+        self.rows = array("i")
+        self.cols = array("i")
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, index: int | slice):
+        if isinstance(index, slice):
+            return [self.token(i) for i in range(*index.indices(len(self.types)))]
+        if index < 0:
+            index += len(self.types)
+        return self.token(index)
+
+    def __iter__(self):
+        for index in range(len(self.types)):
+            yield self.token(index)
+
+    def token(self, index: int) -> Token:
+        start = self.starts[index]
+        end = self.ends[index]
+        col = self.cols[index]
+        return Token(types_by_code[self.types[index]], self.script[start:end], self.rows[index], col, col + end - start, start)
+
+    def type_at(self, index: int) -> TokenType:
+        return types_by_code[self.types[index]]
+
+    def value_at(self, index: int) -> str:
+        return self.script[self.starts[index]:self.ends[index]]
+
+    def nbytes(self) -> int:
+        return sum(column.itemsize * len(column) for column in (self.types, self.starts, self.ends, self.rows, self.cols))
+
+
 class Tokenizer:
 
     def __init__(self):
@@ -126,22 +211,12 @@ class Tokenizer:
         self.col = 0
         self.row = 0
         self._current_token_index = 0
-        self.tokens = list[Token]()
+        self.tokens = TokenTable()
         self.checkpoint = list[int]()
     
     def init(self, script: str):
-        self.checkpoint = list[int]()
-        self.tokens = list[Token]()
-        self._current_token_index = 0
-        self._current_token = None
-        self.script = script
-        self.cursor = 0
-        self.col = 0
-        self.row = 0
-        self._get_next_token()
-        while self._current_token is not None:
-            self.tokens.append(self._current_token)
-            self._get_next_token()
+        self.init_table(script)
+        self._scan()
 
     def checkpoint_push(self):
         self.checkpoint.append(self._current_token_index)
@@ -170,7 +245,7 @@ class Tokenizer:
         return self.tokens[self._current_token_index - 1]
     
     def get_next(self):
-        if self._current_token_index >= len(self.tokens):
+        if self._current_token_index + 1 >= len(self.tokens):
             return None
         return self.tokens[self._current_token_index + 1]
 
@@ -180,36 +255,75 @@ class Tokenizer:
         return self.tokens[self._current_token_index]
 
     def tokenType(self):
-        if self._current_token_index >= len(self.tokens):
+        types = self.tokens.types
+        if self._current_token_index >= len(types):
             return None
-        return self.tokens[self._current_token_index].type
+        return types_by_code[types[self._current_token_index]]
 
+    def peek_type(self, n: int = 0):
+        """Type of the token ``n`` places after the current one, without moving."""
+        types = self.tokens.types
+        index = self._current_token_index + n
+        if index >= len(types):
+            return None
+        return types_by_code[types[index]]
 
-    def _get_next_token(self):
-        if self._is_eof():
-            self._current_token = None
+    def token_value(self):
+        if self._current_token_index >= len(self.tokens):
             return None
-        _string = self.script[self.cursor:]
-        for spec in specs:
-            tokenValue, offset = self.match(spec[0], _string)
-            if tokenValue == None:
-                continue
-            if spec[1] == TokenType.NEW_LINE:
-                self.row += 1
-                self.col = 0
-                return self._get_next_token()
-            if  spec[1] == TokenType.COMMENTS:
-                return self._get_next_token()
-            if spec[1] == TokenType.SPACE:
-                self.col += offset
-                return self._get_next_token()
-            if spec[1] == None:
-                return self._get_next_token()
-            self._current_token = Token(spec[1],tokenValue, self.cursor, self.row, self.col, self.col + offset)
-            self.col += offset
-            return self.get_current_token()
-        raise Exception("Unknown token: " + _string[0])
-    
+        return self.tokens.value_at(self._current_token_index)
+
+    def init_range(self, script: str, start: int, end: int, row: int = 0, col: int = 0):
+        """Tokenize only ``script[start:end]``; positions stay absolute.
+
+        ``row`` and ``col`` give the position of ``start`` in the script.
+        ``start`` and ``end`` must fall on token boundaries.
+        """
+        self.init_table(script)
+        self._scan(start, end, row, start - col)
+
+    def init_table(self, script: str):
+        self.checkpoint = list[int]()
+        self.tokens = TokenTable(script)
+        self._current_token_index = 0
+        self._current_token = None
+        self.script = script
+        self.cursor = 0
+        self.col = 0
+        self.row = 0
+
+    def _scan(self, cursor: int = 0, end: int = None, row: int = 0, line_start: int = 0):
+        script = self.script
+        match = master_pattern.match
+        token_types = _token_types
+        tokens = self.tokens
+        append_type = tokens.types.append
+        append_start = tokens.starts.append
+        append_end = tokens.ends.append
+        append_row = tokens.rows.append
+        append_col = tokens.cols.append
+        if end is None:
+            end = len(script)
+        while cursor < end:
+            matched = match(script, cursor)
+            if matched is None:
+                raise Exception("Unknown token: " + script[cursor])
+            token_type = token_types[matched.lastgroup]
+            next_cursor = matched.end()
+            if token_type is TokenType.NEW_LINE:
+                row += 1
+                line_start = next_cursor
+            elif token_type not in trivia:
+                append_type(token_type.value)
+                append_start(cursor)
+                append_end(next_cursor)
+                append_row(row)
+                append_col(cursor - line_start)
+            cursor = next_cursor
+        self.cursor = cursor
+        self.row = row
+        self.col = cursor - line_start
+
     def _is_eof(self):
         return self.cursor == len(self.script)
     
@@ -219,13 +333,6 @@ class Tokenizer:
     def get_current_token(self):
         return self._current_token
     
-    def match(self, reg: re, _script):
-        matched = reg.search(_script)
-        if matched == None:
-            return None,0
-        self.cursor = self.cursor + matched.span(0)[1]
-        return matched[0], matched.span(0)[1]
-    
     def eat(self, value: str | TokenType):
         if isinstance(value, str):
             return self.eat_value(value)
@@ -251,9 +358,172 @@ class Tokenizer:
         return token
     
     def type_is(self, tokenType: TokenType):
-        if self.token() is None:
-            return False
-        return self.token().type == tokenType
+        return self.tokenType() == tokenType
     
     def the_rest(self):
-        return self.tokens[self._current_token_index:]
\ No newline at end of file
+        return self.tokens[self._current_token_index:]
+
+def read_chunks(source, chunk_size: int = 1 << 16) -> Iterator[str]:
+    """Read a path, a file object or an mmap as decoded text chunks."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as file:
+            yield from read_chunks(file, chunk_size)
+        return
+    decoder = None
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        if not isinstance(chunk, str):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder("utf-8")()
+            chunk = decoder.decode(chunk)
+        yield chunk
+    if decoder is not None:
+        rest = decoder.decode(b"", final=True)
+        if rest:
+            yield rest
+
+def stream_tokens(chunks) -> Iterator[Token]:
+    """Scan text chunks lazily, yielding tokens with absolute positions.
+
+    A match is only trusted once at least two characters follow it, which is
+    enough for every spec to see its full extent (``12.`` may still become a
+    float, ``=`` may still become ``==``). Otherwise more input is read first.
+    """
+    match = master_pattern.match
+    token_types = _token_types
+    chunks = iter(chunks)
+    buffer = ""
+    offset = 0
+    cursor = 0
+    row = 0
+    line_start = 0
+    eof = False
+    while True:
+        matched = match(buffer, cursor) if cursor < len(buffer) else None
+        if not eof and (matched is None or matched.end() >= len(buffer) - 1):
+            chunk = next(chunks, None)
+            if chunk is None:
+                eof = True
+            else:
+                buffer = buffer[cursor:] + chunk
+                offset += cursor
+                cursor = 0
+            continue
+        if matched is None:
+            if cursor < len(buffer):
+                raise Exception("Unknown token: " + buffer[cursor])
+            return
+        token_type = token_types[matched.lastgroup]
+        next_cursor = matched.end()
+        if token_type == TokenType.NEW_LINE:
+            row += 1
+            line_start = offset + next_cursor
+        elif token_type not in trivia:
+            start = offset + cursor
+            col = start - line_start
+            yield Token(token_type, matched.group(), row, col, col + next_cursor - cursor, start)
+        cursor = next_cursor
+
+
+class StreamTokenizer(Tokenizer):
+    """Tokenizer that reads its source lazily.
+
+    ``init`` accepts a path, a file object or an mmap. Tokens are produced on
+    demand and kept in a window that starts at the oldest checkpoint (or the
+    previous token) and ends at the furthest token looked at, so memory does
+    not grow with the size of the source. ``self.tokens`` holds the window and
+    ``self._base`` is the absolute index of its first token.
+    """
+
+    def __init__(self, lookahead: int = 64, chunk_size: int = 1 << 16):
+        super().__init__()
+        self.lookahead = lookahead
+        self.chunk_size = chunk_size
+        self._stream = iter(())
+        self._base = 0
+
+    def init(self, source):
+        self.checkpoint = list[int]()
+        self.tokens = list[Token]()
+        self._current_token_index = 0
+        self._current_token = None
+        self._base = 0
+        self._stream = stream_tokens(read_chunks(source, self.chunk_size))
+
+    def _fill(self, index: int) -> bool:
+        tokens = self.tokens
+        while index - self._base >= len(tokens):
+            token = next(self._stream, None)
+            if token is None:
+                return False
+            tokens.append(token)
+        return True
+
+    def _release(self):
+        keep = self._current_token_index - 1
+        if self.checkpoint:
+            keep = min(keep, min(self.checkpoint))
+        drop = keep - self._base
+        if drop >= self.lookahead:
+            del self.tokens[:drop]
+            self._base += drop
+
+    def _get(self, index: int):
+        if index < self._base:
+            raise Exception(f"Token {index} has left the lookahead window")
+        if not self._fill(index):
+            return None
+        return self.tokens[index - self._base]
+
+    def next(self):
+        if self._fill(self._current_token_index):
+            self._current_token_index += 1
+            self._release()
+        return self.token()
+
+    def next_token_type(self):
+        token = self.next()
+        if token is None:
+            return None
+        return token.type
+
+    def prev(self):
+        if self._current_token_index > 0:
+            self._current_token_index -= 1
+        return self.token()
+
+    def get_prev(self):
+        if self._current_token_index == 0:
+            return None
+        return self._get(self._current_token_index - 1)
+
+    def get_next(self):
+        return self._get(self._current_token_index + 1)
+
+    def token(self):
+        return self._get(self._current_token_index)
+
+    def tokenType(self):
+        token = self._get(self._current_token_index)
+        if token is None:
+            return None
+        return token.type
+
+    def peek_type(self, n: int = 0):
+        token = self._get(self._current_token_index + n)
+        if token is None:
+            return None
+        return token.type
+
+    def token_value(self):
+        token = self._get(self._current_token_index)
+        if token is None:
+            return None
+        return token.value
+
+    def the_rest(self):
+        while self._fill(self._base + len(self.tokens)):
+            pass
+        return self.tokens[self._current_token_index - self._base:]
@@ -0,0 +1,909 @@
+import linecache
+import math
+import re
+import sys
+from itertools import count
+from types import FunctionType
+from typing import Callable
+
+from attr import dataclass
+
+from runtime.ast import Assignment, BinaryExpression, Block, BoolLiteral, BreakStatement, CallExpression, EmptyStatement, FloatLiteral, Fun, Identifier, IfStatement, IntLiteral, ListExpression, MapExpression, Node, Program, ReturnStatement, ReturnValue, StringLiteral, UnaryExpression, VariableDeclaration, WhileStatement, walk
+from runtime.compiler import BREAK
+from runtime.memo import MISSING, Memoized
+from runtime.persistent import PersistentMap, PersistentVector
+from runtime.runtime import UNDECLARED, Runtime
+
+# A program becomes the Python function ``_program(_runtime)``: every ``let``
+# is a local of the Python function running its scope, every ``Fun`` a nested
+# ``def`` and a call a Python call. A transpiled function returns the value
+# of its ``return`` directly, BREAK when a ``break`` ends it, or END when its
+# body runs to the end. Names the program calls without declaring them are
+# globals, bound to the host's functions each time the program runs.
+
+# Python frames a transpiled program may nest. Calls are Python calls, so
+# the recursion limit is raised to this while the program runs.
+MAX_DEPTH = 200_000
+
+python_operators = {
+    "+": "+",
+    "-": "-",
+    "*": "*",
+    "/": "/",
+    "%": "%",
+    "<": "<",
+    ">": ">",
+    "<=": "<=",
+    ">=": ">=",
+    "==": "==",
+    "!=": "!=",
+}
+
+# Binding strength of the arithmetic operators. A left operand binding at
+# least as tightly needs no parentheses, which keeps long sums from nesting
+# deeper than Python's parser allows.
+_levels = {"+": 1, "-": 1, "*": 2, "/": 2, "%": 2}
+
+literals = frozenset((IntLiteral, FloatLiteral, StringLiteral, BoolLiteral))
+
+
+class End():
+
+    def __repr__(self) -> str:
+        return "END"
+
+# Returned by a transpiled function whose body ended without ``return``.
+END = End()
+
+
+class _Break(Exception):
+    """Ends a top-level statement from a ``break`` inside it."""
+
+
+class TranspiledFun:
+    """Function value of the Python backend as the other engines see it."""
+    __slots__ = ("function",)
+
+    def __init__(self, function: FunctionType):
+        self.function = function
+
+    def exec(self, args: list):
+        if len(args) < self.function.__code__.co_argcount:
+            raise IndexError("list index out of range")
+        result = self.function(*args)
+        if result is END:
+            return None
+        if result is BREAK:
+            return result
+        return ReturnValue(result)
+
+
+@dataclass
+class Transpiled:
+    source: str
+    # Index into ``program.body`` of the statement each source line comes
+    # from, None for lines of the ``_program`` wrapper.
+    statements: list
+    # Python global for each name called but not declared by the program.
+    externals: dict
+    # Python global for each object the source refers to, like memo tables.
+    constants: dict
+
+
+def transpile(program: Program) -> Transpiled:
+    """Python source of ``program``, see ``Transpiler``."""
+    return Transpiler(program).program(program)
+
+
+def compile_program(program: Program, positions: list[tuple[int, int]] = None, max_depth: int = MAX_DEPTH) -> Callable[[Runtime], ReturnValue | None]:
+    """Transpile ``program`` and compile it with CPython.
+
+    ``positions`` gives the ``(row, col)`` of each statement of
+    ``program.body``, as ``located_program_parser`` returns them. An error
+    raised while the program runs gets a note with the position of the
+    top-level statement it came from, and tracebacks show the generated
+    source.
+    """
+    transpiled = transpile(program)
+    filename = f"<dotchain-{next(_programs)}>"
+    lines = transpiled.source.splitlines(True)
+    linecache.cache[filename] = (len(transpiled.source), None, lines, filename)
+    namespace = dict()
+    exec(compile(transpiled.source, filename, "exec"), namespace)
+    code = namespace["_program"].__code__
+    externals = tuple(transpiled.externals.items())
+    constants = transpiled.constants
+
+    def run_program(runtime: Runtime):
+        # Called names the program does not declare are resolved once, like
+        # the injected globals of a module.
+        scope = dict(_helpers)
+        scope.update(constants)
+        for name, python in externals:
+            scope[python] = _bind(runtime, name)
+        limit = sys.getrecursionlimit()
+        if limit < max_depth:
+            sys.setrecursionlimit(max_depth)
+        try:
+            result = FunctionType(code, scope, "_program")(runtime)
+        except Exception as error:
+            if _missing_argument(error, filename):
+                # As the other engines, which index past the arguments.
+                missing = IndexError("list index out of range").with_traceback(error.__traceback__)
+                _locate(missing, filename, transpiled.statements, positions)
+                raise missing from None
+            _locate(error, filename, transpiled.statements, positions)
+            raise
+        finally:
+            sys.setrecursionlimit(limit)
+        if result is not None and type(result.value) is FunctionType:
+            return ReturnValue(TranspiledFun(result.value))
+        return result
+    return run_program
+
+
+_programs = count()
+
+
+def _locate(error: Exception, filename: str, statements: list, positions: list[tuple[int, int]] | None):
+    line = None
+    traceback = error.__traceback__
+    while traceback is not None:
+        if traceback.tb_frame.f_code.co_filename == filename:
+            line = traceback.tb_lineno
+        traceback = traceback.tb_next
+    if line is None or statements[line - 1] is None:
+        return
+    index = statements[line - 1]
+    if positions is None:
+        error.add_note(f"in top-level statement {index + 1} of the program")
+    else:
+        row, col = positions[index]
+        error.add_note(f"in the statement at row={row}, col={col}")
+
+
+_missing = re.compile(r"[\w.<>]+\(\) missing \d+ required positional arguments?: ")
+
+
+def _missing_argument(error: Exception, filename: str) -> bool:
+    """Whether ``error`` is a call from the program to one of its functions with too few arguments.
+
+    Python raises it in the caller, before the callee runs, so the innermost
+    frame is one of the program's.
+    """
+    if type(error) is not TypeError or not _missing.match(str(error)):
+        return False
+    traceback = error.__traceback__
+    while traceback.tb_next is not None:
+        traceback = traceback.tb_next
+    return traceback.tb_frame.f_code.co_filename == filename
+
+
+def _bind(runtime: Runtime, name: str) -> Callable:
+    """Python callable for a name the program calls without declaring it.
+
+    Like ``CallExpression.resolve``, a runtime holding the name wins over an
+    external function of the root runtime. The callable returns what the
+    tree engine's call would, so an external function is used as it is.
+    """
+    scope = runtime
+    while name not in scope.context:
+        if scope.parent is None:
+            external = scope.exteral_fun.get(name)
+            return _nothing if external is None else external
+        scope = scope.parent
+    fun = scope.context[name]
+    return lambda *args: fun.exec([_export(arg) for arg in args])
+
+
+def _nothing(*args):
+    return None
+
+
+def _callable(runtime: Runtime, name: str, fun) -> Callable:
+    """Python callable returning what a transpiled function would for ``fun``.
+
+    ``fun`` is the value a call found in the program, or UNDECLARED if none
+    of the program's variables of that name is declared yet.
+    """
+    if fun is UNDECLARED:
+        scope = runtime
+        while name not in scope.context:
+            if scope.parent is None:
+                external = scope.exteral_fun.get(name)
+                if external is None:
+                    return _nothing_returned
+                return lambda *args: _signal(external(*args))
+            scope = scope.parent
+        fun = scope.context[name]
+    if type(fun) is TranspiledFun:
+        return fun.function
+    # A value without ``exec`` fails once it is called, as in the tree engine.
+    return lambda *args: _signal(fun.exec([_export(arg) for arg in args]))
+
+
+def _nothing_returned(*args):
+    return END
+
+
+def _signal(result):
+    """What a transpiled function returns for another engine's call result."""
+    if result is None:
+        return END
+    if type(result) is ReturnValue:
+        return result.value
+    if isinstance(result, BreakStatement):
+        return BREAK
+    return END
+
+
+def _value(result):
+    """Value of a call expression whose callee returned END or BREAK."""
+    if result is END:
+        return None
+    raise AttributeError(f"'{type(result).__name__}' object has no attribute 'value'")
+
+
+def _result(result):
+    """What ``FunEnv.exec`` returns for a transpiled function's result."""
+    if result is END:
+        return None
+    if result is BREAK:
+        return result
+    return ReturnValue(_export(result))
+
+
+def _export(value):
+    return TranspiledFun(value) if type(value) is FunctionType else value
+
+
+def _store(runtime: Runtime, names: tuple, values: tuple):
+    # Top-level variables are left in the runtime, as the tree engine leaves
+    # them, with functions wrapped for the other engines.
+    context = runtime.context
+    versions = runtime.versions
+    for name, value in zip(names, values):
+        if value is not UNDECLARED:
+            if name in versions and name not in context:
+                versions[name] += 1
+            context[name] = _export(value)
+
+
+_helpers = {
+    "_U": UNDECLARED,
+    "_END": END,
+    "_BREAK": BREAK,
+    "_Break": _Break,
+    "_ReturnValue": ReturnValue,
+    "_function": FunctionType,
+    "_callable": _callable,
+    "_signal": _signal,
+    "_value": _value,
+    "_result": _result,
+    "_MISSING": MISSING,
+    "_vector": PersistentVector.from_iterable,
+    "_map": PersistentMap.from_items,
+    "_store": _store,
+}
+
+
+class Binding:
+    """A variable of one scope and the Python local holding it."""
+    __slots__ = ("python", "scope", "fun", "returns", "reset")
+
+    def __init__(self, python: str, scope: "Scope"):
+        self.python = python
+        self.scope = scope
+        # The function of the scope's only ``let`` of a name never assigned:
+        # once declared, the variable holds that function for good.
+        self.fun = None
+        self.returns = False
+        # Set when a reference may run before the ``let``, so the local
+        # starts out UNDECLARED.
+        self.reset = False
+
+
+class Scope:
+    """Compile-time scope, like ``compiler.Scope`` with Python locals for slots.
+
+    ``declared`` holds the names whose ``let`` has run by the point being
+    transpiled, in every run of the scope. Other bindings may or may not be
+    declared when a reference runs: in the program scope the host may have
+    declared the name, and a function may be called before or after a
+    ``let`` that follows it.
+    """
+
+    def __init__(self, kind: str, owner: "Def", parent: "Scope" = None):
+        self.kind = kind
+        self.owner = owner
+        self.parent = parent
+        self.bindings = dict[str, Binding]()
+        self.declared = set[str]()
+
+
+class Def:
+    """A Python function being generated: ``_program``, a Dotchain function or a block."""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        # (indentation, text, top-level statement) of every line of the body.
+        self.lines = list[tuple[int, str, int]]()
+        self.depth = 0
+        self.nonlocals = set[str]()
+        # Binding of the function itself, when its tail calls to itself
+        # may become a loop, whether one did, and its parameters.
+        self.loop = None
+        self.looped = False
+        self.params = list[str]()
+
+
+class Transpiler:
+    """Generates the Python source of a program.
+
+    A reference to a name resolves at transpile time to the bindings that
+    may hold it, innermost first, like in the closure engine. One whose
+    ``let`` is known to have run is used directly; the others are checked
+    against UNDECLARED and fall through to the next one and finally to the
+    host runtime. A function that is always called with the right number of
+    arguments once its name is declared is called directly, and a tail call
+    to itself becomes a loop when it makes no closures that could tell.
+
+    A block that declares runs in the Python function of its scope under
+    fresh names, unless a function made in it may refer to its variables:
+    such a block becomes a nested ``def`` run once per entry, so each
+    closure keeps its own variables as with the tree engine's runtimes.
+    """
+
+    def __init__(self, program: Program):
+        self.counter = count()
+        self.assigned = {node.id.name for node in walk(program) if type(node) is Assignment}
+        self.externals = dict[str, str]()
+        self.constants = dict[str, object]()
+        self.current: Def = None
+        self.index = 0
+        # State of the top-level statement being transpiled: the Python loops
+        # and compound statements around the current line, whether the
+        # statement is a ``while`` and whether a ``break`` raises _Break.
+        self.loops = 0
+        self.nesting = 0
+        self.top_while = False
+        self.breaks = False
+
+    def program(self, program: Program) -> Transpiled:
+        target = Def("program")
+        scope = Scope("program", target)
+        self.collect(scope, Block(program.body))
+        self.current = target
+        for index, statement in enumerate(program.body):
+            self.index = index
+            start = len(target.lines)
+            self.loops = self.nesting = 0
+            self.top_while = type(statement) is WhileStatement
+            self.breaks = False
+            self.statement(statement, scope)
+            if self.breaks:
+                body = [(depth + 1, text, line) for depth, text, line in target.lines[start:]]
+                target.lines[start:] = [(0, "try:", index), *body, (0, "except _Break:", index), (1, "pass", index)]
+        bindings = scope.bindings
+        header = ["def _program(_runtime):"]
+        if bindings:
+            header.append("    _context = _runtime.context")
+            header.extend(f"    {binding.python} = _context.get({name!r}, _U)" for name, binding in bindings.items())
+            header.append("    try:")
+            offset = 2
+        else:
+            offset = 1
+        source = list(header)
+        statements = [None] * len(header)
+        for depth, text, index in target.lines:
+            source.append("    " * (depth + offset) + text)
+            statements.append(index)
+        source.append("    " * offset + "return None")
+        if bindings:
+            names = "".join(f"{name!r}, " for name in bindings)
+            values = "".join(f"{binding.python}, " for binding in bindings.values())
+            source.append("    finally:")
+            source.append(f"        _store(_runtime, ({names}), ({values}))")
+        statements.extend([None] * (len(source) - len(statements)))
+        return Transpiled("\n".join(source) + "\n", statements, {name: python for name, python in self.externals.items()}, dict(self.constants))
+
+    # Output
+
+    def emit(self, text: str):
+        self.current.lines.append((self.current.depth, text, self.index))
+
+    def indented(self, emit: Callable):
+        self.current.depth += 1
+        emit()
+        self.current.depth -= 1
+
+    def splice(self, target: Def, header: str):
+        """Emit ``target`` as a nested ``def`` with the given first line."""
+        self.emit(header)
+        base = self.current.depth + 1
+        if target.nonlocals:
+            self.current.lines.append((base, f"nonlocal {', '.join(sorted(target.nonlocals))}", self.index))
+        self.current.lines.extend((base + depth, text, index) for depth, text, index in target.lines)
+
+    def python_name(self, name: str) -> str:
+        base = name if name.isascii() and name.isidentifier() else "v"
+        return f"{base}_{next(self.counter)}"
+
+    # Names
+
+    def declare(self, scope: Scope, name: str) -> Binding:
+        binding = scope.bindings.get(name)
+        if binding is None:
+            binding = scope.bindings[name] = Binding(self.python_name(name), scope)
+        return binding
+
+    def collect(self, scope: Scope, block: Block):
+        """Declare the names ``block`` declares in place."""
+        values = dict[str, list[Node]]()
+        for statement in _in_place(block):
+            if type(statement) is VariableDeclaration:
+                name = statement.id.name
+                self.declare(scope, name)
+                values.setdefault(name, []).append(statement.value)
+        for name, declared in values.items():
+            if len(declared) != 1 or name in self.assigned or name in scope.declared:
+                continue
+            value = declared[0]
+            if type(value) is Memoized:
+                # The memoizing ``def`` takes and returns what the function does.
+                value = value.fun
+            if type(value) is Fun:
+                binding = scope.bindings[name]
+                binding.fun = value
+                binding.returns = _returns_value(value)
+
+    def resolve(self, scope: Scope, name: str) -> list[tuple[Binding, bool]]:
+        """Bindings a reference may use, innermost first, and whether each is declared.
+
+        Bindings not declared yet in a scope that runs the reference before
+        the ``let`` are left out. The list ends at the first declared one.
+        """
+        found = list()
+        crossed = False
+        while scope is not None:
+            binding = scope.bindings.get(name)
+            if binding is not None:
+                if name in scope.declared:
+                    found.append((binding, True))
+                    break
+                if crossed or scope.kind == "program":
+                    found.append((binding, False))
+                    if scope.kind != "program":
+                        binding.reset = True
+            if scope.kind == "function":
+                crossed = True
+            scope = scope.parent
+        return found
+
+    def read(self, scope: Scope, name: str, missing: str = None) -> str:
+        found = self.resolve(scope, name)
+        if found and found[-1][1]:
+            expression = found.pop()[0].python
+        elif missing is not None:
+            expression = missing
+        else:
+            expression = f"_runtime.deep_get_value({name!r})"
+        for binding, _ in reversed(found):
+            python = binding.python
+            expression = f"({python} if {python} is not _U else {expression})"
+        return expression
+
+    def assign(self, scope: Scope, name: str, value: str):
+        found = self.resolve(scope, name)
+        for binding, _ in found:
+            if binding.scope.owner is not self.current:
+                self.current.nonlocals.add(binding.python)
+        if not found:
+            self.emit(f"_runtime.assign({name!r}, {value})")
+            return
+        if found[0][1]:
+            self.emit(f"{found[0][0].python} = {value}")
+            return
+        self.emit(f"_v = {value}")
+        keyword = "if"
+        for binding, declared in found:
+            python = binding.python
+            self.emit("else:" if declared else f"{keyword} {python} is not _U:")
+            self.indented(lambda: self.emit(f"{python} = _v"))
+            if declared:
+                return
+            keyword = "elif"
+        self.emit("else:")
+        self.indented(lambda: self.emit(f"_runtime.assign({name!r}, _v)"))
+
+    # Statements
+
+    def block(self, block: Block, scope: Scope, tail: bool = False):
+        """Emit the statements of ``block``; with ``tail`` the last one ends a function body."""
+        start = len(self.current.lines)
+        last = len(block.body) - 1
+        for index, statement in enumerate(block.body):
+            self.statement(statement, scope, tail and index == last)
+        if len(self.current.lines) == start:
+            self.emit("pass")
+
+    def statement(self, node: Node, scope: Scope, tail: bool = False):
+        kind = type(node)
+        if kind is VariableDeclaration:
+            self.declaration(node, scope)
+        elif kind is Assignment:
+            self.assign(scope, node.id.name, self.expression(node.value, scope))
+        elif kind is CallExpression:
+            self.call_statement(node, scope, tail)
+        elif kind is ReturnStatement:
+            self.return_statement(node, scope, tail)
+        elif kind is IfStatement:
+            self.if_statement(node, scope, tail)
+        elif kind is WhileStatement:
+            self.while_statement(node, scope)
+        elif kind is BreakStatement:
+            self.emit_break()
+        elif kind is Block or kind is Fun:
+            # Fun.exec runs the body in place.
+            self.nesting += 1
+            self.block(node if kind is Block else node.body, scope, tail)
+            self.nesting -= 1
+        elif kind is not EmptyStatement:
+            self.emit(self.expression(node, scope))
+
+    def declaration(self, node: VariableDeclaration, scope: Scope):
+        name = node.id.name
+        binding = scope.bindings[name]
+        error = f"raise Exception({f'Variable {name} is already declared'!r})"
+        if name in scope.declared:
+            self.emit(self.expression(node.value, scope))
+            self.emit(error)
+            return
+        check = f"if {binding.python} is not _U: {error}"
+        if type(node.value) is Fun:
+            # Making a function has no effects, so the check can come first,
+            # and its body only runs once the name is bound.
+            if scope.kind == "program":
+                self.emit(check)
+            scope.declared.add(name)
+            self.function(node.value, scope, binding.python, binding)
+            return
+        if type(node.value) is Memoized:
+            if scope.kind == "program":
+                self.emit(check)
+            scope.declared.add(name)
+            self.memoized(node.value, scope, binding.python)
+            return
+        value = self.expression(node.value, scope)
+        if scope.kind == "program":
+            self.emit(f"_v = {value}")
+            self.emit(check)
+            value = "_v"
+        self.emit(f"{binding.python} = {value}")
+        scope.declared.add(name)
+
+    def return_statement(self, node: ReturnStatement, scope: Scope, tail: bool):
+        if tail and type(node.value) is CallExpression and self.loop_call(node.value, scope, True):
+            return
+        self.emit_return(self.expression(node.value, scope))
+
+    def emit_return(self, value: str):
+        if self.current.kind == "function":
+            self.emit(f"return {value}")
+        else:
+            self.emit(f"return _ReturnValue({value})")
+
+    def emit_break(self):
+        if self.current.kind != "program":
+            self.emit("return _BREAK")
+        elif not self.nesting:
+            # The top-level statement ends here anyway.
+            self.emit("pass")
+        elif self.top_while and self.loops == 1:
+            self.emit("break")
+        else:
+            self.emit("raise _Break")
+            self.breaks = True
+
+    def propagate(self):
+        """Emit what the caller does with ``_r``, a callee's result other than END."""
+        kind = self.current.kind
+        if kind == "function":
+            self.emit("return _r")
+        elif kind == "block":
+            self.emit("return _r if _r is _BREAK else _ReturnValue(_r)")
+        else:
+            self.emit_program_result("_ReturnValue(_r)")
+
+    def emit_program_result(self, result: str):
+        if not self.nesting:
+            # A break signal ends the top-level statement, which ends here.
+            self.emit("if _r is not _BREAK:")
+            self.indented(lambda: self.emit(f"return {result}"))
+            return
+        self.emit("if _r is _BREAK:")
+        self.indented(self.emit_break)
+        self.emit("else:")
+        self.indented(lambda: self.emit(f"return {result}"))
+
+    def if_statement(self, node: IfStatement, scope: Scope, tail: bool):
+        self.emit(f"if {self.expression(node.test, scope)}:")
+        self.nesting += 1
+        self.indented(lambda: self.scope_block(node.consequent, scope, tail))
+        if node.alternate.body:
+            self.emit("else:")
+            self.indented(lambda: self.scope_block(node.alternate, scope, tail))
+        self.nesting -= 1
+
+    def while_statement(self, node: WhileStatement, scope: Scope):
+        self.emit(f"while {self.expression(node.test, scope)}:")
+        self.nesting += 1
+        self.loops += 1
+        self.indented(lambda: self.scope_block(node.body, scope))
+        self.loops -= 1
+        self.nesting -= 1
+
+    def scope_block(self, block: Block, scope: Scope, tail: bool = False):
+        """Emit a block that runs in a child scope of ``scope`` when it declares."""
+        if not block.declares():
+            self.block(block, scope, tail)
+            return
+        if _captures(block):
+            self.block_function(block, scope)
+            return
+        inner = Scope("block", self.current, scope)
+        self.collect(inner, block)
+        start = len(self.current.lines)
+        depth = self.current.depth
+        self.block(block, inner, tail)
+        self.resets(inner, start, depth)
+
+    def block_function(self, block: Block, scope: Scope):
+        """Emit ``block`` as a nested ``def`` returning None, BREAK or a ReturnValue."""
+        outer = self.current
+        target = Def("block")
+        inner = Scope("block", target, scope)
+        self.collect(inner, block)
+        self.current = target
+        self.block(block, inner)
+        self.resets(inner, 0, 0)
+        self.current = outer
+        name = f"_block_{next(self.counter)}"
+        self.splice(target, f"def {name}():")
+        self.emit(f"if (_r := {name}()) is not None:")
+        kind = outer.kind
+        if kind == "function":
+            self.indented(lambda: self.emit("return _r if _r is _BREAK else _r.value"))
+        elif kind == "block":
+            self.indented(lambda: self.emit("return _r"))
+        else:
+            self.indented(lambda: self.emit_program_result("_r"))
+
+    def resets(self, scope: Scope, start: int, depth: int):
+        names = [binding.python for binding in scope.bindings.values() if binding.reset]
+        if names:
+            self.current.lines.insert(start, (depth, f"{' = '.join(names)} = _U", self.index))
+
+    def function(self, node: Fun, scope: Scope, python: str, binding: Binding = None):
+        """Emit ``node`` as ``def python(...)``; ``binding`` is the variable it is declared as."""
+        outer = self.current
+        target = Def("function")
+        inner = Scope("function", target, scope)
+        duplicate = None
+        for param in node.params:
+            name = param.name
+            if name in inner.bindings:
+                duplicate = duplicate or name
+                target.params.append(self.python_name(name))
+            else:
+                target.params.append(self.declare(inner, name).python)
+                inner.declared.add(name)
+        self.current = target
+        if duplicate is not None:
+            # FunEnv only fails once the duplicate parameter is declared.
+            self.emit(f"raise Exception({f'Variable {duplicate} is already declared'!r})")
+        else:
+            self.collect(inner, node.body)
+            if binding is not None and binding.fun is node and not any(type(item) is Fun for item in walk(node.body)):
+                target.loop = binding
+                target.depth = 1
+            self.block(node.body, inner, True)
+            self.resets(inner, 0, target.depth)
+            body = node.body.body
+            if not body or type(body[-1]) is not ReturnStatement:
+                self.emit("return _END")
+        self.current = outer
+        if target.looped:
+            target.lines.insert(0, (0, "while True:", self.index))
+        elif target.loop is not None:
+            target.lines = [(depth - 1, text, index) for depth, text, index in target.lines]
+        self.splice(target, f"def {python}({''.join(param + ', ' for param in target.params)}*_):")
+
+    def memoized(self, node: Memoized, scope: Scope, python: str):
+        """Emit ``def python(...)`` calling the function of ``node`` through its table.
+
+        The table keeps results as ``FunEnv.exec`` returns them, so that
+        every engine running the program can share it.
+        """
+        fun = f"_fun_{next(self.counter)}"
+        self.function(node.fun, scope, fun)
+        table = f"_memo_{next(self.counter)}"
+        self.constants[table] = node.table
+        params = [f"_a{index}" for index in range(len(node.fun.params))]
+        arguments = ", ".join(params)
+        self.emit(f"def {python}({''.join(param + ', ' for param in params)}*_):")
+        self.indented(lambda: self.emit(f"if (_m := {table}.get(_k := {table}.key(({''.join(param + ',' for param in params)})))) is not _MISSING:"))
+        self.current.depth += 2
+        self.emit("return _signal(_m)")
+        self.current.depth -= 1
+        self.emit(f"_r = {fun}({arguments})")
+        self.emit(f"{table}.put(_k, _result(_r))")
+        self.emit("return _r")
+        self.current.depth -= 1
+
+    def loop_call(self, node: CallExpression, scope: Scope, returning: bool) -> bool:
+        """Emit a tail call of the function to itself as the next iteration of its loop."""
+        target = self.current
+        binding = target.loop
+        if binding is None or len(node.arguments) != len(target.params) or returning and not binding.returns:
+            return False
+        found = self.resolve(scope, node.callee.name)
+        if not found or found[0][0] is not binding or not found[0][1]:
+            return False
+        arguments = [self.expression(argument, scope) for argument in node.arguments]
+        if arguments:
+            self.emit(f"{', '.join(target.params)} = {', '.join(arguments)}")
+        self.emit("continue")
+        target.looped = True
+        return True
+
+    def call_statement(self, node: CallExpression, scope: Scope, tail: bool):
+        if tail and self.loop_call(node, scope, False):
+            return
+        call, form = self.call(node, scope)
+        if tail:
+            self.emit(f"return {call}" if form != "raw" else f"return _signal({call})")
+        elif form == "value":
+            # The callee always returns, which ends the caller too.
+            self.emit_return(call)
+        else:
+            if form == "protocol":
+                self.emit(f"if (_r := {call}) is not _END:")
+            else:
+                self.emit(f"if (_r := {call}) is not None and (_r := _signal(_r)) is not _END:")
+            self.indented(self.propagate)
+
+    # Expressions
+
+    def expression(self, node: Node, scope: Scope) -> str:
+        kind = type(node)
+        if kind is Identifier:
+            return self.read(scope, node.name)
+        if kind in literals:
+            return _literal(node.value)
+        if kind is BinaryExpression:
+            return self.binary(node, scope)
+        if kind is UnaryExpression:
+            expression = self.expression(node.expression, scope)
+            if node.operator == "-":
+                return f"(-{expression})"
+            if node.operator == "!":
+                return f"(not {expression})"
+            return expression
+        if kind is CallExpression:
+            call, form = self.call(node, scope)
+            if form == "value":
+                return call
+            if form == "protocol":
+                return f"(_t if (_t := {call}) is not _END and _t is not _BREAK else _value(_t))"
+            return f"(None if (_t := {call}) is None else _t.value)"
+        if kind is Fun:
+            python = f"_fun_{next(self.counter)}"
+            self.function(node, scope, python)
+            return python
+        if kind is Memoized:
+            python = f"_fun_{next(self.counter)}"
+            self.memoized(node, scope, python)
+            return python
+        if kind is ListExpression:
+            return f"_vector(({''.join(self.expression(element, scope) + ', ' for element in node.elements)}))"
+        if kind is MapExpression:
+            entries = ''.join(f"({self.expression(key, scope)}, {self.expression(value, scope)}), " for key, value in zip(node.keys, node.values))
+            return f"_map(({entries}))"
+        if kind is EmptyStatement:
+            return "None"
+        raise Exception(f"Cannot transpile {kind.__name__}")
+
+    def binary(self, node: BinaryExpression, scope: Scope) -> str:
+        operator = node.operator
+        left = self.expression(node.left, scope)
+        right = self.expression(node.right, scope)
+        level = _levels.get(operator, 0)
+        if level and type(node.left) is BinaryExpression and _levels.get(node.left.operator, 0) >= level:
+            left = left[1:-1]
+        if operator in python_operators:
+            return f"({left} {python_operators[operator]} {right})"
+        if operator == "&&" or operator == "||":
+            word = "and" if operator == "&&" else "or"
+            if right.isidentifier() or type(node.right) in literals:
+                # Evaluating the right side does nothing, so skipping it is fine.
+                return f"({left} {word} {right})"
+            # Both sides are evaluated, like BinaryExpression.eval does.
+            number = next(self.counter)
+            return f"((_a{number} {word} _b{number}) if ((_a{number} := {left}), (_b{number} := {right})) else None)"
+        return f"(({left}), ({right}), None)[2]"
+
+    def call(self, node: CallExpression, scope: Scope) -> tuple[str, str]:
+        """Python call for ``node`` and what it returns.
+
+        "value" is the value of the call, "protocol" what a transpiled
+        function returns, and "raw" what the host's function returns.
+        """
+        name = node.callee.name
+        arguments = ", ".join(self.expression(argument, scope) for argument in node.arguments)
+        found = self.resolve(scope, name)
+        if found and found[0][1]:
+            binding = found[0][0]
+            if binding.fun is not None and len(node.arguments) == len(binding.fun.params):
+                return f"{binding.python}({arguments})", "value" if binding.returns else "protocol"
+        if found:
+            callee = self.read(scope, name, "_U")
+            return f"(_f if type(_f := {callee}) is _function else _callable(_runtime, {name!r}, _f))({arguments})", "protocol"
+        if name in self.assigned:
+            # The host's variable may change while the program runs.
+            return f"_callable(_runtime, {name!r}, _U)({arguments})", "protocol"
+        if name not in self.externals:
+            self.externals[name] = self.python_name(name)
+        return f"{self.externals[name]}({arguments})", "raw"
+
+
+def _in_place(block: Block):
+    """Statements of ``block`` that run in its scope, nested blocks included."""
+    for statement in block.body:
+        kind = type(statement)
+        if kind is Block:
+            yield from _in_place(statement)
+        elif kind is Fun:
+            yield from _in_place(statement.body)
+        else:
+            yield statement
+
+
+def _statements(block: Block):
+    """Every statement a function body with ``block`` runs, outside nested functions."""
+    for statement in block.body:
+        yield statement
+        kind = type(statement)
+        if kind is Block:
+            yield from _statements(statement)
+        elif kind is Fun:
+            yield from _statements(statement.body)
+        elif kind is IfStatement:
+            yield from _statements(statement.consequent)
+            yield from _statements(statement.alternate)
+        elif kind is WhileStatement:
+            yield from _statements(statement.body)
+
+
+def _returns_value(fun: Fun) -> bool:
+    """Whether calling ``fun`` always ends in a ``return`` rather than END or BREAK."""
+    body = fun.body.body
+    if not body or type(body[-1]) is not ReturnStatement:
+        return False
+    return not any(type(statement) is BreakStatement or type(statement) is CallExpression for statement in _statements(fun.body))
+
+
+def _captures(block: Block) -> bool:
+    """Whether a function made in ``block`` may refer to a name ``block`` declares."""
+    names = {statement.id.name for statement in _in_place(block) if type(statement) is VariableDeclaration}
+    for node in walk(block):
+        if type(node) is Fun:
+            if any(type(item) is Identifier and item.name in names for item in walk(node.body)):
+                return True
+    return False
+
+
+def _literal(value) -> str:
+    if type(value) is float and not math.isfinite(value):
+        return f"float({str(value)!r})"
+    return repr(value)
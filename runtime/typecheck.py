@@ -0,0 +1,208 @@
+from runtime.ast import Assignment, BinaryExpression, Block, BoolLiteral, BreakStatement, CallExpression, EmptyStatement, FloatLiteral, Fun, Identifier, IfStatement, IntLiteral, ListExpression, MapExpression, Node, Program, ReturnStatement, StringLiteral, UnaryExpression, VariableDeclaration, WhileStatement, walk
+from runtime.compiler import binary_operators, unary_operators
+
+# Static checking of type annotations: ``let x: int = ...`` and
+# ``(a: int, b: float) => ...``. The checker infers the type of every
+# expression it can from literals, annotated variables and the operators, and
+# rejects a program that would put a value of one type in a variable or
+# parameter annotated with another, or apply an operator to types it does not
+# take. A value of unknown type is trusted to match its annotation, since
+# unannotated code is not checked. BinaryExpressions with operands of known
+# types then evaluate their operator without the guards of quickening, which
+# is only sound because the operator functions are the ones the generic path
+# applies: an untrusted annotation costs a missed error, never a wrong result.
+
+annotations = {"int": int, "float": float, "string": str, "bool": bool}
+type_names = {python: name for name, python in annotations.items()}
+
+# A value of each type for the operators to be tried on: the type of the
+# result is the type of the operation, a TypeError means it is not allowed.
+# A string takes ``%`` formatting, as it may at run time.
+_samples = {int: 3, float: 2.5, str: "%s", bool: True}
+
+_literal_types = {IntLiteral: int, FloatLiteral: float, StringLiteral: str, BoolLiteral: bool}
+
+
+def check(program: Program) -> int:
+    """Check the annotations of ``program`` and specialize what they prove.
+
+    Returns how many BinaryExpressions were specialized. Raises an
+    Exception for the first type error found.
+    """
+    checker = Checker(program)
+    checker.statements(program.body, _Scope(None, True, _declared_names(program.body)))
+    return checker.specialized
+
+
+class _Scope:
+    """Variables of one runtime: the type of each declared so far, None if unknown."""
+    __slots__ = ("parent", "function", "types", "functions", "pending")
+
+    def __init__(self, parent: "_Scope", function: bool, pending: set[str]):
+        self.parent = parent
+        # Whether the scope is a function's, or the program's.
+        self.function = function
+        self.types = dict[str, type]()
+        # The function of each variable declared with one and never assigned.
+        self.functions = dict[str, Fun]()
+        # Names the scope declares later on.
+        self.pending = pending
+
+
+class Checker:
+
+    def __init__(self, program: Program):
+        self.assigned = {node.id.name for node in walk(program) if type(node) is Assignment}
+        self.scope: _Scope = None
+        self.specialized = 0
+
+    def resolve(self, name: str) -> tuple[type, Fun]:
+        """Type of the variable ``name`` refers to, and its function if known.
+
+        Past a function's scope, a name an enclosing scope declares later
+        may or may not be declared by the time the function runs, so its
+        type is unknown.
+        """
+        scope = self.scope
+        crossed = False
+        while scope is not None:
+            if name in scope.types:
+                return scope.types[name], scope.functions.get(name)
+            if crossed and name in scope.pending:
+                return None, None
+            if scope.function:
+                crossed = True
+            scope = scope.parent
+        return None, None
+
+    def statements(self, body: list[Node], scope: _Scope):
+        outer = self.scope
+        self.scope = scope
+        for statement in body:
+            self.statement(statement)
+        self.scope = outer
+
+    def block(self, block: Block):
+        self.statements(block.body, _Scope(self.scope, False, _declared_names(block.body)))
+
+    def statement(self, node: Node):
+        kind = type(node)
+        if kind is VariableDeclaration:
+            self.declaration(node)
+        elif kind is Assignment:
+            value = self.expression(node.value)
+            expected, _ = self.resolve(node.id.name)
+            if expected is not None and value is not None and value is not expected:
+                raise Exception(f"Cannot assign a value of type {type_names[value]} to {node.id.name} of type {type_names[expected]}")
+        elif kind is ReturnStatement:
+            self.expression(node.value)
+        elif kind is IfStatement:
+            self.expression(node.test)
+            self.block(node.consequent)
+            self.block(node.alternate)
+        elif kind is WhileStatement:
+            self.expression(node.test)
+            self.block(node.body)
+        elif kind is Block or kind is Fun:
+            # Both run their statements in place.
+            for statement in (node if kind is Block else node.body).body:
+                self.statement(statement)
+        elif kind is not BreakStatement and kind is not EmptyStatement:
+            self.expression(node)
+
+    def declaration(self, node: VariableDeclaration):
+        name = node.id.name
+        if node.value_type != "any" and node.value_type not in annotations:
+            raise Exception(f"Unknown type {node.value_type} of {name}")
+        value = self.expression(node.value)
+        expected = annotations.get(node.value_type)
+        if expected is not None and value is not None and value is not expected:
+            raise Exception(f"Cannot declare {name} of type {node.value_type} with a value of type {type_names[value]}")
+        scope = self.scope
+        scope.types[name] = expected
+        if type(node.value) is Fun and name not in self.assigned:
+            scope.functions[name] = node.value
+
+    def expression(self, node: Node) -> type:
+        """Type of the value of ``node``, None if unknown."""
+        kind = type(node)
+        if kind is Identifier:
+            return self.resolve(node.name)[0]
+        if kind in _literal_types:
+            return _literal_types[kind]
+        if kind is BinaryExpression:
+            return self.binary(node)
+        if kind is UnaryExpression:
+            operand = self.expression(node.expression)
+            function = unary_operators.get(node.operator)
+            if function is None:
+                return operand
+            if operand is None:
+                return None
+            try:
+                return type(function(_samples[operand]))
+            except TypeError:
+                raise Exception(f"Unsupported operand type for {node.operator}: {type_names[operand]}") from None
+        if kind is CallExpression:
+            self.call(node)
+            return None
+        if kind is Fun:
+            self.function(node)
+            return None
+        if kind is ListExpression or kind is MapExpression:
+            # Elements are checked, but collections have no annotation.
+            for element in node.elements if kind is ListExpression else node.keys + node.values:
+                self.expression(element)
+            return None
+        return None
+
+    def binary(self, node: BinaryExpression) -> type:
+        left = self.expression(node.left)
+        right = self.expression(node.right)
+        operator = node.operator
+        if operator == "&&" or operator == "||":
+            # The value is one of the operands.
+            return left if left is right else None
+        function = binary_operators.get(operator)
+        if function is None or left is None or right is None:
+            return None
+        try:
+            result = function(_samples[left], _samples[right])
+        except TypeError:
+            raise Exception(f"Unsupported operand types for {operator}: {type_names[left]} and {type_names[right]}") from None
+        node.specialize_proven(function)
+        self.specialized += 1
+        return type(result)
+
+    def call(self, node: CallExpression):
+        arguments = [self.expression(argument) for argument in node.arguments]
+        _, fun = self.resolve(node.callee.name)
+        if fun is None:
+            return
+        for index, (value, value_type) in enumerate(zip(arguments, fun.param_types)):
+            expected = annotations.get(value_type)
+            if expected is not None and value is not None and value is not expected:
+                raise Exception(f"Argument {index + 1} of {node.callee.name} must be of type {value_type}, not {type_names[value]}")
+
+    def function(self, node: Fun):
+        scope = _Scope(self.scope, True, _declared_names(node.body.body))
+        for index, param in enumerate(node.params):
+            value_type = node.param_types[index] if index < len(node.param_types) else "any"
+            if value_type != "any" and value_type not in annotations:
+                raise Exception(f"Unknown type {value_type} of {param.name}")
+            scope.types[param.name] = annotations.get(value_type)
+        self.statements(node.body.body, scope)
+
+
+def _declared_names(body: list[Node]) -> set[str]:
+    """Names the statements of ``body`` declare in its scope."""
+    names = set[str]()
+    for statement in body:
+        kind = type(statement)
+        if kind is VariableDeclaration:
+            names.add(statement.id.name)
+        elif kind is Block:
+            names |= _declared_names(statement.body)
+        elif kind is Fun:
+            names |= _declared_names(statement.body.body)
+    return names
@@ -0,0 +1,51 @@
+from typing import Callable
+
+from runtime.ast import returning
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Vectors are NumPy arrays used as values. The engines apply binary operators
+# with Python's operators, so ``+ - * / %`` and the comparisons broadcast
+# elementwise between vectors and numbers with no support of their own, each
+# as one NumPy call. Vectors are never changed in place: every function here
+# returns a new one. Like NumPy's, integer vectors hold 64-bit integers, and
+# dividing one by zero gives inf or nan rather than an error.
+
+
+def vector_functions() -> dict[str, Callable]:
+    """Host functions making and reducing vectors, to add to ``exteral_fun``.
+
+    Reductions return plain Python numbers.
+    """
+    if numpy is None:
+        raise ImportError("Vectors need NumPy, which is not installed")
+    functions = {
+        # Constructors
+        "vector": lambda *values: numpy.array(values),
+        "arange": lambda start, stop, step=1: numpy.arange(start, stop, step),
+        "linspace": lambda start, stop, count: numpy.linspace(start, stop, count),
+        "zeros": lambda length: numpy.zeros(length, dtype=numpy.int64),
+        "ones": lambda length: numpy.ones(length, dtype=numpy.int64),
+        "where": lambda mask, left, right: numpy.where(mask, left, right),
+        "slice": lambda vector, start, stop: vector[start:stop].copy(),
+        # Reductions
+        # Streams and lists too, as streams' sum.
+        "sum": lambda vector: numpy.sum(vector) if type(vector) is numpy.ndarray else sum(vector),
+        "mean": lambda vector: numpy.mean(vector),
+        "min": lambda vector: numpy.min(vector),
+        "max": lambda vector: numpy.max(vector),
+        "dot": lambda left, right: numpy.dot(left, right),
+        "length": lambda vector: len(vector),
+        "at": lambda vector, index: vector[index],
+    }
+    return {name: returning(function, _plain) for name, function in functions.items()}
+
+
+def _plain(value):
+    # NumPy's scalars become Python's, which every engine specializes for.
+    if isinstance(value, numpy.generic):
+        return value.item()
+    return value
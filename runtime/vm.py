@@ -0,0 +1,209 @@
+from runtime.ast import BreakStatement, ReturnValue
+from runtime.bytecode import BINARY, BREAK, BUILD_LIST, BUILD_MAP, CALL, CALL_STATEMENT, DECLARE_NAME, JUMP, JUMP_IF_FALSE, LOAD_CONST, LOAD_NAME, MAKE_FUN, MEMOIZE, POP, POP_SCOPE, PUSH_SCOPE, RAISE, RETURN, STORE_NAME, TAIL_CALL, UNARY, Code, operators, unary_functions
+from runtime.compiler import BREAK as BREAK_SIGNAL
+from runtime.memo import MemoFun
+from runtime.persistent import PersistentMap, PersistentVector
+from runtime.runtime import Runtime
+
+# Calls between VM functions keep the caller's state in a list instead of on
+# the Python stack, so recursion depth is bounded by this many saved frames
+# rather than by the interpreter's recursion limit. A saved frame with its
+# runtime takes roughly 0.6 KB.
+MAX_DEPTH = 1_000_000
+
+
+class Function:
+    """Function value of the VM, the counterpart of ``FunEnv``."""
+    __slots__ = ("parent", "code")
+
+    def __init__(self, parent: Runtime, code: Code):
+        self.parent = parent
+        self.code = code
+
+    def exec(self, args: list):
+        return execute(self.code, _call_runtime(self, args))
+
+
+def _call_runtime(fun: Function, args: list) -> Runtime:
+    params = fun.code.params
+    if len(args) < len(params):
+        raise IndexError("list index out of range")
+    return Runtime(dict(zip(params, args)), fun.parent)
+
+
+def run_program(codes: list[Code], runtime: Runtime, max_depth: int = None) -> ReturnValue | None:
+    """Run the statements of ``compile_program`` like ``Program.exec``."""
+    for code in codes:
+        result = execute(code, runtime, max_depth)
+        if type(result) is ReturnValue:
+            return result
+    return None
+
+
+def execute(code: Code, runtime: Runtime, max_depth: int = None):
+    """Run ``code`` in ``runtime`` and return None, a ReturnValue or the break signal.
+
+    A call to a VM function saves the caller in ``frames`` and continues
+    with the callee in the same loop; the caller resumes once the callee
+    finishes. Deeper recursion than ``max_depth`` (``MAX_DEPTH`` by default)
+    saved frames raises RecursionError.
+    """
+    if max_depth is None:
+        max_depth = MAX_DEPTH
+    frames = list()
+    ops = code.instructions()
+    constants = code.constants
+    names = code.names
+    stack = list()
+    push = stack.append
+    pop = stack.pop
+    pc = 0
+    end = len(ops)
+    # Set when a tail call of ``return f(x)`` replaced the running frame:
+    # its result is wrapped in a ReturnValue once it finishes.
+    returning = False
+    while True:
+        while pc < end:
+            op = ops[pc]
+            arg = ops[pc + 1]
+            pc += 2
+            if op == LOAD_NAME:
+                name = names[arg]
+                scope = runtime
+                while scope is not None:
+                    context = scope.context
+                    if name in context:
+                        push(context[name])
+                        break
+                    scope = scope.parent
+                else:
+                    push(None)
+            elif op == LOAD_CONST:
+                push(constants[arg])
+            elif op == BINARY:
+                right = pop()
+                stack[-1] = operators[arg](stack[-1], right)
+            elif op == JUMP_IF_FALSE:
+                if not pop():
+                    pc = arg
+            elif op == STORE_NAME:
+                name = names[arg]
+                scope = runtime
+                while scope is not None:
+                    context = scope.context
+                    if name in context:
+                        context[name] = pop()
+                        break
+                    scope = scope.parent
+                else:
+                    raise Exception(f"Variable {name} is not declared")
+            elif op == JUMP:
+                pc = arg
+            elif op == CALL or op == CALL_STATEMENT or op == TAIL_CALL:
+                call = constants[arg]
+                name = call[0]
+                count = call[1]
+                if count:
+                    args = stack[-count:]
+                    del stack[-count:]
+                else:
+                    args = []
+                scope = runtime
+                while name not in scope.context:
+                    if scope.parent is None:
+                        external = scope.exteral_fun.get(name)
+                        result = None if external is None else external(*args)
+                        break
+                    scope = scope.parent
+                else:
+                    fun = scope.context[name]
+                    if type(fun) is Function:
+                        callee = _call_runtime(fun, args)
+                        if op == TAIL_CALL:
+                            returning = returning or call[2]
+                        else:
+                            if len(frames) >= max_depth:
+                                raise RecursionError(f"Maximum call depth of {max_depth} exceeded")
+                            frames.append((ops, constants, names, stack, pc, runtime, op, returning))
+                            stack = list()
+                            push = stack.append
+                            pop = stack.pop
+                            returning = False
+                        ops = fun.code.instructions()
+                        constants = fun.code.constants
+                        names = fun.code.names
+                        runtime = callee
+                        pc = 0
+                        end = len(ops)
+                        continue
+                    result = fun.exec(args)
+                if op == CALL:
+                    push(None if result is None else result.value)
+                elif op == TAIL_CALL and call[2]:
+                    result = ReturnValue(None if result is None else result.value)
+                    break
+                elif type(result) is ReturnValue or isinstance(result, BreakStatement):
+                    break
+            elif op == RETURN:
+                result = ReturnValue(pop())
+                break
+            elif op == DECLARE_NAME:
+                name = names[arg]
+                context = runtime.context
+                if name in context:
+                    raise Exception(f"Variable {name} is already declared")
+                versions = runtime.versions
+                if name in versions:
+                    versions[name] += 1
+                context[name] = pop()
+            elif op == UNARY:
+                stack[-1] = unary_functions[arg](stack[-1])
+            elif op == PUSH_SCOPE:
+                runtime = Runtime(parent=runtime, name=constants[arg])
+            elif op == POP_SCOPE:
+                runtime = runtime.parent
+            elif op == POP:
+                pop()
+            elif op == MAKE_FUN:
+                push(Function(runtime, constants[arg]))
+            elif op == MEMOIZE:
+                stack[-1] = MemoFun(stack[-1], constants[arg])
+            elif op == BUILD_LIST:
+                if arg:
+                    values = stack[-arg:]
+                    del stack[-arg:]
+                else:
+                    values = ()
+                push(PersistentVector.from_iterable(values))
+            elif op == BUILD_MAP:
+                if arg:
+                    values = stack[-2 * arg:]
+                    del stack[-2 * arg:]
+                else:
+                    values = ()
+                push(PersistentMap.from_items(zip(values[::2], values[1::2])))
+            elif op == BREAK:
+                result = BREAK_SIGNAL
+                break
+            elif op == RAISE:
+                raise constants[arg]
+            else:
+                raise Exception(f"Unknown opcode {op}")
+        else:
+            result = None
+        # The frame finished with ``result``. Hand it to the caller; a call
+        # statement passes a signal on, which finishes the caller as well.
+        while True:
+            if returning:
+                result = ReturnValue(None if result is None else result.value)
+            if not frames:
+                return result
+            ops, constants, names, stack, pc, runtime, op, returning = frames.pop()
+            if op == CALL:
+                stack.append(None if result is None else result.value)
+                break
+            if type(result) is not ReturnValue and not isinstance(result, BreakStatement):
+                break
+        push = stack.append
+        pop = stack.pop
+        end = len(ops)